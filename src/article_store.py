@@ -0,0 +1,231 @@
+# article_store.py
+"""Partitioned Parquet storage for scraped articles.
+
+With ``OUTPUT_FORMAT=parquet`` every output the scrapers would write as
+``name.csv`` becomes a dataset directory ``name.parquet/`` laid out as
+
+    name.parquet/site=www.pharmtech.com/month=2025-09/part-<id>-0.parquet
+
+The scraper's own columns are kept unchanged; ``site`` (domain of the
+URL column), ``month`` (of the date column, or "unknown") and ``published``
+(the parsed date) are added.  The URL column is dictionary-encoded, and
+``site``/``month`` live in the directory names, so ``read(..., site=...,
+since=...)`` opens only the matching partitions:
+
+    python -m src.article_store historical_articles.parquet --site www.fiercepharma.com --days 7
+    python -m src.article_store historical_articles.parquet --import historical_articles.csv
+
+Needs ``pyarrow`` (``pip install pyarrow``); the CSV outputs do not.
+"""
+import argparse
+import csv
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+try:
+    from src import dates
+except ImportError:
+    import dates
+
+# ---------------- CONFIG ----------------
+COMPRESSION = "zstd"
+UNKNOWN_MONTH = "unknown"
+# ----------------------------------------
+
+SITE = "site"
+MONTH = "month"
+PUBLISHED = "published"
+DERIVED_COLUMNS = (SITE, MONTH, PUBLISHED)
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("The Parquet article store needs pyarrow: pip install pyarrow")
+
+
+def dataset_path(path):
+    """``name.parquet`` directory used in place of the CSV output ``path``."""
+    root, ext = os.path.splitext(path)
+    return path if ext == ".parquet" else root + ".parquet"
+
+
+def url_column(columns):
+    return next((c for c in columns if "url" in c.lower() or c.lower() == "link"), columns[0])
+
+
+def date_column(columns):
+    return next((c for c in columns if c.lower() == "date"), None)
+
+
+def site_of(url):
+    if not url or "://" not in url:
+        return "unknown"
+    return url.split("://", 1)[1].split("/", 1)[0].lower() or "unknown"
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([(SITE, pa.string()), (MONTH, pa.string())]), flavor="hive")
+
+
+def to_table(columns, rows):
+    """Arrow table of ``rows`` (lists in ``columns`` order) plus the derived columns."""
+    require_pyarrow()
+    columns = list(columns)
+    url_col, date_col = url_column(columns), date_column(columns)
+    data = {c: [] for c in columns}
+    sites, months, published = [], [], []
+    for row in rows:
+        row = list(row) + [""] * (len(columns) - len(row))
+        for column, value in zip(columns, row):
+            data[column].append("" if value is None else str(value))
+        record = dict(zip(columns, row))
+        parsed = dates.parse_date(record.get(date_col)) if date_col else None
+        sites.append(site_of(record.get(url_col)))
+        months.append(parsed.strftime("%Y-%m") if parsed else UNKNOWN_MONTH)
+        published.append(parsed)
+
+    arrays = [pa.array(data[c], pa.string()) for c in columns]
+    arrays[columns.index(url_col)] = arrays[columns.index(url_col)].dictionary_encode()
+    arrays += [pa.array(sites, pa.string()), pa.array(months, pa.string()),
+               pa.array(published, pa.timestamp("us", tz="UTC"))]
+    return pa.Table.from_arrays(arrays, names=columns + list(DERIVED_COLUMNS))
+
+
+def append(path, columns, rows):
+    """Write ``rows`` as new files in the dataset at ``path``.
+
+    Files are written to a hidden staging directory and then renamed into
+    their partitions, so readers never see a half-written file.
+    """
+    if not rows:
+        return 0
+    table = to_table(columns, rows)
+    root = dataset_path(path)
+    staging = os.path.join(root, f".staging-{os.getpid()}-{time.time_ns()}")
+    os.makedirs(staging)
+    try:
+        ds.write_dataset(
+            table, staging, format="parquet", partitioning=_partitioning(),
+            basename_template=f"part-{time.time_ns()}-{{i}}.parquet",
+            file_options=ds.ParquetFileFormat().make_write_options(compression=COMPRESSION),
+        )
+        for folder, _, files in os.walk(staging):
+            target = os.path.join(root, os.path.relpath(folder, staging))
+            os.makedirs(target, exist_ok=True)
+            for name in files:
+                os.replace(os.path.join(folder, name), os.path.join(target, name))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return len(rows)
+
+
+def remove(path):
+    root = dataset_path(path)
+    if os.path.isdir(root):
+        shutil.rmtree(root)
+
+
+def _filter(site=None, since=None, until=None):
+    expression = None
+
+    def both(a, b):
+        return b if a is None else a & b
+
+    if site:
+        sites = [site] if isinstance(site, str) else list(site)
+        expression = both(expression, ds.field(SITE).isin(sites))
+    if since is not None:
+        since = dates.parse_date(since) if isinstance(since, str) else since
+        # month partitions first (prunes directories), then the exact timestamp
+        expression = both(expression, ds.field(MONTH) >= since.strftime("%Y-%m"))
+        expression = both(expression, ds.field(MONTH) != UNKNOWN_MONTH)
+        expression = both(expression, ds.field(PUBLISHED) >= pa.scalar(since, pa.timestamp("us", tz="UTC")))
+    if until is not None:
+        until = dates.parse_date(until) if isinstance(until, str) else until
+        expression = both(expression, ds.field(MONTH) <= until.strftime("%Y-%m"))
+        expression = both(expression, ds.field(PUBLISHED) < pa.scalar(until, pa.timestamp("us", tz="UTC")))
+    return expression
+
+
+def read(path, site=None, since=None, until=None, columns=None):
+    """Arrow table of the articles at ``path`` matching ``site`` (one or a list) and ``since``/``until``."""
+    require_pyarrow()
+    root = dataset_path(path)
+    if not os.path.isdir(root):
+        return None
+    dataset = ds.dataset(root, format="parquet", partitioning=_partitioning())
+    return dataset.to_table(columns=columns, filter=_filter(site, since, until))
+
+
+def read_rows(path, files=None):
+    """(header, rows) of the dataset at ``path`` (or only its part ``files``) with the scraper's own columns."""
+    if files is None:
+        table = read(path)
+    else:
+        require_pyarrow()
+        table = ds.dataset(list(files), format="parquet").to_table() if files else None
+    if table is None or table.num_rows == 0:
+        return [], []
+    header = [c for c in table.column_names if c not in DERIVED_COLUMNS]
+    columns = [table.column(c).to_pylist() for c in header]
+    return header, [list(row) for row in zip(*columns)]
+
+
+def import_csv(csv_path, path):
+    """Copy an existing CSV output (e.g. historical_articles.csv) into the dataset at ``path``."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return 0
+        return append(path, header, list(reader))
+
+
+def partition_files(path):
+    root = dataset_path(path)
+    return sorted(
+        os.path.join(folder, name)
+        for folder, _, files in os.walk(root)
+        if not os.path.basename(folder).startswith((".", "_"))
+        for name in files if name.endswith(".parquet")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query or load a partitioned Parquet article store.")
+    parser.add_argument("path", help="dataset directory (or the CSV output name it replaces)")
+    parser.add_argument("--site", action="append", help="domain partition to read (repeatable)")
+    parser.add_argument("--days", type=int, help="only articles published in the last N days")
+    parser.add_argument("--import", dest="import_csv", metavar="CSV", help="load an existing CSV output first")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    require_pyarrow()
+
+    if args.import_csv:
+        added = import_csv(args.import_csv, args.path)
+        print(f"📥 Imported {added} rows from {args.import_csv} into {dataset_path(args.path)}")
+
+    since = datetime.now(dates.DEFAULT_TZ) - timedelta(days=args.days) if args.days else None
+    started = time.perf_counter()
+    table = read(args.path, site=args.site, since=since)
+    elapsed = time.perf_counter() - started
+    if table is None:
+        print(f"⚠️ No dataset at {dataset_path(args.path)}")
+        return
+    print(f"🔎 {table.num_rows} articles in {elapsed * 1000:.1f} ms "
+          f"({len(partition_files(args.path))} partition files in the store)")
+    url_col = url_column([c for c in table.column_names if c not in DERIVED_COLUMNS])
+    for row in table.slice(0, args.limit).to_pylist():
+        print(f" - [{row[SITE]}] {row[PUBLISHED] or row[MONTH]} {row[url_col]}")
+
+
+if __name__ == "__main__":
+    main()
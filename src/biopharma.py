@@ -1,34 +1,54 @@
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+import argparse
+
 from bs4 import BeautifulSoup
-import pandas as pd
-import time
-import os
-from datetime import datetime, timedelta
+
+try:
+    from src import browser_extract, browser_pool, checkpoint, crawl_state, dates, deadline, fetcher, output_writer, readiness, result_stream, url_canon
+except ImportError:
+    import browser_extract
+    import browser_pool
+    import checkpoint
+    import crawl_state
+    import dates
+    import deadline
+    import fetcher
+    import output_writer
+    import readiness
+    import result_stream
+    import url_canon
 
 # ---------------- CONFIG ----------------
 BASE_SITEMAP_URL = "https://www.biopharminternational.com/sitemap.xml?category=Article%20Detail&page={}"
 OUTPUT_FILE = "C:/Users/AnjaliRani/Documents/biopharma_sitemap_urls.csv"
 SCRAPED_OUTPUT_FILE = "C:/Users/AnjaliRani/Documents/biopharma_scraped_articles.csv"
 SKIPPED_FILE = "C:/Users/AnjaliRani/Documents/biopharma_skipped_urls.txt"
+UNSCRAPED_FILE = "C:/Users/AnjaliRani/Documents/biopharma_unscraped_urls.csv"  # entries left at the deadline
+WINDOW_DAYS = 62  # only articles modified/published within this many days
+BROWSER_PROFILE = "lean"  # "lean" blocks images/fonts/trackers; "full" loads pages as-is
 # ----------------------------------------
 
+COLUMNS = ["Site URL", "Title", "Body", "Date"]
+
+# Title, body container (else all <p> joined with "||") and date, extracted in the page when rendered
+ARTICLE_SCRIPT = browser_extract.ArticleScript(
+    body=(("div", "field--name-body"), ("div", "article-content")),
+    date_sources=(dates.META, dates.TIME),
+)
+
+# Browser waits: sitemap rows / article body present (these replace fixed 3s sleeps)
+SITEMAP_READY = readiness.selector("loc, table tr td", settle=1.0, replaces=3)
+ARTICLE_READY = readiness.selector("div.field--name-body, div.article-content", settle=1.0, replaces=3)
+
 def get_urls_from_sitemap(page_num):
     """Fetch URLs from a given sitemap page"""
     url = BASE_SITEMAP_URL.format(page_num)
 
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('user-agent=Mozilla/5.0')
-
-    driver = webdriver.Chrome(options=chrome_options)
-    driver.get(url)
-    time.sleep(3)  # Wait for page load
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    driver.quit()
+    with browser_pool.session(BROWSER_PROFILE) as driver:
+        driver.get(url)
+        SITEMAP_READY(driver)
+        page_src = driver.page_source
+    soup = BeautifulSoup(page_src, "html.parser")
 
     urls = []
     # First check XML <loc> tags
@@ -55,134 +75,127 @@ def get_urls_from_sitemap(page_num):
 
 def scrape_article_selenium(url):
     """Scrape title, body, date from an article URL"""
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('user-agent=Mozilla/5.0')
-
-    driver = webdriver.Chrome(options=chrome_options)
     try:
-        driver.set_page_load_timeout(60)
-        driver.get(url)
-        time.sleep(3)
-
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-
-        # Title
-        title = soup.title.string.strip() if soup.title else ""
-
-        # Body
-        body = ""
-        body_div = soup.find("div", class_="field--name-body")
-        if not body_div:
-            body_div = soup.find("div", class_="article-content")
-        if body_div:
-            body = body_div.get_text(separator="\n", strip=True)
-        else:
-            paragraphs = soup.find_all("p")
-            body = "||".join([p.get_text(strip=True) for p in paragraphs])
-
-        # Date
-        date = ""
-        meta_date = soup.find("meta", attrs={"property": "article:published_time"})
-        if meta_date and meta_date.get("content"):
-            date = meta_date["content"]
-        else:
-            time_tag = soup.find("time")
-            if time_tag and time_tag.get("datetime"):
-                date = time_tag["datetime"]
-            elif time_tag:
-                date = time_tag.get_text(strip=True)
-
-        driver.quit()
-        return {"Site URL": url, "Title": title, "Body": body, "Date": date}
+        page = fetcher.fetch(url, wait=ARTICLE_READY, page_load_timeout=60, profile=BROWSER_PROFILE, extract=ARTICLE_SCRIPT)
+        article = browser_extract.extract(page, ARTICLE_SCRIPT)  # in-page script on the browser tier
+        return {"Site URL": url, "Title": article["title"], "Body": article["body"], "Date": article["date"]}
 
     except Exception as e:
-        driver.quit()
         print(f"❌ Error scraping {url}: {e}")
         with open(SKIPPED_FILE, "a", encoding="utf-8") as f:
             f.write(f"{url}\t{str(e)}\n")
         return {"Site URL": url, "Title": "", "Body": "", "Date": ""}
 
-def main():
-    print("🚀 Starting PharmTech Scraper...")
+def reset_outputs():
+    """Remove the previous run's output file."""
+    output_writer.remove(SCRAPED_OUTPUT_FILE)
 
-    if os.path.exists(SCRAPED_OUTPUT_FILE):
-        os.remove(SCRAPED_OUTPUT_FILE)
 
-    today = datetime.now()
-    two_months_ago = today - timedelta(days=62)
-    columns = ["Site URL", "Title", "Body", "Date"]
+def cutoff_date():
+    return dates.cutoff(WINDOW_DAYS)
 
-    page = 1
+
+def discover_articles(start_page=1):
+    """Yield sitemap entries inside the scrape window ({"URL", "LastMod", "Group", "Index"}), page by page."""
+    two_months_ago = cutoff_date()
+    page = start_page
     while True:
         print(f"🔎 Fetching sitemap page {page}...")
         url_entries = get_urls_from_sitemap(page)
         if not url_entries:
             print(f"✅ No more URLs found at page {page}. Stopping pagination.")
-            break
+            return
 
-        stop_current_page = False
-        for idx, entry in enumerate(url_entries, 1):
-            url = entry["URL"]
+        for index, entry in enumerate(url_entries):
             lastmod = entry.get("LastMod", "")
 
             # Check sitemap lastmod date first
-            if lastmod:
-                try:
-                    for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%SZ"):
-                        try:
-                            article_date = datetime.strptime(lastmod[:19], fmt)
-                            break
-                        except ValueError:
-                            continue
-                    else:
-                        article_date = None
-                    if article_date and article_date < two_months_ago:
-                        print(f"⏭️ Found old article ({lastmod}) → Skipping rest of sitemap page {page}")
-                        stop_current_page = True
-                        break
-                except Exception:
-                    pass
-
-            print(f"[Page {page} | {idx}/{len(url_entries)}] Scraping: {url}")
-            result = scrape_article_selenium(url)
-
-            # Validate scraped date
-            scraped_date = result.get("Date", "")
-            if scraped_date:
-                try:
-                    for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%SZ"):
-                        try:
-                            sd = datetime.strptime(scraped_date[:19], fmt)
-                            break
-                        except ValueError:
-                            continue
-                    else:
-                        sd = None
-                    if sd and sd < two_months_ago:
-                        print(f"⏭️ Found old article ({scraped_date}) → Skipping rest of sitemap page {page}")
-                        stop_current_page = True
-                        break
-                except Exception:
-                    pass
-
-            df_row = pd.DataFrame([result], columns=columns)
-            if not os.path.exists(SCRAPED_OUTPUT_FILE):
-                df_row.to_csv(SCRAPED_OUTPUT_FILE, index=False, mode="w")
-            else:
-                df_row.to_csv(SCRAPED_OUTPUT_FILE, index=False, mode="a", header=False)
-
-            print(f"    → Done: Title length={len(result['Title'])}, Body length={len(result['Body'])}")
-
-        if stop_current_page:
-            page += 1
-            continue
+            if dates.is_older(lastmod, two_months_ago):
+                print(f"⏭️ Found old article ({lastmod}) → Skipping rest of sitemap page {page}")
+                break
+            yield {"URL": entry["URL"], "LastMod": lastmod, "Group": page, "Index": index}
 
         page += 1
 
+
+def scrape_entry(entry):
+    """Scrape one sitemap entry; None when the scraped date is older than the window."""
+    result = scrape_article_selenium(entry["URL"])
+
+    # Validate scraped date
+    scraped_date = result.get("Date", "")
+    if dates.is_older(scraped_date, cutoff_date()):
+        return None
+    return result
+
+
+def save_result(result):
+    """Queue one scraped article for the output CSV (written in batches by ``output_writer``)."""
+    output_writer.get_writer(SCRAPED_OUTPUT_FILE, COLUMNS).write(result)
+
+
+def main(resume=False):
+    print("🚀 Starting PharmTech Scraper...")
+
+    progress = checkpoint.Checkpoint(SCRAPED_OUTPUT_FILE, url_column=COLUMNS[0])
+    start_page = progress.start(resume=resume)
+    if not progress.resuming():
+        reset_outputs()
+
+    state = crawl_state.get_state()
+    unchanged = 0
+    stopped_pages = set()
+    # streamed page by page in the sitemap's own newest-first order; stops when the deadline nears
+    plan = deadline.WorkPlan(discover_articles(start_page), name="biopharma", sort=False)
+    for entry in plan:
+        url = entry["URL"]
+        lastmod = entry["LastMod"]
+        page = entry["Group"]
+        if page in stopped_pages or progress.done_before(entry):
+            continue
+
+        if state.is_unchanged(url, lastmod):
+            unchanged += 1
+            progress.advance(entry)
+            continue
+        if not url_canon.claim(url):  # already fetched this run (another sitemap, a URL variant)
+            progress.advance(entry)
+            continue
+
+        print(f"[Page {page}] Scraping: {url}")
+        with plan.measure(entry):
+            result = scrape_entry(entry)
+        if result is None:
+            print(f"⏭️ Found old article ({url}) → Skipping rest of sitemap page {page}")
+            state.record(url, site=fetcher.domain_of(url), lastmod=lastmod)
+            stopped_pages.add(page)
+            progress.advance(entry, page_done=True)
+            continue
+
+        save_result(result)
+        result_stream.emit(result)
+        if result["Body"]:
+            state.record(url, site=fetcher.domain_of(url), lastmod=lastmod,
+                         content=(result["Title"], result["Body"], result["Date"]))
+
+        progress.advance(entry)
+
+        print(f"    → Done: Title length={len(result['Title'])}, Body length={len(result['Body'])}")
+
+    print(f"⏭️ Skipped {unchanged} articles unchanged since the last run")
+    readiness.report()
+    browser_extract.report()
+    url_canon.report()
+    plan.report(UNSCRAPED_FILE)
+    output_writer.close(SCRAPED_OUTPUT_FILE)
+    if plan.stopped:
+        progress.save()  # continue from here with --resume
+    else:
+        progress.finish()
     print(f"✅ Scraping complete. Articles saved to {SCRAPED_OUTPUT_FILE}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Scrape recent BioPharm International articles from its paginated sitemap.")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the last checkpoint instead of starting over")
+    main(resume=parser.parse_args().resume)
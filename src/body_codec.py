@@ -0,0 +1,128 @@
+# body_codec.py
+"""zstd compression of stored article bodies with per-site dictionaries.
+
+Bodies from one site share navigation, footers and publisher boilerplate,
+which plain per-row compression can't exploit (each row is compressed on
+its own).  A dictionary trained on a site's own bodies supplies that shared
+text up front, so even short bodies compress well.
+
+Dictionaries live in the ``body_dicts`` table of the database that holds
+the bodies.  ``dict_id`` 0 means plain zstd (no dictionary yet for the
+site).  ``should_train()`` asks for the first dictionary once a site has
+``MIN_TRAIN_SAMPLES`` bodies and for a new one after ``RETRAIN_DAYS`` when
+at least ``RETRAIN_NEW_ROWS`` bodies were added since; the store then calls
+``train()`` and re-encodes the site's rows with the new dictionary.
+
+Needs ``zstandard`` (``pip install zstandard``); without it bodies are
+stored as plain text.
+"""
+import threading
+from datetime import datetime, timedelta
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ---------------- CONFIG ----------------
+LEVEL = 9                 # zstd level; bodies are written once and read many times
+DICT_SIZE = 64 * 1024     # bytes per site dictionary
+MIN_TRAIN_SAMPLES = 20    # bodies a site needs before its first dictionary
+TRAIN_SAMPLES = 1000      # most recent bodies used for (re)training
+RETRAIN_DAYS = 7
+RETRAIN_NEW_ROWS = 100
+# ----------------------------------------
+
+PLAIN = 0  # dict_id of rows compressed without a dictionary
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS body_dicts (
+    dict_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    site        TEXT,
+    trained_at  TEXT,
+    samples     INTEGER,
+    data        BLOB
+)
+"""
+
+
+def available():
+    return zstandard is not None
+
+
+class BodyCodec:
+    """Compresses/decompresses bodies for one SQLite connection (callers hold its lock)."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._conn.execute(SCHEMA)
+        self._lock = threading.Lock()
+        self._current = {}        # site -> dict_id of its newest dictionary
+        self._compressors = {}    # dict_id -> ZstdCompressor
+        self._decompressors = {}  # dict_id -> ZstdDecompressor
+        for dict_id, site in self._conn.execute("SELECT dict_id, site FROM body_dicts ORDER BY dict_id"):
+            self._current[site] = dict_id
+
+    def _dict_data(self, dict_id):
+        row = self._conn.execute("SELECT data FROM body_dicts WHERE dict_id = ?", (dict_id,)).fetchone()
+        return zstandard.ZstdCompressionDict(row[0]) if row else None
+
+    def _compressor(self, dict_id):
+        with self._lock:
+            if dict_id not in self._compressors:
+                data = self._dict_data(dict_id) if dict_id != PLAIN else None
+                self._compressors[dict_id] = zstandard.ZstdCompressor(level=LEVEL, dict_data=data)
+            return self._compressors[dict_id]
+
+    def _decompressor(self, dict_id):
+        with self._lock:
+            if dict_id not in self._decompressors:
+                data = self._dict_data(dict_id) if dict_id != PLAIN else None
+                self._decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=data)
+            return self._decompressors[dict_id]
+
+    def encode(self, site, text):
+        """(blob, dict_id) for ``text`` using the site's current dictionary."""
+        dict_id = self._current.get(site, PLAIN)
+        return self._compressor(dict_id).compress((text or "").encode("utf-8")), dict_id
+
+    def decode(self, blob, dict_id):
+        if blob is None:
+            return None
+        return self._decompressor(dict_id or PLAIN).decompress(blob).decode("utf-8")
+
+    def dictionary_age(self, site):
+        row = self._conn.execute(
+            "SELECT trained_at FROM body_dicts WHERE dict_id = ?", (self._current.get(site),)).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def should_train(self, site, rows_for_site, rows_since_training):
+        trained_at = self.dictionary_age(site)
+        if trained_at is None:
+            return rows_for_site >= MIN_TRAIN_SAMPLES
+        return (datetime.now() - trained_at >= timedelta(days=RETRAIN_DAYS)
+                and rows_since_training >= RETRAIN_NEW_ROWS)
+
+    def train(self, site, samples):
+        """Train and store a new dictionary for ``site`` from ``samples`` (texts); returns its dict_id."""
+        encoded = [s.encode("utf-8") for s in samples if s]
+        data = zstandard.train_dictionary(DICT_SIZE, encoded, level=LEVEL)
+        cur = self._conn.execute(
+            "INSERT INTO body_dicts (site, trained_at, samples, data) VALUES (?, ?, ?, ?)",
+            (site, datetime.now().isoformat(timespec="seconds"), len(encoded), data.as_bytes()))
+        self._current[site] = cur.lastrowid
+        return cur.lastrowid
+
+    def drop_unused(self, table):
+        """Delete dictionaries no row of ``table`` refers to any more (after re-encoding)."""
+        self._conn.execute(
+            f"DELETE FROM body_dicts WHERE dict_id NOT IN (SELECT DISTINCT dict_id FROM {table} WHERE dict_id IS NOT NULL) "
+            "AND dict_id NOT IN (SELECT MAX(dict_id) FROM body_dicts GROUP BY site)")
+        with self._lock:
+            self._compressors.clear()
+            self._decompressors.clear()
+
+    def sizes(self):
+        """{site: dictionary bytes} for the current dictionaries."""
+        return {site: len(self._conn.execute("SELECT data FROM body_dicts WHERE dict_id = ?", (dict_id,)).fetchone()[0])
+                for site, dict_id in self._current.items()}
@@ -0,0 +1,192 @@
+# browser_extract.py
+"""Article extraction that runs inside the page on the browser tier.
+
+A site describes its article layout once:
+
+    ARTICLE_SCRIPT = browser_extract.ArticleScript(
+        body=(("div", "field--name-body"), ("div", "article-content")),
+        date_sources=(dates.META, dates.TIME))
+
+When ``fetcher`` renders a page in Chrome it runs the script in the page
+and receives only ``{title, body, date, canonical}`` as one JSON string,
+instead of transferring ``page_source`` and re-parsing it in Python.  Pages
+fetched over HTTP are extracted from their HTML with the same description,
+so ``extract(page, script)`` gives the same fields on either tier.
+
+The in-page date lookup follows ``dates``: the source that last found a
+date on the domain is tried first, and the one that succeeds is recorded.
+
+``report()`` compares bytes transferred and Python CPU per page for the
+two paths; with ``EXTRACT_MEASURE_PAGE_SIZE=1`` it also shows the size
+``page_source`` would have had (serialising it costs time on every page).
+"""
+import json
+import os
+import threading
+import time
+
+try:
+    from src import dates, fetcher, html_parser
+except ImportError:
+    import dates
+    import fetcher
+    import html_parser
+
+# ---------------- CONFIG ----------------
+MEASURE_PAGE_SIZE = os.environ.get("EXTRACT_MEASURE_PAGE_SIZE") == "1"  # also return outerHTML length
+# ----------------------------------------
+
+EXTRACT_JS = r"""
+const cfg = arguments[0];
+const clean = (text) => (text || '').split('\n').map((line) => line.trim()).filter(Boolean).join('\n');
+
+let body = '';
+let container = null;
+for (const [tag, cls] of cfg.body) {
+    container = document.querySelector(tag + '.' + CSS.escape(cls));
+    if (container) break;
+}
+if (container) {
+    body = clean(container.innerText);
+} else if (cfg.paragraph_join !== null) {
+    body = Array.from(document.querySelectorAll('p'), (p) => (p.innerText || '').trim()).join(cfg.paragraph_join);
+}
+
+const findJsonLd = (data) => {
+    if (Array.isArray(data)) {
+        for (const item of data) { const found = findJsonLd(item); if (found) return found; }
+    } else if (data && typeof data === 'object') {
+        for (const key of cfg.jsonld_keys) { if (data[key]) return data[key]; }
+        if (data['@graph']) return findJsonLd(data['@graph']);
+    }
+    return null;
+};
+
+let date = '';
+let dateSource = null;
+for (const source of cfg.date_sources) {
+    if (source === 'meta') {
+        for (const [attr, value] of cfg.meta_attrs) {
+            const meta = document.querySelector('meta[' + attr + '="' + value + '"]');
+            if (meta && meta.content) { date = meta.content; break; }
+        }
+    } else if (source === 'time') {
+        const el = document.querySelector('time');
+        if (el) date = el.getAttribute('datetime') || (el.innerText || '').trim();
+    } else if (source === 'jsonld') {
+        for (const script of document.querySelectorAll('script[type="application/ld+json"]')) {
+            try { date = findJsonLd(JSON.parse(script.textContent)) || ''; } catch (e) { date = ''; }
+            if (date) break;
+        }
+    }
+    if (date) { dateSource = source; break; }
+}
+
+const head = (document.title + ' ' + (document.body ? document.body.innerText.slice(0, 2000) : '')).toLowerCase();
+const canonical = document.querySelector('link[rel="canonical"]');
+return JSON.stringify({
+    title: (document.title || '').trim(),
+    body: body,
+    date: String(date).trim(),
+    date_source: dateSource,
+    canonical: canonical ? canonical.href : location.href,
+    challenge: cfg.challenge_markers.some((marker) => head.includes(marker)),
+    html_chars: cfg.measure ? document.documentElement.outerHTML.length : null,
+});
+"""
+
+_stats = {"script": [0, 0, 0.0, 0], "html": [0, 0, 0.0, 0]}  # pages, chars transferred, python seconds, page chars
+_stats_lock = threading.Lock()
+
+
+def _record(mode, chars, seconds, page_chars=0):
+    with _stats_lock:
+        entry = _stats[mode]
+        entry[0] += 1
+        entry[1] += chars
+        entry[2] += seconds
+        entry[3] += page_chars or 0
+
+
+class ArticleScript:
+    """Where a site keeps its article title, body and date."""
+
+    def __init__(self, body=(), paragraph_join="||", date_sources=dates.SOURCES, jsonld_keys=("datePublished",)):
+        self.body = tuple(body)                # (tag, class) containers tried in order
+        self.paragraph_join = paragraph_join   # join all <p> with this when no container; None for ""
+        self.date_sources = tuple(date_sources)
+        self.jsonld_keys = tuple(jsonld_keys)
+
+    def config(self, domain=None):
+        # challenge markers are matched against the title/visible text, not raw HTML
+        markers = [m.replace("<title>", "").replace("</title>", "") for m in fetcher.CHALLENGE_MARKERS]
+        return {
+            "body": [list(b) for b in self.body],
+            "paragraph_join": self.paragraph_join,
+            "date_sources": dates.source_order(domain, self.date_sources),
+            "jsonld_keys": list(self.jsonld_keys),
+            "meta_attrs": [list(attrs.items())[0] for attrs in dates.META_ATTRS],
+            "challenge_markers": markers,
+            "measure": MEASURE_PAGE_SIZE,
+        }
+
+    def run(self, driver):
+        """Run the extraction in the loaded page; returns the decoded fields."""
+        domain = fetcher.domain_of(driver.current_url)
+        raw = driver.execute_script(EXTRACT_JS, self.config(domain))
+        started = time.process_time()
+        data = json.loads(raw)
+        if data.get("date_source"):
+            dates.remember_source(domain, data["date_source"])
+        _record("script", len(raw), time.process_time() - started, data.get("html_chars"))
+        return data
+
+    def from_html(self, html, url):
+        """The same fields extracted from an HTML document in Python."""
+        started = time.process_time()
+        doc = html_parser.parse(html)
+        body_node = None
+        for tag, cls in self.body:
+            body_node = doc.find(tag, class_=cls)
+            if body_node:
+                break
+        if body_node:
+            body = body_node.text(separator="\n", strip=True)
+        elif self.paragraph_join is not None:
+            body = self.paragraph_join.join(p.text(strip=True) for p in doc.find_all("p"))
+        else:
+            body = ""
+        canonical = next((link.get("href") for link in doc.find_all("link")
+                          if (link.get("rel") or "").lower() == "canonical"), None)
+        data = {
+            "title": doc.title(),
+            "body": body,
+            "date": dates.extract_date(doc, fetcher.domain_of(url), sources=self.date_sources,
+                                       jsonld_keys=self.jsonld_keys),
+            "canonical": canonical or url,
+        }
+        _record("html", len(html), time.process_time() - started, len(html))
+        return data
+
+
+def extract(page, script):
+    """{title, body, date, canonical} of a ``fetcher.FetchResult`` from either tier."""
+    if page.data is not None:
+        return page.data
+    return script.from_html(page.html, page.final_url)
+
+
+def report():
+    with _stats_lock:
+        stats = {mode: list(entry) for mode, entry in _stats.items()}
+    if not any(entry[0] for entry in stats.values()):
+        return
+    print("📦 Article extraction:")
+    for mode, (pages, chars, seconds, page_chars) in stats.items():
+        if not pages:
+            continue
+        line = (f" - {mode:6} {pages:5} pages, {chars / pages / 1024:7.1f} KB transferred/page, "
+                f"{seconds / pages * 1000:6.2f} ms Python CPU/page")
+        if mode == "script" and page_chars:
+            line += f" (page_source would be {page_chars / pages / 1024:.1f} KB)"
+        print(line)
@@ -0,0 +1,317 @@
+# browser_pool.py
+"""Pool of warm headless Chrome sessions shared by every site scraper.
+
+One chromedriver service is started per process and every pooled browser
+talks to it, so the per-article cost is navigation only.  Sessions are
+checked out with ``session()`` and are recycled after ``MAX_PAGES_PER_SESSION``
+checkouts or when the browser's resident memory passes ``MAX_RSS_MB``.
+
+Sessions come in two profiles, each with its own pool: ``"full"`` loads
+pages like a desktop browser, while ``"lean"`` uses the ``eager`` page-load
+strategy (return at DOMContentLoaded) and blocks images, fonts, media and
+known ad/analytics hosts through CDP, since the scrapers only read text.
+``session(profile=...)`` selects one; sites pick theirs in their CONFIG.
+"""
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.remote_connection import ChromeRemoteConnection
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+try:
+    import psutil
+except ImportError:  # RSS based recycling is skipped without psutil
+    psutil = None
+
+try:
+    from src import readiness
+except ImportError:
+    import readiness
+
+# ---------------- CONFIG ----------------
+POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "3"))
+MAX_PAGES_PER_SESSION = 200   # recycle a browser after this many checkouts
+MAX_RSS_MB = 1500             # recycle a browser whose process tree grows past this
+CHECKOUT_TIMEOUT = 600        # seconds to wait for a free session
+HEADLESS = True
+DEFAULT_PROFILE = os.environ.get("BROWSER_PROFILE", "lean")
+# ----------------------------------------
+
+FULL = "full"
+LEAN = "lean"
+PROFILES = (FULL, LEAN)
+
+# Network.setBlockedURLs patterns used by the lean profile
+BLOCKED_RESOURCES = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+]
+BLOCKED_HOSTS = [
+    "*doubleclick.net*", "*googlesyndication.com*", "*googletagmanager.com*",
+    "*google-analytics.com*", "*googleadservices.com*", "*adservice.google.*",
+    "*facebook.net*", "*connect.facebook.com*", "*hotjar.com*", "*scorecardresearch.com*",
+    "*quantserve.com*", "*taboola.com*", "*outbrain.com*", "*adnxs.com*", "*amazon-adsystem.com*",
+    "*criteo.*", "*pubmatic.com*", "*rubiconproject.com*", "*moatads.com*", "*chartbeat.*",
+    "*newrelic.com*", "*nr-data.net*", "*hubspot.com*", "*hs-analytics.net*", "*linkedin.com/px*",
+    "*licdn.com*", "*twitter.com/i/adsct*", "*ads-twitter.com*", "*bing.com/bat*", "*clarity.ms*",
+    "*segment.com*", "*segment.io*", "*optimizely.com*", "*cookielaw.org*", "*onetrust.com*",
+]
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+              "AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/116.0.0.0 Safari/537.36")
+
+# errors after which a session is thrown away instead of being returned
+DEAD_SESSION_ERRORS = ("invalid session id", "no such window", "chrome not reachable",
+                       "disconnected", "session deleted")
+
+
+def build_options(headless=HEADLESS, user_agent=USER_AGENT, profile=FULL):
+    """Chrome options used for every pooled session of ``profile``."""
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument('--headless=new')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--log-level=3')
+    chrome_options.add_argument(f'user-agent={user_agent}')
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    if profile == LEAN:
+        chrome_options.page_load_strategy = "eager"
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+        })
+    return chrome_options
+
+
+def block_heavy_resources(driver):
+    """Block heavy resource types and ad/tracker hosts for this session (lean profile)."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_RESOURCES + BLOCKED_HOSTS})
+    except Exception as e:
+        print(f"⚠️ Could not enable resource blocking: {e}")
+
+
+class PooledChrome(webdriver.Remote):
+    """Remote session on the shared chromedriver that keeps the CDP helper.
+
+    ``webdriver.Chrome`` owns (and stops) its own chromedriver, so pooled
+    sessions attach to the shared service as plain remote sessions instead.
+    """
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+
+class PooledSession:
+    """A pooled browser plus the bookkeeping used to decide when to recycle it."""
+
+    def __init__(self, driver, browser_pid=None):
+        self.driver = driver
+        self.browser_pid = browser_pid
+        self.pages = 0
+        self.created_at = time.time()
+
+    def rss_mb(self):
+        """Resident memory of the browser process tree, or 0 when unknown."""
+        if psutil is None or not self.browser_pid:
+            return 0
+        try:
+            proc = psutil.Process(self.browser_pid)
+            procs = [proc] + proc.children(recursive=True)
+            return sum(p.memory_info().rss for p in procs) / (1024 * 1024)
+        except psutil.Error:
+            return 0
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class BrowserPool:
+    """Fixed-size pool of Chrome sessions behind one long-lived chromedriver."""
+
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES_PER_SESSION, max_rss_mb=MAX_RSS_MB,
+                 options_factory=build_options, warm=True, profile=FULL):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown browser profile {profile!r}; expected one of {PROFILES}")
+        self.profile = profile
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.options_factory = options_factory
+        self._idle = []  # LIFO keeps the hottest session in use
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)  # notified when a session or a slot frees up
+        self._created = 0
+        self._browser_pids = set()
+        self._closed = False
+        self.stats = {"created": 0, "recycled": 0, "discarded": 0, "checkouts": 0}
+
+        self.service = Service(executable_path=ChromeDriverManager().install(), log_output=os.devnull)
+        self.service.start()
+
+        if warm:
+            for _ in range(size):
+                self._created += 1
+                self._checkin_idle(self._new_session())
+
+    def _driver_children(self):
+        if psutil is None or not self.service.process:
+            return set()
+        try:
+            return {p.pid for p in psutil.Process(self.service.process.pid).children()}
+        except psutil.Error:
+            return set()
+
+    def _new_session(self):
+        """Start a browser for a slot already reserved in ``_created`` (the lock is not held meanwhile)."""
+        try:
+            before = self._driver_children()
+            executor = ChromeRemoteConnection(remote_server_addr=self.service.service_url, keep_alive=True)
+            driver = PooledChrome(command_executor=executor, options=self.options_factory(profile=self.profile))
+            new_pids = self._driver_children() - before
+        except Exception:
+            with self._available:
+                self._created -= 1
+                self._available.notify()
+            raise
+        with self._lock:
+            self.stats["created"] += 1
+            new_pids -= self._browser_pids
+            # browsers started concurrently can't be told apart: those skip RSS based recycling
+            browser_pid = new_pids.pop() if len(new_pids) == 1 else None
+            if browser_pid:
+                self._browser_pids.add(browser_pid)
+        try:
+            driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": USER_AGENT})
+        except Exception:
+            pass
+        if self.profile == LEAN:
+            block_heavy_resources(driver)
+        readiness.install(driver)
+        return PooledSession(driver, browser_pid=browser_pid)
+
+    def _checkout(self):
+        give_up = time.time() + CHECKOUT_TIMEOUT
+        with self._available:
+            while True:
+                if self._closed:
+                    raise RuntimeError(f"Browser pool ({self.profile}) is shut down")
+                if self._idle:
+                    self.stats["checkouts"] += 1
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1  # reserve the slot; Chrome starts after the lock is released
+                    self.stats["checkouts"] += 1
+                    break
+                left = give_up - time.time()
+                if left <= 0:
+                    raise TimeoutError(f"No browser session free after {CHECKOUT_TIMEOUT}s")
+                self._available.wait(left)
+        return self._new_session()
+
+    def _checkin_idle(self, pooled):
+        with self._available:
+            self._idle.append(pooled)
+            self._available.notify()
+
+    def _retire(self, pooled, reason):
+        pooled.quit()
+        with self._available:
+            self._created -= 1
+            self._browser_pids.discard(pooled.browser_pid)
+            self.stats[reason] += 1
+            self._available.notify()  # a waiter may start a replacement in the freed slot
+
+    def _checkin(self, pooled):
+        pooled.pages += 1
+        if self._closed:
+            self._retire(pooled, "discarded")
+            return
+        if pooled.pages >= self.max_pages or (self.max_rss_mb and pooled.rss_mb() > self.max_rss_mb):
+            self._retire(pooled, "recycled")
+            return
+        try:
+            pooled.driver.get("about:blank")  # drop the previous page's DOM and timers
+        except Exception:
+            self._retire(pooled, "discarded")
+            return
+        self._checkin_idle(pooled)
+
+    @contextmanager
+    def session(self):
+        """Check a warm driver out of the pool for the duration of the block."""
+        pooled = self._checkout()
+        try:
+            yield pooled.driver
+        except Exception as e:
+            if any(msg in str(e).lower() for msg in DEAD_SESSION_ERRORS):
+                self._retire(pooled, "discarded")
+            else:
+                self._checkin(pooled)
+            raise
+        else:
+            self._checkin(pooled)
+
+    def shutdown(self):
+        """Quit every idle session and stop the shared chromedriver."""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._available.notify_all()
+        for pooled in idle:
+            pooled.quit()
+        try:
+            self.service.stop()
+        except Exception:
+            pass
+
+
+_pools = {}  # profile -> BrowserPool
+_pool_lock = threading.Lock()
+_pool_defaults = {}
+
+
+def configure(**kwargs):
+    """Set the ``BrowserPool`` arguments used when a pool is created lazily."""
+    _pool_defaults.update(kwargs)
+
+
+def get_pool(profile=None, **kwargs):
+    """Return the process-wide pool for ``profile``, creating it on first use."""
+    profile = profile or DEFAULT_PROFILE
+    with _pool_lock:
+        if profile not in _pools:
+            if not _pools:
+                atexit.register(shutdown)
+            _pools[profile] = BrowserPool(**{**_pool_defaults, **kwargs, "profile": profile})
+        return _pools[profile]
+
+
+def session(profile=None):
+    """Shortcut for ``get_pool(profile).session()``."""
+    return get_pool(profile).session()
+
+
+def shutdown():
+    """Tear down every process-wide pool that was started."""
+    with _pool_lock:
+        for profile, pool in list(_pools.items()):
+            pool.shutdown()
+            print(f"🧹 Browser pool ({profile}) closed: {pool.stats}")
+        _pools.clear()
@@ -1,342 +1,134 @@
 # catalent_scraper_robust_sitemap.py
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from bs4 import BeautifulSoup
 import pandas as pd
-import time
 import os
-import re
-import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta
-import json
+
+try:
+    from src import browser_extract, crawl_state, dates, deadline, fetcher, output_writer, result_stream, sitemap_crawler, url_canon
+except ImportError:
+    import browser_extract
+    import crawl_state
+    import dates
+    import deadline
+    import fetcher
+    import output_writer
+    import result_stream
+    import sitemap_crawler
+    import url_canon
 
 # ---------------- CONFIG ----------------
 BASE_SITEMAP_URL = "http://www.catalent.com/sitemap_index.xml"
 OUTPUT_FILE = "C:/Users/AnjaliRani/Documents/catalent_sitemap_urls.csv"
 SCRAPED_OUTPUT_FILE = "C:/Users/AnjaliRani/Documents/catalent_scraped_articles.csv"
 SKIPPED_FILE = "C:/Users/AnjaliRani/Documents/catalent_skipped_urls.txt"
-DEBUG_SITEMAP_DUMP = "C:/Users/AnjaliRani/Documents/debug_sitemap_index.html"  # created if parsing yields 0 loc
-HEADLESS = True  # Set to False to watch the browser when debugging
+UNSCRAPED_FILE = "C:/Users/AnjaliRani/Documents/catalent_unscraped_urls.csv"  # entries left at the deadline
+WINDOW_DAYS = 60  # only articles modified/published within this many days
+BROWSER_PROFILE = "lean"  # "lean" blocks images/fonts/trackers; "full" loads pages as-is
 # ----------------------------------------
 
-# a realistic user agent (change if you want)
-USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-              "AppleWebKit/537.36 (KHTML, like Gecko) "
-              "Chrome/116.0.0.0 Safari/537.36")
-
-
-def make_driver():
-    chrome_options = Options()
-    if HEADLESS:
-        chrome_options.add_argument('--headless=new')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument(f'user-agent={USER_AGENT}')
-    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    chrome_options.add_experimental_option('useAutomationExtension', False)
-    driver = webdriver.Chrome(options=chrome_options)
-    try:
-        driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": USER_AGENT})
-    except Exception:
-        pass
-    return driver
-
-
-def get_child_sitemaps(base_url):
-    """Fetch child sitemap URLs from sitemap index."""
-    driver = None
-    try:
-        driver = make_driver()
-        driver.set_page_load_timeout(30)
-        driver.get(base_url)
-
-        try:
-            WebDriverWait(driver, 15).until(lambda d: d.execute_script("return document.readyState") == "complete")
-        except Exception:
-            time.sleep(2)
-
-        page_src = driver.page_source
-        sitemaps = []
-
-        # Try parsing with ElementTree
-        try:
-            root = ET.fromstring(page_src)
-            for elem in root.iter():
-                if isinstance(elem.tag, str) and elem.tag.lower().endswith('loc'):
-                    if elem.text and elem.text.strip():
-                        sitemaps.append(elem.text.strip())
-            if sitemaps:
-                print(f"✅ Found {len(sitemaps)} child sitemaps (via ElementTree)")
-                return sitemaps
-        except ET.ParseError:
-            pass
-
-        # Try BeautifulSoup XML
-        soup = BeautifulSoup(page_src, "xml")
-        loc_tags = soup.find_all("loc")
-        if loc_tags:
-            sitemaps = [loc.get_text(strip=True) for loc in loc_tags if loc.get_text(strip=True)]
-            if sitemaps:
-                print(f"✅ Found {len(sitemaps)} child sitemaps (via BeautifulSoup)")
-                return sitemaps
+COLUMNS = ["Site URL", "Title", "Body", "Date"]
 
-        # Regex fallback
-        text = soup.get_text(separator=" ")
-        urls = re.findall(r"https?://[^\s\"'<>]+", text)
-        filtered = [u for u in urls if ('sitemap' in u.lower()) or u.lower().endswith('.xml')]
-        seen = set()
-        sitemaps = []
-        for u in filtered:
-            if u not in seen:
-                seen.add(u)
-                sitemaps.append(u)
-        if sitemaps:
-            print(f"✅ Found {len(sitemaps)} child sitemaps (via regex fallback)")
-            return sitemaps
-
-        # Debug dump if nothing found
-        with open(DEBUG_SITEMAP_DUMP, "w", encoding="utf-8") as fh:
-            fh.write(page_src)
-        print(f"⚠️ No <loc> tags found. Wrote debug dump to: {DEBUG_SITEMAP_DUMP}")
-        return []
-    except Exception as e:
-        print(f"❌ Error fetching sitemap index: {e}")
-        return []
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except:
-                pass
-
-
-def get_urls_from_sitemap(sitemap_url):
-    """Fetch URLs + LastMod from a child sitemap (XML or HTML table)."""
-    driver = None
-    try:
-        driver = make_driver()
-        driver.set_page_load_timeout(30)
-        driver.get(sitemap_url)
-        try:
-            WebDriverWait(driver, 15).until(lambda d: d.execute_script("return document.readyState") == "complete")
-        except Exception:
-            time.sleep(2)
-
-        page_src = driver.page_source
-        urls = []
-
-        # XML parsing
-        try:
-            root = ET.fromstring(page_src)
-            for elem in root.iter():
-                if isinstance(elem.tag, str) and elem.tag.lower().endswith('loc'):
-                    loc_text = elem.text.strip() if elem.text else None
-                    urls.append({"URL": loc_text, "LastMod": None})
-            if urls:
-                return urls
-        except ET.ParseError:
-            pass
-
-        # loc tags with BS4
-        soup = BeautifulSoup(page_src, "lxml-xml")
-        loc_tags = soup.find_all("loc")
-        for loc in loc_tags:
-            parent = loc.find_parent()
-            lastmod = parent.find("lastmod").get_text(strip=True) if parent and parent.find("lastmod") else None
-            urls.append({"URL": loc.get_text(strip=True), "LastMod": lastmod})
-        if urls:
-            return urls
-
-        # HTML table sitemap
-        soup = BeautifulSoup(page_src, "html.parser")
-        table = soup.find("table")
-        if table:
-            rows = table.find_all("tr")
-            for row in rows[1:]:
-                cols = row.find_all("td")
-                if not cols:
-                    continue
-                link = cols[0].get_text(strip=True)
-                lastmod = cols[2].get_text(strip=True) if len(cols) > 2 else None
-                if link:
-                    urls.append({"URL": link, "LastMod": lastmod})
-            if urls:
-                print(f"✅ Extracted {len(urls)} URLs from table sitemap")
-                return urls
-
-        print(f"⚠️ No URLs found in sitemap: {sitemap_url}")
-        return []
-    except Exception as e:
-        print(f"❌ Error fetching sitemap {sitemap_url}: {e}")
-        return []
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except:
-                pass
+# Title, body container (else all <p> joined with "||") and date, extracted in the page when rendered
+ARTICLE_SCRIPT = browser_extract.ArticleScript(
+    body=(("div", "field--name-body"), ("div", "article-content")),
+)
 
 
 def scrape_article_selenium(url):
     """Scrape title, body, and published date from an article URL"""
-    driver = None
     try:
-        driver = make_driver()
-        driver.set_page_load_timeout(60)
-        driver.get(url)
-        try:
-            WebDriverWait(driver, 15).until(lambda d: d.execute_script("return document.readyState") == "complete")
-        except Exception:
-            time.sleep(2)
-
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-
-        # Title
-        title = soup.title.string.strip() if soup.title else ""
-
-        # Body
-        body = ""
-        body_div = soup.find("div", class_="field--name-body")
-        if not body_div:
-            body_div = soup.find("div", class_="article-content")
-        if body_div:
-            body = body_div.get_text(separator="\n", strip=True)
-        else:
-            paragraphs = soup.find_all("p")
-            body = "||".join([p.get_text(strip=True) for p in paragraphs])
-
-        # Date
-        date = ""
-        # meta tag
-        meta_date = soup.find("meta", attrs={"property": "article:published_time"})
-        if meta_date and meta_date.get("content"):
-            date = meta_date["content"]
-
-        # time tag
-        if not date:
-            time_tag = soup.find("time")
-            if time_tag and time_tag.get("datetime"):
-                date = time_tag["datetime"]
-            elif time_tag:
-                date = time_tag.get_text(strip=True)
-
-        # JSON-LD schema (Yoast)
-        if not date:
-            ld_json = soup.find("script", {"type": "application/ld+json"})
-            if ld_json:
-                try:
-                    data = json.loads(ld_json.string)
-                    if isinstance(data, dict) and "datePublished" in data:
-                        date = data["datePublished"]
-                    elif isinstance(data, list):
-                        for item in data:
-                            if "datePublished" in item:
-                                date = item["datePublished"]
-                                break
-                except Exception as e:
-                    print(f"⚠️ Could not parse JSON-LD for {url}: {e}")
-
-        return {"Site URL": url, "Title": title, "Body": body, "Date": date}
+        page = fetcher.fetch(url, page_load_timeout=60, profile=BROWSER_PROFILE, extract=ARTICLE_SCRIPT)
+        article = browser_extract.extract(page, ARTICLE_SCRIPT)  # in-page script on the browser tier
+        return {"Site URL": url, "Title": article["title"], "Body": article["body"], "Date": article["date"]}
     except Exception as e:
         print(f"❌ Error scraping {url}: {e}")
         with open(SKIPPED_FILE, "a", encoding="utf-8") as f:
             f.write(f"{url}\t{str(e)}\n")
         return {"Site URL": url, "Title": "", "Body": "", "Date": ""}
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except:
-                pass
 
 
-def main():
-    print("🚀 Starting Catalent Scraper...")
-
-    if os.path.exists(SCRAPED_OUTPUT_FILE):
-        os.remove(SCRAPED_OUTPUT_FILE)
+def reset_outputs():
+    """Remove the previous run's output files."""
+    output_writer.remove(SCRAPED_OUTPUT_FILE)
     if os.path.exists(OUTPUT_FILE):
         os.remove(OUTPUT_FILE)
-    if os.path.exists(DEBUG_SITEMAP_DUMP):
-        try:
-            os.remove(DEBUG_SITEMAP_DUMP)
-        except:
-            pass
 
-    today = datetime.now()
-    two_months_ago = today - timedelta(days=60)
-    columns = ["Site URL", "Title", "Body", "Date"]
 
-    child_sitemaps = get_child_sitemaps(BASE_SITEMAP_URL)
+def cutoff_date():
+    return dates.cutoff(WINDOW_DAYS)
+
 
-    for sm_idx, sm in enumerate(child_sitemaps, 1):
-        print(f"\n🔎 Processing sitemap {sm_idx}/{len(child_sitemaps)}: {sm}")
-        url_entries = get_urls_from_sitemap(sm)
+def discover_articles():
+    """Sitemap entries inside the scrape window ({"URL", "LastMod", "Group"})."""
+    # Index + all child sitemaps streamed concurrently; each child stops at its first old entry
+    url_entries = sitemap_crawler.crawl_sitemaps(BASE_SITEMAP_URL, cutoff=cutoff_date(), stop_on_old=True)
 
-        if url_entries:
-            df_urls = pd.DataFrame(url_entries)
-            if not os.path.exists(OUTPUT_FILE):
-                df_urls.to_csv(OUTPUT_FILE, index=False, mode="w")
-            else:
-                df_urls.to_csv(OUTPUT_FILE, index=False, mode="a", header=False)
-        else:
-            print(f"⚠️ No URLs found in sitemap: {sm}")
+    if url_entries:
+        df_urls = pd.DataFrame([{"URL": e.url, "LastMod": e.lastmod} for e in url_entries])
+        df_urls.to_csv(OUTPUT_FILE, index=False, mode="w")
+    else:
+        print(f"⚠️ No URLs found under sitemap index: {BASE_SITEMAP_URL}")
 
-        stop_current_sitemap = False
-        for idx, entry in enumerate(url_entries, 1):
-            url = entry["URL"]
-            lastmod = entry.get("LastMod", "")
+    return [{"URL": e.url, "LastMod": e.lastmod, "Group": e.sitemap} for e in url_entries]
 
-            # Stop if sitemap lastmod is old
-            if lastmod:
-                try:
-                    article_date = None
-                    for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%SZ"):
-                        try:
-                            article_date = datetime.strptime(lastmod[:19], fmt)
-                            break
-                        except ValueError:
-                            continue
-                    if article_date and article_date < two_months_ago:
-                        print(f"⏭️ Old article ({lastmod}) → Skipping rest of sitemap {sm}")
-                        stop_current_sitemap = True
-                        break
-                except Exception:
-                    pass
 
-            print(f"[Sitemap {sm_idx} | {idx}/{len(url_entries)}] Scraping: {url}")
-            result = scrape_article_selenium(url)
+def scrape_entry(entry):
+    """Scrape one sitemap entry; None when the article is older than the window."""
+    result = scrape_article_selenium(entry["URL"])
 
-            scraped_date = result.get("Date", "")
-            if scraped_date:
-                try:
-                    sd = None
-                    for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%SZ"):
-                        try:
-                            sd = datetime.strptime(scraped_date[:19], fmt)
-                            break
-                        except ValueError:
-                            continue
-                    if sd and sd < two_months_ago:
-                        print(f"⏭️ Old article ({scraped_date}) → Skipping rest of sitemap {sm}")
-                        stop_current_sitemap = True
-                        break
-                except Exception:
-                    pass
+    if dates.is_older(result.get("Date", ""), cutoff_date()):
+        return None
+    return result
 
-            df_row = pd.DataFrame([result], columns=columns)
-            if not os.path.exists(SCRAPED_OUTPUT_FILE):
-                df_row.to_csv(SCRAPED_OUTPUT_FILE, index=False, mode="w")
-            else:
-                df_row.to_csv(SCRAPED_OUTPUT_FILE, index=False, mode="a", header=False)
 
-            print(f"    → Done: Title length={len(result['Title'])}, Body length={len(result['Body'])}, Date={result['Date']}")
+def save_result(result):
+    """Queue one scraped article for the output CSV (written in batches by ``output_writer``)."""
+    output_writer.get_writer(SCRAPED_OUTPUT_FILE, COLUMNS).write(result)
 
-        if stop_current_sitemap:
+
+def main():
+    print("🚀 Starting Catalent Scraper...")
+
+    reset_outputs()
+    url_entries = discover_articles()
+
+    state = crawl_state.get_state()
+    unchanged = 0
+    stopped_sitemaps = set()
+    plan = deadline.WorkPlan(url_entries, name="catalent")  # newest first, only what fits the deadline
+    for idx, entry in enumerate(plan, 1):
+        url = entry["URL"]
+        lastmod = entry["LastMod"]
+        sm = entry["Group"]
+        if sm in stopped_sitemaps:
+            continue
+        if state.is_unchanged(url, lastmod):
+            unchanged += 1
             continue
+        if not url_canon.claim(url):  # already fetched this run (another sitemap, a URL variant)
+            continue
+
+        print(f"[{idx}/{len(url_entries)}] Scraping: {url}")
+        with plan.measure(entry):
+            result = scrape_entry(entry)
+        if result is None:
+            print(f"⏭️ Old article → Skipping rest of sitemap {sm}")
+            state.record(url, site=fetcher.domain_of(url), lastmod=lastmod)
+            stopped_sitemaps.add(sm)
+            continue
+
+        save_result(result)
+        result_stream.emit(result)
+        if result["Body"]:
+            state.record(url, site=fetcher.domain_of(url), lastmod=lastmod,
+                         content=(result["Title"], result["Body"], result["Date"]))
+
+        print(f"    → Done: Title length={len(result['Title'])}, Body length={len(result['Body'])}, Date={result['Date']}")
 
+    print(f"⏭️ Skipped {unchanged} articles unchanged since the last run")
+    browser_extract.report()
+    url_canon.report()
+    plan.report(UNSCRAPED_FILE)
+    output_writer.close(SCRAPED_OUTPUT_FILE)
     print(f"✅ Scraping complete.")
     print(f"📂 Sitemap URLs saved to: {OUTPUT_FILE}")
     print(f"📝 Articles saved to: {SCRAPED_OUTPUT_FILE}")
@@ -0,0 +1,167 @@
+# checkpoint.py
+"""Resumable progress for the paginated sitemap scrapers.
+
+``biopharma`` and ``pharmtech_new`` walk ``sitemap.xml?...&page=N`` from
+page 1 and are often stopped by the driver's ``SCRAPER_TIMEOUT``.  While
+they run, a ``Checkpoint`` saves a small JSON file next to the output every
+``SAVE_EVERY`` entries or ``SAVE_SECONDS``, and once more at exit (a
+timeout's SIGTERM becomes ``SystemExit``, so that includes timeouts):
+
+    {"page": 7, "index": 41, "last_url": "https://...", "page_done": false,
+     "output_offset": 183204, "saved_at": "2025-09-30 10:12:05"}
+
+``main(resume=True)`` (``--resume`` on the command line, or
+``python driver.py --resume``) keeps the partial output instead of deleting
+it, starts pagination at the checkpoint page and skips what the interrupted
+run already handled: the entries up to ``last_url`` and any article flushed
+to the output after the checkpoint (found by reading the output from
+``output_offset``).  A run that reaches the end removes the file.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+try:
+    from src import output_writer
+except ImportError:
+    import output_writer
+
+# ---------------- CONFIG ----------------
+SAVE_EVERY = 10      # entries handled between checkpoints
+SAVE_SECONDS = 60    # ... or seconds, whichever comes first
+# ----------------------------------------
+
+
+def checkpoint_path(output_path):
+    """State file kept next to (and named after) a scraper's output."""
+    return os.path.splitext(output_path)[0] + ".checkpoint.json"
+
+
+class Checkpoint:
+    """Progress of one paginated run: the last sitemap entry handled and the output size then."""
+
+    def __init__(self, output_path, url_column="Site URL", path=None, save_every=SAVE_EVERY,
+                 save_seconds=SAVE_SECONDS):
+        self.output_path = output_path
+        self.url_column = url_column
+        self.path = path or checkpoint_path(output_path)
+        self.save_every = save_every
+        self.save_seconds = save_seconds
+        self._lock = threading.Lock()
+        self._position = None      # (page, index, url, page_done) of the last entry handled
+        self._unsaved = 0
+        self._saved_at = time.time()
+        self._active = False
+        self._resume = None        # state of the interrupted run
+        self._flushed = set()      # its articles written after its last checkpoint
+        self._passed = False       # resume point reached on the checkpoint page
+        self.skipped = 0
+
+    def load(self):
+        """The saved state, or None when there is no (readable) checkpoint."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable checkpoint {self.path}: {e}")
+            return None
+
+    def start(self, resume=False):
+        """Begin a run; returns the sitemap page to start from (1 unless resuming)."""
+        if not self._active:
+            self._active = True
+            atexit.register(self._save_at_exit)
+        state = self.load() if resume else None
+        if state is None:
+            if resume:
+                print(f"⚠️ No checkpoint at {self.path} → starting from page 1")
+            self.clear()
+            return 1
+
+        self._resume = state
+        header, rows = output_writer.tail_rows(self.output_path, state.get("output_offset"))
+        if self.url_column in header:
+            column = header.index(self.url_column)
+            self._flushed = {row[column] for row in rows if len(row) > column}
+        page = state["page"] + 1 if state.get("page_done") else state["page"]
+        print(f"↩️ Resuming from sitemap page {page} after {state.get('last_url')} "
+              f"(checkpoint of {state.get('saved_at')}, {len(self._flushed)} later articles already saved)")
+        return page
+
+    def resuming(self):
+        return self._resume is not None
+
+    def done_before(self, entry):
+        """True for a sitemap entry the interrupted run already handled."""
+        state = self._resume
+        if state is None:
+            return False
+        done = entry["URL"] in self._flushed
+        if not done and entry["Group"] == state["page"] and not self._passed:
+            if entry["URL"] == state.get("last_url"):
+                self._passed = True
+                done = True
+            else:
+                # earlier on the page (a newer article may have pushed last_url further down)
+                done = entry.get("Index", 0) <= state.get("index", -1)
+        if done:
+            self.skipped += 1
+        return done
+
+    def advance(self, entry, page_done=False):
+        """Mark ``entry`` handled; saves the checkpoint when one is due."""
+        with self._lock:
+            self._position = (entry["Group"], entry.get("Index", 0), entry["URL"], page_done)
+            self._unsaved += 1
+            due = self._unsaved >= self.save_every or time.time() - self._saved_at >= self.save_seconds
+        if due:
+            self.save()
+
+    def save(self):
+        """Flush the output and write the current position (atomically)."""
+        with self._lock:
+            if self._position is None:
+                return
+            page, index, url, page_done = self._position
+            state = {
+                "page": page,
+                "index": index,
+                "last_url": url,
+                "page_done": page_done,
+                "output_offset": output_writer.offset(self.output_path),
+                "saved_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            tmp_path = f"{self.path}.tmp-{os.getpid()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._unsaved = 0
+            self._saved_at = time.time()
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def finish(self):
+        """The run reached the end: nothing to resume."""
+        self._active = False
+        self.clear()
+        if self.skipped:
+            print(f"↩️ Resume skipped {self.skipped} entries the interrupted run had handled")
+
+    def _save_at_exit(self):
+        if not self._active:
+            return
+        try:
+            self.save()
+            if self._position:
+                print(f"💾 Checkpoint saved at sitemap page {self._position[0]} → rerun with --resume")
+        except Exception as e:
+            print(f"❌ Could not save checkpoint {self.path}: {e}")
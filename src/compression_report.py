@@ -0,0 +1,148 @@
+# compression_report.py
+"""Compression ratio and throughput of the history store against plain CSV.
+
+Loads one or more article CSVs (``historical_articles.csv``,
+``scraped_articles.csv`` ...) into a throwaway ``history_store`` database
+and reports:
+
+* body bytes as text, as per-row zstd without a dictionary and with the
+  per-site dictionaries ``body_codec`` trains
+* file size of the CSV against the SQLite store
+* write and read throughput (rows/sec) of the CSV and of the store
+
+    python -m src.compression_report [src/historical_articles.csv ...]
+"""
+import argparse
+import csv
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    from src import body_codec, history_store
+except ImportError:
+    import body_codec
+    import history_store
+
+# ---------------- CONFIG ----------------
+DEFAULT_FILES = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "historical_articles.csv"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "scraped_articles.csv"),
+]
+# ----------------------------------------
+
+
+def load(paths):
+    """(header, rows) of every existing CSV in ``paths`` (header of the first one)."""
+    header, rows = None, []
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"⚠️ {path} not found, skipping")
+            continue
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            file_header = next(reader, None)
+            if file_header:
+                header = header or file_header
+                rows.extend(reader)
+    return header, rows
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def rate(count, seconds):
+    return count / seconds if seconds else float("inf")
+
+
+def csv_throughput(header, rows, folder):
+    path = os.path.join(folder, "articles.csv")
+
+    def write():
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    def read():
+        with open(path, newline="", encoding="utf-8") as f:
+            return sum(1 for _ in csv.reader(f)) - 1
+
+    _, write_s = timed(write)
+    _, read_s = timed(read)
+    return os.path.getsize(path), write_s, read_s
+
+
+def store_throughput(header, rows, folder):
+    path = os.path.join(folder, "articles.db")
+    store = history_store.HistoryStore(path)
+    records = history_store.records_from_rows(header, rows)
+
+    def write():
+        for start in range(0, len(records), history_store.LOOKUP_CHUNK):
+            store.upsert(records[start:start + history_store.LOOKUP_CHUNK])
+
+    _, write_s = timed(write)
+    stored, read_s = timed(store.rows)
+    store._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size = os.path.getsize(path)
+    return store, len(stored), size, write_s, read_s
+
+
+def body_sizes(store):
+    """(text bytes, plain zstd bytes, dictionary zstd bytes) of the stored bodies."""
+    conn = store._conn
+    text = plain = packed = 0
+    plain_codec = body_codec.zstandard.ZstdCompressor(level=body_codec.LEVEL)
+    for body, body_z, dict_id in conn.execute("SELECT body, body_z, dict_id FROM history"):
+        raw = store._body(body, body_z, dict_id).encode("utf-8")
+        text += len(raw)
+        plain += len(plain_codec.compress(raw))
+        packed += len(body_z)
+    return text, plain, packed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare dictionary-compressed history storage with plain CSV.")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_FILES)
+    args = parser.parse_args()
+
+    if not body_codec.available():
+        print("❌ zstandard is not installed (pip install zstandard)")
+        return
+    header, rows = load(args.paths)
+    if not rows:
+        print("⚠️ No rows to measure")
+        return
+
+    folder = tempfile.mkdtemp(prefix="compression_report_")
+    try:
+        csv_size, csv_write_s, csv_read_s = csv_throughput(header, rows, folder)
+        store, stored, db_size, db_write_s, db_read_s = store_throughput(header, rows, folder)
+        text, plain, packed = body_sizes(store)
+        dict_bytes = sum(store.codec.sizes().values())
+        store.close()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    print(f"📄 {len(rows)} CSV rows → {stored} distinct articles in the store")
+    print("🗜️ Bodies")
+    print(f" - text              {text / 1024:10.0f} KB")
+    print(f" - zstd, no dict     {plain / 1024:10.0f} KB   ratio {rate(text, plain):5.1f}x")
+    print(f" - zstd + site dicts {packed / 1024:10.0f} KB   ratio {rate(text, packed):5.1f}x"
+          f"   (+{dict_bytes / 1024:.0f} KB of dictionaries)")
+    print("💾 Files")
+    print(f" - CSV               {csv_size / 1024:10.0f} KB")
+    print(f" - history store     {db_size / 1024:10.0f} KB   ({rate(csv_size, db_size):.1f}x smaller)")
+    print("⚡ Throughput (rows/sec)")
+    print(f" - CSV   write {rate(len(rows), csv_write_s):10.0f}   read {rate(len(rows), csv_read_s):10.0f}")
+    print(f" - store write {rate(len(rows), db_write_s):10.0f}   read {rate(stored, db_read_s):10.0f}"
+          "   (write includes dictionary training)")
+
+
+if __name__ == "__main__":
+    main()
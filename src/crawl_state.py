@@ -0,0 +1,145 @@
+# crawl_state.py
+"""Persistent per-URL crawl state shared by the site scrapers.
+
+A small SQLite table keyed by URL remembers the sitemap lastmod seen when an
+article was last scraped, when it was fetched, the HTTP validators
+(ETag / Last-Modified) and a hash of the extracted content.  Scrapers ask
+``is_unchanged(url, lastmod)`` before fetching, so a daily run only pays for
+new or updated articles; their CSV outputs therefore hold that run's new and
+changed articles only.
+
+A second table keeps each domain's running seconds-per-article estimate,
+which ``deadline`` uses to plan time-boxed runs.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+# ---------------- CONFIG ----------------
+STATE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "crawl_state.db")
+# ----------------------------------------
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_state (
+    url           TEXT PRIMARY KEY,
+    site          TEXT,
+    lastmod       TEXT,
+    fetched_at    TEXT,
+    etag          TEXT,
+    last_modified TEXT,
+    content_hash  TEXT
+)
+"""
+COSTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS url_costs (
+    domain   TEXT PRIMARY KEY,
+    seconds  REAL,
+    samples  INTEGER
+)
+"""
+
+
+def content_hash(*parts):
+    """Stable hash of the extracted fields of an article."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class CrawlState:
+    """Thread-safe wrapper around the crawl_state table."""
+
+    def __init__(self, path=STATE_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        self._conn.execute(COSTS_SCHEMA)
+        self._conn.commit()
+
+    def get(self, url):
+        """Stored row for ``url`` as a dict, or None."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT url, site, lastmod, fetched_at, etag, last_modified, content_hash "
+                "FROM crawl_state WHERE url = ?", (url,))
+            row = cur.fetchone()
+        if row is None:
+            return None
+        keys = ("url", "site", "lastmod", "fetched_at", "etag", "last_modified", "content_hash")
+        return dict(zip(keys, row))
+
+    def is_unchanged(self, url, lastmod):
+        """True when ``url`` was scraped before with the same sitemap lastmod."""
+        if not lastmod:
+            return False
+        row = self.get(url)
+        return row is not None and row["lastmod"] == lastmod
+
+    def record(self, url, site=None, lastmod=None, etag=None, last_modified=None, content=None):
+        """Store the outcome of a successful scrape; returns True if the content changed."""
+        new_hash = content_hash(*content) if content is not None else None
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            cur = self._conn.execute("SELECT content_hash FROM crawl_state WHERE url = ?", (url,))
+            old = cur.fetchone()
+            self._conn.execute(
+                "INSERT INTO crawl_state (url, site, lastmod, fetched_at, etag, last_modified, content_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET "
+                "site = COALESCE(excluded.site, site), lastmod = excluded.lastmod, "
+                "fetched_at = excluded.fetched_at, "
+                "etag = COALESCE(excluded.etag, etag), last_modified = COALESCE(excluded.last_modified, last_modified), "
+                "content_hash = COALESCE(excluded.content_hash, content_hash)",
+                (url, site, lastmod, now, etag, last_modified, new_hash))
+            self._conn.commit()
+        return old is None or new_hash is None or old[0] != new_hash
+
+    def record_validators(self, url, etag=None, last_modified=None):
+        """Remember the HTTP validators last served for ``url``."""
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO crawl_state (url, etag, last_modified) VALUES (?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified",
+                (url, etag, last_modified))
+            self._conn.commit()
+
+    def costs(self):
+        """{domain: (seconds per article, samples)} learned on earlier runs."""
+        with self._lock:
+            rows = self._conn.execute("SELECT domain, seconds, samples FROM url_costs").fetchall()
+        return {domain: (seconds, samples) for domain, seconds, samples in rows}
+
+    def record_cost(self, domain, seconds, samples):
+        """Store the running per-article cost estimate of ``domain``."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO url_costs (domain, seconds, samples) VALUES (?, ?, ?) "
+                "ON CONFLICT(domain) DO UPDATE SET seconds = excluded.seconds, samples = excluded.samples",
+                (domain, seconds, samples))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def get_state(path=STATE_DB):
+    """Process-wide ``CrawlState`` (scrapers running in threads share it)."""
+    global _state
+    with _state_lock:
+        if _state is None:
+            _state = CrawlState(path)
+        return _state
@@ -0,0 +1,201 @@
+# dates.py
+"""Date parsing and extraction shared by every scraper.
+
+``parse_date()`` turns sitemap lastmods and article dates into
+timezone-aware datetimes (naive values are taken as UTC).  ISO-8601 goes
+through ``datetime.fromisoformat``; a few fixed formats and finally
+``dateutil`` catch the rest.  Results are memoised, since the same
+lastmod strings repeat across thousands of sitemap entries.
+
+``extract_date()`` finds an article's date in its HTML from the
+``<meta>`` tags, a ``<time>`` element or JSON-LD.  The source that worked
+last on a domain is tried first on the next page from that domain.
+"""
+import json
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+try:
+    from dateutil import parser as dateparser
+except ImportError:  # fixed formats only
+    dateparser = None
+
+try:
+    from src import html_parser
+except ImportError:
+    import html_parser
+
+# ---------------- CONFIG ----------------
+DEFAULT_TZ = timezone.utc
+PARSE_CACHE_SIZE = 8192
+# ----------------------------------------
+
+FALLBACK_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y/%m/%d", "%d/%m/%Y", "%B %d, %Y", "%b %d, %Y", "%d %B %Y")
+
+META = "meta"
+TIME = "time"
+JSON_LD = "jsonld"
+SOURCES = (META, TIME, JSON_LD)
+
+META_ATTRS = (
+    {"property": "article:published_time"},
+    {"name": "pubdate"},
+    {"name": "date"},
+)
+
+_FRACTION_RE = re.compile(r"(\.\d+)")
+
+_preferred = {}  # domain -> source that found the last date
+_preferred_lock = threading.Lock()
+
+
+def _aware(dt):
+    return dt.replace(tzinfo=DEFAULT_TZ) if dt.tzinfo is None else dt
+
+
+def _fromisoformat(text):
+    if text.endswith(("Z", "z")):
+        text = text[:-1] + "+00:00"
+    # fromisoformat before 3.11 only takes 3 or 6 fractional digits
+    text = _FRACTION_RE.sub(lambda m: (m.group(1) + "000000")[:7], text, count=1)
+    return datetime.fromisoformat(text)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_date(value):
+    """Timezone-aware datetime for ``value``, or None when it can't be parsed."""
+    if not value:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+
+    try:
+        return _aware(_fromisoformat(text))
+    except ValueError:
+        pass
+
+    for fmt in FALLBACK_FORMATS:
+        try:
+            return _aware(datetime.strptime(text, fmt))
+        except ValueError:
+            continue
+
+    if dateparser is not None:
+        try:
+            return _aware(dateparser.parse(text))
+        except (ValueError, OverflowError, TypeError):
+            pass
+    return None
+
+
+def to_day(value):
+    """``YYYY-MM-DD`` for ``value``, or None when it can't be parsed."""
+    dt = parse_date(value)
+    return dt.strftime("%Y-%m-%d") if dt else None
+
+
+def cutoff(days):
+    """Aware datetime ``days`` before now."""
+    return datetime.now(DEFAULT_TZ) - timedelta(days=days)
+
+
+def is_older(value, limit):
+    """True only when ``value`` parses and is before ``limit``."""
+    dt = parse_date(value)
+    return dt is not None and limit is not None and dt < _aware(limit)
+
+
+def is_recent(value, limit):
+    """True when ``value`` is missing, unparseable or not older than ``limit``."""
+    return not is_older(value, limit)
+
+
+# ---------------- extraction from HTML ----------------
+
+def _from_meta(doc, jsonld_keys):
+    for attrs in META_ATTRS:
+        content = doc.meta_content(attrs)
+        if content:
+            return content
+    return None
+
+
+def _from_time(doc, jsonld_keys):
+    time_tag = doc.find("time")
+    if time_tag:
+        return time_tag.get("datetime") or time_tag.text(strip=True) or None
+    return None
+
+
+def _jsonld_date(data, keys):
+    if isinstance(data, list):
+        for item in data:
+            found = _jsonld_date(item, keys)
+            if found:
+                return found
+    elif isinstance(data, dict):
+        for key in keys:
+            if data.get(key):
+                return data[key]
+        if "@graph" in data:
+            return _jsonld_date(data["@graph"], keys)
+    return None
+
+
+def _from_jsonld(doc, jsonld_keys):
+    for text in doc.jsonld_texts():
+        if not text or "date" not in text:
+            continue  # skip breadcrumb/organisation blocks without parsing them
+        try:
+            found = _jsonld_date(json.loads(text), jsonld_keys)
+        except ValueError:
+            continue
+        if found:
+            return found
+    return None
+
+
+_EXTRACTORS = {META: _from_meta, TIME: _from_time, JSON_LD: _from_jsonld}
+
+
+def extract_date(page, domain=None, sources=SOURCES, jsonld_keys=("datePublished",)):
+    """Raw date string of an article page, or "" when none of ``sources`` has one.
+
+    ``page`` is an ``html_parser.Document`` (a BeautifulSoup object is
+    wrapped).  ``sources`` is the site's normal lookup order; the source that
+    succeeded last on ``domain`` is moved to the front.
+    """
+    doc = html_parser.as_document(page)
+    for source in source_order(domain, sources):
+        found = _EXTRACTORS[source](doc, jsonld_keys)
+        if found:
+            remember_source(domain, source)
+            return str(found).strip()
+    return ""
+
+
+def source_order(domain, sources=SOURCES):
+    """``sources`` with the one that last found a date on ``domain`` moved to the front."""
+    with _preferred_lock:
+        preferred = _preferred.get(domain)
+    order = list(sources)
+    if preferred in order:
+        order.remove(preferred)
+        order.insert(0, preferred)
+    return order
+
+
+def remember_source(domain, source):
+    """Record that ``source`` found the date on ``domain`` (tried first next time)."""
+    if domain:
+        with _preferred_lock:
+            _preferred[domain] = source
+
+
+def preferred_sources():
+    """Snapshot of the source currently tried first per domain."""
+    with _preferred_lock:
+        return dict(_preferred)
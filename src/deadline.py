@@ -0,0 +1,187 @@
+# deadline.py
+"""Time-boxed runs: newest articles first, and only what fits the budget.
+
+The driver gives every scraper process a deadline (``set_deadline``), and
+``SCRAPER_DEADLINE`` (epoch seconds) does the same for a scraper started on
+its own.  A site's sitemap entries then go through a ``WorkPlan``:
+
+    plan = deadline.WorkPlan(url_entries, name="catalent")
+    for entry in plan:
+        with plan.measure(entry):
+            result = scrape_entry(entry)
+    plan.report(UNSCRAPED_FILE)
+
+* entries are ordered by descending lastmod (undated ones last); a
+  paginated sitemap that is streamed page by page keeps its own
+  newest-first order instead (``sort=False``).  When such a plan stops,
+  the rest of the current page (entries sharing its ``Group``) is still
+  listed as unscraped, and later pages are not fetched
+* each domain's cost per article is a running average of measured scrapes,
+  kept in ``crawl_state`` across runs
+* an entry is only started while its estimated cost fits in the time left
+  before the deadline minus ``SAFETY_MARGIN``; the margin leaves time for
+  flushing the outputs and quitting Chrome before the driver's SIGTERM.
+  Once nothing fits, the plan stops
+* ``report()`` prints what was done and writes what was left unscraped
+  (URL, lastmod, estimated seconds) to a CSV
+"""
+import csv
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    from src import crawl_state, dates, fetcher
+except ImportError:
+    import crawl_state
+    import dates
+    import fetcher
+
+# ---------------- CONFIG ----------------
+SAFETY_MARGIN = 45       # seconds kept back for flushing outputs and quitting Chrome
+DEFAULT_COST = 10.0      # seconds per article assumed for a domain never measured
+COST_SMOOTHING = 0.2     # weight of the newest measurement in the running average
+# ----------------------------------------
+
+_deadline = float(os.environ["SCRAPER_DEADLINE"]) if os.environ.get("SCRAPER_DEADLINE") else None
+
+
+def set_deadline(when):
+    """Epoch seconds by which this process must be done (None: no limit)."""
+    global _deadline
+    _deadline = when
+
+
+def remaining():
+    """Seconds left for work before the deadline (less the safety margin), or None when unbounded."""
+    if _deadline is None:
+        return None
+    return _deadline - SAFETY_MARGIN - time.time()
+
+
+class CostModel:
+    """Running seconds-per-article estimate of each domain."""
+
+    def __init__(self, state=None, smoothing=COST_SMOOTHING, default=DEFAULT_COST):
+        self.state = state or crawl_state.get_state()
+        self.smoothing = smoothing
+        self.default = default
+        self._lock = threading.Lock()
+        self._costs = self.state.costs()
+
+    def estimate(self, url):
+        with self._lock:
+            return self._costs.get(fetcher.domain_of(url), (self.default, 0))[0]
+
+    def observe(self, url, seconds):
+        domain = fetcher.domain_of(url)
+        with self._lock:
+            cost, samples = self._costs.get(domain, (seconds, 0))
+            cost += self.smoothing * (seconds - cost) if samples else 0.0
+            self._costs[domain] = (cost, samples + 1)
+        self.state.record_cost(domain, cost, samples + 1)
+
+
+_costs = None
+_costs_lock = threading.Lock()
+
+
+def get_costs():
+    """Process-wide ``CostModel``."""
+    global _costs
+    with _costs_lock:
+        if _costs is None:
+            _costs = CostModel()
+        return _costs
+
+
+def newest_first(entries, key="LastMod"):
+    """``entries`` ordered by descending ``key`` date; undated entries keep their order at the end."""
+    dated = [(dates.parse_date(entry.get(key)), i, entry) for i, entry in enumerate(entries)]
+    dated.sort(key=lambda item: (item[0] is None, -item[0].timestamp() if item[0] else 0, item[1]))
+    return [entry for _, _, entry in dated]
+
+
+def fits(url, costs=None):
+    """True when scraping ``url`` is expected to finish before the deadline."""
+    left = remaining()
+    return left is None or (costs or get_costs()).estimate(url) <= left
+
+
+def write_unscraped(path, entries, costs=None):
+    """CSV of the sitemap entries a run had no time for (URL, lastmod, estimated seconds)."""
+    costs = costs or get_costs()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["URL", "LastMod", "EstimatedSeconds"])
+        for entry in entries:
+            writer.writerow([entry["URL"], entry.get("LastMod") or "", round(costs.estimate(entry["URL"]), 1)])
+    print(f"📝 {len(entries)} unscraped entries written to {path}")
+
+
+class WorkPlan:
+    """Deadline-bounded iteration over one scraper's sitemap entries."""
+
+    def __init__(self, entries, name="", sort=True, costs=None):
+        self.name = name
+        self.costs = costs or get_costs()
+        self.streamed = not sort and not isinstance(entries, list)
+        self._entries = newest_first(entries) if sort else entries
+        self.done = 0
+        self.left = []          # entries not started before the deadline
+        self.stopped = False    # True when the deadline, not the end of the entries, ended the run
+        self.next_group = None  # streamed: first sitemap page (Group) not walked after stopping
+        self._started = time.time()
+
+    def __iter__(self):
+        entries = iter(self._entries)
+        for entry in entries:
+            if fits(entry["URL"], self.costs):
+                yield entry
+                continue
+            # too slow for the time left: a cheaper (faster domain) entry further on may still fit
+            self.stopped = True
+            self.left.append(entry)
+            if self.streamed:
+                self._drain_group(entry, entries)
+                return
+            if remaining() <= 0:
+                self.left.extend(entries)
+                return
+
+    def _drain_group(self, stopped_at, entries):
+        """Move the rest of ``stopped_at``'s sitemap page to ``left``; later pages are not walked."""
+        group = stopped_at.get("Group")
+        if group is None:
+            return
+        for entry in entries:
+            if entry.get("Group") != group:
+                self.next_group = entry.get("Group")
+                return
+            self.left.append(entry)
+
+    @contextmanager
+    def measure(self, entry):
+        """Time one article scrape and feed it to the cost estimate."""
+        started = time.time()
+        yield
+        self.costs.observe(entry["URL"], time.time() - started)
+        self.done += 1
+
+    def report(self, unscraped_file=None):
+        """Print the run against its budget and write the unscraped entries to ``unscraped_file``."""
+        elapsed = time.time() - self._started
+        label = self.name or "run"
+        if not self.stopped:
+            print(f"⏱️ {label}: {self.done} articles scraped in {elapsed:.0f}s, within the time budget")
+            if unscraped_file and os.path.exists(unscraped_file):
+                os.remove(unscraped_file)
+            return
+        print(f"⏱️ {label}: {self.done} articles scraped in {elapsed:.0f}s; "
+              f"{len(self.left)} entries did not fit before the deadline"
+              + (f" (plus sitemap pages from {self.next_group} on, not walked)" if self.next_group else ""))
+        for entry in self.left[:5]:
+            print(f"   - {entry.get('LastMod') or 'undated':25} {entry['URL']}")
+        if unscraped_file:
+            write_unscraped(unscraped_file, self.left, self.costs)
@@ -1,65 +1,248 @@
 # driver_parallel.py
+import _thread
+import csv
+import importlib
+import multiprocessing as mp
 import os
-import traceback
+import queue
+import signal
+import subprocess
+import sys
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+import traceback
+
+try:
+    import psutil
+except ImportError:  # fall back to process groups / taskkill
+    psutil = None
 
 # Import all scrapers
 from src import biopharma, catalent_new, pharmtech_new, resilience, genenews
 
 SCRAPERS = [biopharma, catalent_new, pharmtech_new, resilience, genenews]
+RESUMABLE = [biopharma, pharmtech_new]  # main(resume=True) continues from their last checkpoint
 ERROR_LOG_FILE = "scraper_errors.log"
+PARTIAL_RESULTS_DIR = "partial_results"  # rows streamed back by scrapers that were killed
 SCRAPER_TIMEOUT = 15 * 60  # 15 minutes in seconds
+STOP_GRACE_PERIOD = 20  # seconds a timed-out scraper gets to flush and quit Chrome
+BROWSER_POOL_SIZE = 1  # warm Chrome sessions per scraper process (each scraper is serial)
 
-def run_scraper(scraper):
-    """Run a single scraper's main function with timeout."""
-    result = {"status": "Failed", "error": "Timeout"}  # default if timed out
 
-    def target():
-        try:
-            print(f"🚀 Running {scraper.__name__}...")
+def log_error(text):
+    with open(ERROR_LOG_FILE, "a", encoding="utf-8") as f:
+        f.write(text + "\n\n")
+
+
+def _stop_on_sigterm(signum, frame):
+    # turn SIGTERM into SystemExit so finally/atexit handlers (pool shutdown) run
+    sys.exit(f"terminated by signal {signum}")
+
+
+def _stop_on_event(stop_event):
+    # Windows has no catchable SIGTERM: the driver sets this event instead, and the
+    # KeyboardInterrupt raised in the main thread runs the same finally/atexit handlers
+    stop_event.wait()
+    _thread.interrupt_main()
+
+
+def scraper_process(module_name, results, resume=False, stop_at=None, stop_event=None):
+    """Child process entry point: run one scraper's main() and report back.
+
+    ``results`` is this child's own queue.  ``stop_at`` is the driver's
+    deadline; scrapers plan their work to finish before it (see
+    ``src.deadline``) instead of being killed mid-run.
+    """
+    if hasattr(os, "setsid"):
+        os.setsid()  # own process group, so the whole browser tree can be killed
+    signal.signal(signal.SIGTERM, _stop_on_sigterm)
+    if stop_event is not None:
+        threading.Thread(target=_stop_on_event, args=(stop_event,), daemon=True).start()
+
+    from src import browser_pool, deadline, result_stream
+
+    result_stream.attach(results, module_name)
+    browser_pool.configure(size=BROWSER_POOL_SIZE)
+    deadline.set_deadline(stop_at)
+    try:
+        scraper = importlib.import_module(module_name)
+        print(f"🚀 Running {module_name}...")
+        if resume and module_name in {s.__name__ for s in RESUMABLE}:
+            scraper.main(resume=True)
+        else:
             scraper.main()
-            print(f"✅ {scraper.__name__} completed successfully.\n")
-            result["status"] = "Success"
-            result["error"] = ""
-        except Exception as e:
-            print(f"❌ {scraper.__name__} failed. See log for details.\n")
-            result["status"] = "Failed"
-            result["error"] = str(e)
-            error_trace = traceback.format_exc()
-            with open(ERROR_LOG_FILE, "a", encoding="utf-8") as f:
-                f.write(f"Error in {scraper.__name__}:\n")
-                f.write(error_trace + "\n\n")
-
-    thread = threading.Thread(target=target)
-    thread.start()
-    thread.join(SCRAPER_TIMEOUT)
-
-    if thread.is_alive():
-        print(f"⏰ {scraper.__name__} timed out after {SCRAPER_TIMEOUT/60} minutes.\n")
-        with open(ERROR_LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(f"{scraper.__name__} timed out after {SCRAPER_TIMEOUT/60} minutes.\n\n")
-        # Thread will continue in background but we mark it as failed
-
-    return (scraper.__name__, result["status"], result["error"])
-
-def run_all_scrapers_parallel(max_workers=None):
+        print(f"✅ {module_name} completed successfully.\n")
+        result_stream.send("done", "Success", "")
+    except Exception as e:
+        print(f"❌ {module_name} failed. See log for details.\n")
+        log_error(f"Error in {module_name}:\n{traceback.format_exc()}")
+        result_stream.send("done", "Failed", str(e))
+    finally:
+        browser_pool.shutdown()
+
+
+def kill_process_tree(pid):
+    """Hard-kill ``pid`` and every process it started (chromedriver, Chrome)."""
+    if psutil is not None:
+        try:
+            parent = psutil.Process(pid)
+            procs = parent.children(recursive=True) + [parent]
+        except psutil.Error:
+            return
+        for proc in procs:
+            try:
+                proc.kill()
+            except psutil.Error:
+                pass
+        psutil.wait_procs(procs, timeout=10)
+    elif os.name == "nt":
+        subprocess.run(["taskkill", "/PID", str(pid), "/T", "/F"], capture_output=True)
+    else:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def stop_scraper(process, stop_event=None):
+    """Ask a scraper to stop, then kill its whole process tree after the grace period."""
+    if os.name == "nt":
+        if stop_event is not None:
+            stop_event.set()  # → KeyboardInterrupt in the child, which flushes and quits Chrome
+    else:
+        process.terminate()  # SIGTERM → SystemExit in the child
+    process.join(STOP_GRACE_PERIOD)
+    kill_process_tree(process.pid)
+    process.join(5)
+
+
+def save_partial_rows(scraper_name, rows):
+    """Write the rows a killed scraper streamed back before its deadline."""
+    if not rows:
+        return None
+    os.makedirs(PARTIAL_RESULTS_DIR, exist_ok=True)
+    path = os.path.join(PARTIAL_RESULTS_DIR, f"{scraper_name.rsplit('.', 1)[-1]}_partial.csv")
+    columns = list(rows[0].keys())
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore", quoting=csv.QUOTE_ALL)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def run_all_scrapers_parallel(max_workers=None, resume=False):
     if os.path.exists(ERROR_LOG_FILE):
         os.remove(ERROR_LOG_FILE)
 
-    results = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_scraper = {executor.submit(run_scraper, scraper): scraper for scraper in SCRAPERS}
+    # spawn (not fork) so no Chrome/chromedriver state leaks into children
+    ctx = mp.get_context("spawn")
+    max_workers = max_workers or len(SCRAPERS)
+
+    pending = [scraper.__name__ for scraper in SCRAPERS]
+    running = {}  # name -> (process, deadline, stop event)
+    # one queue per child: killing a child mid-put can only corrupt its own queue
+    queues = {name: ctx.Queue() for name in pending}
+    rows = {name: [] for name in pending}
+    outcome = {}
 
-        for future in as_completed(future_to_scraper):
-            scraper_name, status, error = future.result()
-            results.append((scraper_name, status, error))
+    def drain(name, timeout=0):
+        deadline = time.time() + timeout
+        while True:
+            try:
+                message = queues[name].get(timeout=max(deadline - time.time(), 0.01))
+            except queue.Empty:
+                return
+            if message[0] == "row":
+                rows[name].append(message[2])
+            elif message[0] == "done":
+                outcome[name] = (message[2], message[3])
+
+    while pending or running:
+        while pending and len(running) < max_workers:
+            name = pending.pop(0)
+            stop_at = time.time() + SCRAPER_TIMEOUT
+            stop_event = ctx.Event()
+            process = ctx.Process(target=scraper_process, name=name,
+                                  args=(name, queues[name], resume, stop_at, stop_event))
+            process.start()
+            running[name] = (process, stop_at, stop_event)
+
+        for name in running:
+            drain(name)
+        time.sleep(0.5)
+
+        for name, (process, deadline, stop_event) in list(running.items()):
+            if not process.is_alive():
+                process.join()
+                drain(name, timeout=0.5)
+                if name not in outcome:
+                    outcome[name] = ("Failed", f"process exited with code {process.exitcode}")
+                    log_error(f"{name} exited with code {process.exitcode} without reporting a result.")
+                del running[name]
+            elif time.time() > deadline:
+                print(f"⏰ {name} timed out after {SCRAPER_TIMEOUT/60} minutes. Stopping its browsers...\n")
+                stop_scraper(process, stop_event)
+                drain(name, timeout=0.5)
+                partial = save_partial_rows(name, rows[name])
+                message = f"{name} timed out after {SCRAPER_TIMEOUT/60} minutes."
+                if partial:
+                    message += f" {len(rows[name])} rows streamed back were saved to {partial}."
+                if name in {s.__name__ for s in RESUMABLE}:
+                    message += " Run the driver with --resume to continue from its checkpoint."
+                log_error(message)
+                outcome[name] = ("Failed", "Timeout")
+                del running[name]
 
     print("🎯 All scrapers finished. Summary:")
-    for scraper_name, status, error in results:
-        print(f" - {scraper_name}: {status}")
+    for scraper in SCRAPERS:
+        status, error = outcome.get(scraper.__name__, ("Failed", "not run"))
+        print(f" - {scraper.__name__}: {status} ({len(rows[scraper.__name__])} rows)")
     if os.path.exists(ERROR_LOG_FILE):
         print(f"\nCheck '{ERROR_LOG_FILE}' for error details.")
 
+
+def run_all_scrapers_scheduled():
+    """Scrape every site's URLs from one shared queue (src.scheduler) in a supervised child."""
+    if os.path.exists(ERROR_LOG_FILE):
+        os.remove(ERROR_LOG_FILE)
+
+    ctx = mp.get_context("spawn")
+    results_queue = ctx.Queue()
+    name = "src.scheduler"
+    deadline = time.time() + SCRAPER_TIMEOUT
+    stop_event = ctx.Event()
+    process = ctx.Process(target=scraper_process, args=(name, results_queue, False, deadline, stop_event),
+                          name=name)
+    process.start()
+
+    rows, outcome = [], None
+    while process.is_alive() or not results_queue.empty():
+        try:
+            message = results_queue.get(timeout=1)
+        except queue.Empty:
+            message = None
+        if message and message[0] == "row":
+            rows.append(message[2])
+        elif message and message[0] == "done":
+            outcome = (message[2], message[3])
+        if process.is_alive() and time.time() > deadline:
+            print(f"⏰ Scheduler timed out after {SCRAPER_TIMEOUT/60} minutes. Stopping its browsers...\n")
+            stop_scraper(process, stop_event)
+            partial = save_partial_rows(name, rows)
+            log_error(f"Scheduler timed out; {len(rows)} rows streamed back were saved to {partial}.")
+            outcome = ("Failed", "Timeout")
+            break
+    process.join(5)
+
+    status, error = outcome or ("Failed", f"process exited with code {process.exitcode}")
+    print(f"🎯 Scheduled run finished: {status} ({len(rows)} rows) {error}")
+    if os.path.exists(ERROR_LOG_FILE):
+        print(f"\nCheck '{ERROR_LOG_FILE}' for error details.")
+
+
 if __name__ == "__main__":
-    run_all_scrapers_parallel(max_workers=5)  # run up to 5 scrapers concurrently
+    if "--scheduled" in sys.argv:
+        run_all_scrapers_scheduled()  # one URL queue shared by all sites
+    else:
+        # run up to 5 scrapers concurrently; --resume continues timed-out sitemap walks
+        run_all_scrapers_parallel(max_workers=5, resume="--resume" in sys.argv)
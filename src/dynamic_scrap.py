@@ -8,6 +8,13 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from webdriver_manager.chrome import ChromeDriverManager
 
+try:
+    from src import keyword_matcher, link_harvest, url_canon
+except ImportError:
+    import keyword_matcher
+    import link_harvest
+    import url_canon
+
 # -------------------- Suppress Selenium Logs --------------------
 logging.getLogger('selenium').setLevel(logging.CRITICAL)
 
@@ -31,7 +38,8 @@ except Exception as e:
 
 # -------------------- Scraper Function --------------------
 def scrape_articles_from_url(url, keywords, csv_file_path, write_headers=False):
-    print(f"\n🔍 Scraping: {url} with keywords: {keywords}")
+    matcher = keyword_matcher.compile_keywords(keywords, name=url)
+    print(f"\n🔍 Scraping: {url} with keywords: {[k.label for k in matcher.keywords]}")
 
     # Step 1: Load page
     try:
@@ -41,9 +49,9 @@ def scrape_articles_from_url(url, keywords, csv_file_path, write_headers=False):
         print(f"❌ Could not load {url}: {e}")
         return
 
-    # Step 2: Find all <a> tags
+    # Step 2: Collect text + href of every <a> tag in one call
     try:
-        all_links = driver.find_elements(By.XPATH, "//a")
+        all_links = link_harvest.harvest(driver, visible_only=True)
     except Exception as e:
         print(f"❌ Failed to find links on {url}: {e}")
         return
@@ -53,10 +61,10 @@ def scrape_articles_from_url(url, keywords, csv_file_path, write_headers=False):
     # Step 3: Filter links based on keywords
     for link in all_links:
         try:
-            text = link.text.strip()
-            if any(keyword.lower() in text.lower() for keyword in keywords):
-                href = link.get_attribute("href")
-                if href and href.startswith("http"):
+            text = link["text"]
+            if matcher.matches(text):
+                href = link["href"]
+                if href and href.startswith("http") and url_canon.claim(href):  # once per run
                     matching_links.append((text, href))
         except Exception as e:
             print(f"⚠️ Error while processing a link: {e}")
@@ -127,7 +135,7 @@ def main():
                 try:
                     url = row["website_url"].strip()
                     keyword_str = row["keywords"]
-                    keywords = [kw.strip() for kw in keyword_str.split(",")]
+                    keywords = keyword_matcher.compile_keywords(keyword_str, name=url)  # compiled once per site
 
                     scrape_articles_from_url(
                         url=url,
@@ -148,6 +156,9 @@ def main():
         return
 
     driver.quit()
+    keyword_matcher.report()
+    link_harvest.report()
+    url_canon.report()
     print(f"\n📁 Scraping complete. Output saved to: {output_csv}")
 
 # -------------------- Entry Point --------------------
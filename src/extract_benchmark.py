@@ -0,0 +1,109 @@
+# extract_benchmark.py
+"""Compare the nested multi-tag body extraction with ``text_extract``.
+
+Runs both extractors over saved HTML pages and reports CPU time and the
+size of the body each one produces.  Pages can be saved first with
+``--fetch``:
+
+    python -m src.extract_benchmark --fetch https://resilience.com/... [more URLs]
+    python -m src.extract_benchmark [saved_pages/ or page.html ...] [--repeat N]
+"""
+import argparse
+import glob
+import hashlib
+import os
+import time
+
+from bs4 import BeautifulSoup
+
+try:
+    from src import fetcher, text_extract
+except ImportError:
+    import fetcher
+    import text_extract
+
+# ---------------- CONFIG ----------------
+PAGES_DIR = "saved_pages"
+REPEAT = 3
+# ----------------------------------------
+
+
+def nested_extract(soup):
+    """The previous approach: every p/div/span/section/article/main, deduplicated afterwards."""
+    body_texts = []
+    for tag in ["p", "div", "span", "section", "article", "main"]:
+        for el in soup.find_all(tag):
+            text = el.get_text(separator=" ", strip=True)
+            if text and len(text) > 30:
+                body_texts.append(text)
+    seen = set()
+    return "||".join([t for t in body_texts if not (t in seen or seen.add(t))])
+
+
+EXTRACTORS = [("nested find_all", nested_extract), ("single pass", text_extract.extract_body)]
+
+
+def save_pages(urls, directory=PAGES_DIR):
+    os.makedirs(directory, exist_ok=True)
+    for url in urls:
+        page = fetcher.fetch(url)
+        path = os.path.join(directory, hashlib.sha1(url.encode("utf-8")).hexdigest()[:12] + ".html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(page.html)
+        print(f"💾 {url} → {path} ({len(page.html)} chars, {page.tier})")
+
+
+def page_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.htm*"))))
+        else:
+            files.append(path)
+    return files
+
+
+def cpu_time(func, soup, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        output = func(soup)
+    return (time.process_time() - started) / repeat, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark body extraction on saved pages.")
+    parser.add_argument("paths", nargs="*", default=[PAGES_DIR])
+    parser.add_argument("--fetch", nargs="+", metavar="URL", help="save these pages first")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    if args.fetch:
+        save_pages(args.fetch)
+
+    files = page_files(args.paths)
+    if not files:
+        print(f"⚠️ No saved pages found in {args.paths}; use --fetch URL to save some.")
+        return
+
+    totals = {name: {"cpu": 0.0, "chars": 0} for name, _ in EXTRACTORS}
+    print(f"{'page':30} {'extractor':16} {'cpu ms':>8} {'body chars':>11}")
+    for path in files:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        soup = BeautifulSoup(html, "html.parser")
+        for name, func in EXTRACTORS:
+            seconds, body = cpu_time(func, soup, args.repeat)
+            totals[name]["cpu"] += seconds
+            totals[name]["chars"] += len(body)
+            print(f"{os.path.basename(path)[:30]:30} {name:16} {seconds * 1000:>8.1f} {len(body):>11}")
+
+    print()
+    for name, total in totals.items():
+        print(f"📊 {name}: {total['cpu'] * 1000:.0f} ms CPU, {total['chars']} body chars over {len(files)} pages")
+    old, new = totals[EXTRACTORS[0][0]], totals[EXTRACTORS[1][0]]
+    if new["cpu"] and new["chars"]:
+        print(f"⚡ single pass: {old['cpu'] / new['cpu']:.1f}x faster, {old['chars'] / new['chars']:.1f}x smaller bodies")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+# fetcher.py
+"""Tiered page fetcher: plain HTTP first, headless Chrome only when needed.
+
+Most article pages are server rendered, so ``fetch()`` tries a pooled
+``requests`` session first and escalates to a browser from ``browser_pool``
+only when the response is empty, a Cloudflare challenge or a JavaScript
+shell.  The tier that worked is remembered per domain, so later URLs on a
+browser-only site go straight to Chrome and HTTP-friendly sites never start
+one.
+
+Both tiers are paced by the per-domain adaptive limiter in ``rate_limiter``:
+every network request waits for a token, and status codes, challenge pages
+and latency are reported back so each site settles at the fastest rate it
+tolerates.
+"""
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+try:
+    from src import browser_pool, crawl_state, http_cache, rate_limiter, readiness, url_canon
+except ImportError:
+    import browser_pool
+    import crawl_state
+    import http_cache
+    import rate_limiter
+    import readiness
+    import url_canon
+
+# ---------------- CONFIG ----------------
+HTTP_TIMEOUT = 30
+HTTP_POOL_SIZE = 20          # keep-alive connections per host
+MIN_TEXT_CHARS = 400         # less visible text than this looks like a JS shell
+PAGE_LOAD_TIMEOUT = 60
+# ----------------------------------------
+
+USER_AGENT = browser_pool.USER_AGENT
+
+HTTP = "http"
+BROWSER = "browser"
+
+CHALLENGE_MARKERS = (
+    "cf-browser-verification", "cf_chl_", "challenge-platform", "cf-challenge",
+    "<title>just a moment...</title>", "attention required! | cloudflare",
+    "enable javascript and cookies to continue", "ddos protection by",
+)
+# error statuses a browser may get past (auth walls, bot blocks, throttling; plus every 5xx);
+# any other 4xx (404, 410 ...) is a dead link and is reported as a failed page instead
+ESCALATE_STATUSES = (401, 403, 429)
+
+# reasons that say the site itself needs a browser; anything else (transport errors, HTTP
+# error statuses) only sends that one page to the browser and the next URL probes HTTP again
+BROWSER_ONLY_REASONS = ("empty body", "challenge page", "javascript shell")
+JS_SHELL_MARKERS = (
+    "please enable javascript", "you need to enable javascript", "requires javascript",
+    '<div id="root"></div>', '<div id="app"></div>', '<div id="__next"></div>',
+)
+
+_SCRIPT_STYLE_RE = re.compile(r"<(script|style|noscript|template)\b.*?</\1\s*>", re.I | re.S)
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+
+_session = None
+_session_lock = threading.Lock()
+_domain_tier = {}
+_tier_lock = threading.Lock()
+
+
+class PageUnavailable(Exception):
+    """An HTTP error status that rendering the page in Chrome can't fix."""
+
+    def __init__(self, url, status):
+        super().__init__(f"HTTP {status} for {url}")
+        self.url = url
+        self.status = status
+
+
+class FetchResult:
+    """HTML of a page plus how it was obtained."""
+
+    def __init__(self, url, html, tier, status=None, final_url=None, data=None):
+        self.url = url
+        self.html = html
+        self.tier = tier
+        self.status = status
+        self.final_url = final_url or url
+        self.data = data  # fields returned by an in-page extraction script (html is then "")
+
+    def __repr__(self):
+        return f"FetchResult({self.url!r}, tier={self.tier!r}, status={self.status}, {len(self.html)} chars)"
+
+
+def get_session():
+    """Process-wide keep-alive ``requests`` session."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            _session.headers.update({
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+            })
+        return _session
+
+
+def domain_of(url):
+    return urlparse(url).netloc.lower()
+
+
+def visible_text_length(html):
+    """Rough count of human-visible characters in an HTML document."""
+    text = _TAG_RE.sub(" ", _SCRIPT_STYLE_RE.sub(" ", html))
+    return len(_WS_RE.sub(" ", text).strip())
+
+
+def is_challenge(html):
+    lowered = (html or "")[:20000].lower()
+    return any(marker in lowered for marker in CHALLENGE_MARKERS)
+
+
+def browser_needed(status, html):
+    """Return why an HTTP response can't be used as-is, or None if it can."""
+    if not html or not html.strip():
+        return "empty body"
+    if is_challenge(html):
+        return "challenge page"
+    lowered = html[:20000].lower()
+    if status and status >= 400:
+        return f"HTTP {status}"  # only escalatable statuses get here (see ``unrecoverable``)
+    if any(marker in lowered for marker in JS_SHELL_MARKERS) or visible_text_length(html) < MIN_TEXT_CHARS:
+        return "javascript shell"
+    return None
+
+
+def unrecoverable(status):
+    """True for an error status a browser can't bring back (404, 410 and other plain 4xx)."""
+    return bool(status) and 400 <= status < 500 and status not in ESCALATE_STATUSES
+
+
+def tier_for(url):
+    with _tier_lock:
+        return _domain_tier.get(domain_of(url))
+
+
+def remember_tier(url, tier):
+    with _tier_lock:
+        _domain_tier[domain_of(url)] = tier
+
+
+wait_for_ready_state = readiness.ready_state()  # default browser wait
+
+
+@contextmanager
+def open_http(url, timeout=HTTP_TIMEOUT, headers=None):
+    """Context manager yielding a streamable response, revalidated through the disk cache.
+
+    Requests that reach the network are paced by the domain's rate limiter;
+    bodies still fresh in the cache are served without waiting.
+    """
+    cache = http_cache.get_cache()
+    if cache.is_fresh(url):
+        with cache.open(get_session(), url, timeout=timeout, headers=headers) as response:
+            yield response
+        return
+
+    limiter = rate_limiter.get_limiter()
+    domain = domain_of(url)
+    limiter.acquire(domain)
+    started = time.time()
+    try:
+        with cache.open(get_session(), url, timeout=timeout, headers=headers) as response:
+            limiter.report(domain, time.time() - started, response.status_code, response.headers)
+            yield response
+    except requests.RequestException:
+        limiter.failed(domain)
+        raise
+
+
+def fetch_http(url, timeout=HTTP_TIMEOUT, headers=None):
+    """HTTP GET through the disk cache; returns a fully read response."""
+    with open_http(url, timeout=timeout, headers=headers) as response:
+        response.content  # read to the end so a 200 body is stored
+        return response
+
+
+def fetch_browser(url, wait=wait_for_ready_state, page_load_timeout=PAGE_LOAD_TIMEOUT, profile=None,
+                  extract=None):
+    """Render ``url`` in a pooled Chrome session of ``profile`` (see ``browser_pool``).
+
+    With ``extract`` (a ``browser_extract.ArticleScript``) the fields it
+    returns from the page are kept in ``data`` and ``page_source`` is not
+    transferred.
+    """
+    limiter = rate_limiter.get_limiter()
+    domain = domain_of(url)
+    with browser_pool.session(profile) as driver:
+        driver.set_page_load_timeout(page_load_timeout)
+        limiter.acquire(domain)
+        started = time.time()
+        html, data = "", None
+        try:
+            driver.get(url)
+            if wait:
+                wait(driver)
+            if extract is not None:
+                data = extract.run(driver)
+            else:
+                html = driver.page_source
+        except Exception:
+            limiter.failed(domain)
+            raise
+        if (data or {}).get("challenge") or is_challenge(html):
+            limiter.challenged(domain)
+        else:
+            limiter.report(domain, time.time() - started, tier=BROWSER)
+        return FetchResult(url, html, BROWSER, final_url=driver.current_url, data=data)
+
+
+def fetch(url, wait=wait_for_ready_state, page_load_timeout=PAGE_LOAD_TIMEOUT, force_browser=False,
+          profile=None, extract=None):
+    """Fetch ``url`` over HTTP, escalating to the browser when the page needs one.
+
+    ``wait`` is called with the driver after navigation when the browser tier
+    is used, and ``extract`` is run in the page there (see ``fetch_browser``).
+    Exceptions from the browser tier propagate to the caller, as the direct
+    ``driver.get`` calls this replaces did; a dead link (404, 410 ...) raises
+    ``PageUnavailable`` without starting a browser.
+    """
+    known = tier_for(url)
+    if not force_browser and known != BROWSER:
+        try:
+            response = fetch_http(url)
+            if unrecoverable(response.status_code) and not is_challenge(response.text):
+                raise PageUnavailable(url, response.status_code)
+            reason = browser_needed(response.status_code, response.text)
+            if (reason == "challenge page" and not response.from_cache
+                    and response.status_code not in rate_limiter.THROTTLE_STATUSES):
+                rate_limiter.get_limiter().challenged(domain_of(url))
+            if reason is None:
+                if known is None:
+                    remember_tier(url, HTTP)
+                crawl_state.get_state().record_validators(
+                    url, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                result = FetchResult(url, response.text, HTTP, status=response.status_code, final_url=response.url)
+                url_canon.observe_page(result)  # redirects and rel=canonical feed the run's seen-set
+                return result
+        except requests.RequestException as e:
+            reason = f"request failed ({e.__class__.__name__})"
+        if known is None and reason in BROWSER_ONLY_REASONS:
+            # a challenge or missing content on the first probe decides the tier for the rest of the run
+            print(f"🔁 {domain_of(url)}: {reason} over HTTP → using the browser for this domain")
+            remember_tier(url, BROWSER)
+        else:
+            print(f"🔁 {url}: {reason} over HTTP → rendering this page in the browser")
+
+    result = fetch_browser(url, wait=wait, page_load_timeout=page_load_timeout, profile=profile, extract=extract)
+    url_canon.observe_page(result)
+    return result
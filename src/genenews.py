@@ -1,251 +1,125 @@
 # catalent_scraper_robust_sitemap.py
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from bs4 import BeautifulSoup
 import pandas as pd
-import time
 import os
 import re
-import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta
-import json
-import requests
+
+try:
+    from src import browser_extract, crawl_state, dates, deadline, fetcher, output_writer, result_stream, sitemap_crawler, url_canon
+except ImportError:
+    import browser_extract
+    import crawl_state
+    import dates
+    import deadline
+    import fetcher
+    import output_writer
+    import result_stream
+    import sitemap_crawler
+    import url_canon
 
 # ---------------- CONFIG ----------------
 BASE_SITEMAP_URL = "https://www.genengnews.com/sitemap_index.xml"
 OUTPUT_FILE = "C:/Users/AnjaliRani/Documents/genenews_sitemap_urls.csv"
 SCRAPED_OUTPUT_FILE = "C:/Users/AnjaliRani/Documents/genenews_scraped_articles.csv"
 SKIPPED_FILE = "C:/Users/AnjaliRani/Documents/genenews_skipped_urls.txt"
-DEBUG_SITEMAP_DUMP = "C:/Users/AnjaliRani/Documents/debug_genenews_index.html"
-HEADLESS = True
+UNSCRAPED_FILE = "C:/Users/AnjaliRani/Documents/genenews_unscraped_urls.csv"  # entries left at the deadline
+WINDOW_DAYS = 62  # only articles modified/published within this many days
+BROWSER_PROFILE = "lean"  # "lean" blocks images/fonts/trackers; "full" loads pages as-is
 # ----------------------------------------
 
-USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-              "AppleWebKit/537.36 (KHTML, like Gecko) "
-              "Chrome/116.0.0.0 Safari/537.36")
-
-
-def make_driver():
-    chrome_options = Options()
-    if HEADLESS:
-        chrome_options.add_argument('--headless=new')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument(f'user-agent={USER_AGENT}')
-    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    chrome_options.add_experimental_option('useAutomationExtension', False)
-    driver = webdriver.Chrome(options=chrome_options)
-    try:
-        driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": USER_AGENT})
-    except Exception:
-        pass
-    return driver
-
-
-def parse_date(date_str):
-    """Parse various date formats into datetime."""
-    for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%d %H:%M:%S"):
-        try:
-            return datetime.strptime(date_str[:19], fmt)
-        except Exception:
-            continue
-    return None
-
-
-def get_child_sitemaps(base_url, two_months_ago):
-    """Fetch child sitemaps and direct articles from base sitemap, applying date filter."""
-    try:
-        response = requests.get(base_url, headers={"User-Agent": USER_AGENT}, timeout=30)
-        response.raise_for_status()
-        page_src = response.text
-
-        # XML parsing
-        root = ET.fromstring(page_src)
-        urls = []
-        for elem in root.iter():
-            if isinstance(elem.tag, str) and elem.tag.lower().endswith("loc"):
-                loc = elem.text.strip()
-                lastmod_elem = elem.getparent() if hasattr(elem, 'getparent') else None
-                lastmod_tag = elem.find("../lastmod") if elem.find("../lastmod") is not None else None
-                lastmod = lastmod_tag.text.strip() if lastmod_tag is not None else None
-                urls.append({"URL": loc, "LastMod": lastmod})
-
-        # Separate child sitemaps vs direct article URLs
-        child_sitemaps = []
-        direct_articles = []
-
-        for entry in urls:
-            url = entry["URL"]
-            lastmod = entry.get("LastMod")
-            keep = True
-            if lastmod:
-                dt = parse_date(lastmod)
-                if dt and dt < two_months_ago:
-                    keep = False
-            if keep:
-                if re.search(r'post-sitemap\d*\.xml$', url):
-                    child_sitemaps.append(url)
-                else:
-                    direct_articles.append(url)
-
-        # Scrape direct articles immediately
-        for url in direct_articles:
-            print(f"🔎 Found direct article URL: {url} → scraping now")
-            result = scrape_article_selenium(url)
-            columns = ["Site URL", "Title", "Body", "Date"]
-            df_row = pd.DataFrame([result], columns=columns)
-            if not os.path.exists(SCRAPED_OUTPUT_FILE):
-                df_row.to_csv(SCRAPED_OUTPUT_FILE, index=False, mode="w")
-            else:
-                df_row.to_csv(SCRAPED_OUTPUT_FILE, index=False, mode="a", header=False)
-
-        return child_sitemaps
-
-    except Exception as e:
-        print(f" Error fetching base sitemap: {e}")
-        with open(DEBUG_SITEMAP_DUMP, "w", encoding="utf-8") as fh:
-            fh.write(response.text if 'response' in locals() else "")
-        return []
-
-
-def get_urls_from_sitemap(sitemap_url, two_months_ago):
-    """Fetch URLs + LastMod from a child sitemap with date filtering."""
-    urls = []
-    try:
-        response = requests.get(sitemap_url, headers={"User-Agent": USER_AGENT}, timeout=30)
-        response.raise_for_status()
-        page_src = response.text
-
-        root = ET.fromstring(page_src)
-        for elem in root.iter():
-            if isinstance(elem.tag, str) and elem.tag.lower().endswith("url"):
-                loc = elem.find("{*}loc")
-                lastmod = elem.find("{*}lastmod")
-                url_text = loc.text.strip() if loc is not None else None
-                lastmod_text = lastmod.text.strip() if lastmod is not None else None
-                if url_text:
-                    if lastmod_text:
-                        dt = parse_date(lastmod_text)
-                        if dt and dt >= two_months_ago:
-                            urls.append({"URL": url_text, "LastMod": lastmod_text})
-                    else:
-                        urls.append({"URL": url_text, "LastMod": None})
-        return urls
-    except Exception as e:
-        print(f" Error fetching sitemap {sitemap_url}: {e}")
-        return []
+COLUMNS = ["Site URL", "Title", "Body", "Date"]
 
+# Title, body container (else all <p> joined with "||") and date, extracted in the page when rendered
+ARTICLE_SCRIPT = browser_extract.ArticleScript(
+    body=(("div", "field--name-body"), ("div", "article-content")),
+)
 
 def scrape_article_selenium(url):
     """Scrape title, body, and published date from an article URL"""
-    driver = None
     try:
-        driver = make_driver()
-        driver.set_page_load_timeout(60)
-        driver.get(url)
-        try:
-            WebDriverWait(driver, 15).until(lambda d: d.execute_script("return document.readyState") == "complete")
-        except Exception:
-            time.sleep(2)
-
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-
-        title = soup.title.string.strip() if soup.title else ""
-
-        body = ""
-        body_div = soup.find("div", class_="field--name-body") or soup.find("div", class_="article-content")
-        if body_div:
-            body = body_div.get_text(separator="\n", strip=True)
-        else:
-            paragraphs = soup.find_all("p")
-            body = "||".join([p.get_text(strip=True) for p in paragraphs])
-
-        date = ""
-        meta_date = soup.find("meta", attrs={"property": "article:published_time"})
-        if meta_date and meta_date.get("content"):
-            date = meta_date["content"]
-        if not date:
-            time_tag = soup.find("time")
-            if time_tag and time_tag.get("datetime"):
-                date = time_tag["datetime"]
-            elif time_tag:
-                date = time_tag.get_text(strip=True)
-        if not date:
-            ld_json = soup.find("script", {"type": "application/ld+json"})
-            if ld_json:
-                try:
-                    data = json.loads(ld_json.string)
-                    if isinstance(data, dict) and "datePublished" in data:
-                        date = data["datePublished"]
-                    elif isinstance(data, list):
-                        for item in data:
-                            if "datePublished" in item:
-                                date = item["datePublished"]
-                                break
-                except Exception as e:
-                    print(f" Could not parse JSON-LD for {url}: {e}")
-
-        return {"Site URL": url, "Title": title, "Body": body, "Date": date}
+        page = fetcher.fetch(url, page_load_timeout=60, profile=BROWSER_PROFILE, extract=ARTICLE_SCRIPT)
+        article = browser_extract.extract(page, ARTICLE_SCRIPT)  # in-page script on the browser tier
+        return {"Site URL": url, "Title": article["title"], "Body": article["body"], "Date": article["date"]}
     except Exception as e:
         print(f" Error scraping {url}: {e}")
         with open(SKIPPED_FILE, "a", encoding="utf-8") as f:
             f.write(f"{url}\t{str(e)}\n")
         return {"Site URL": url, "Title": "", "Body": "", "Date": ""}
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except:
-                pass
+
+
+def reset_outputs():
+    """Remove the previous run's output files."""
+    output_writer.remove(SCRAPED_OUTPUT_FILE)
+    if os.path.exists(OUTPUT_FILE):
+        os.remove(OUTPUT_FILE)
+
+
+def cutoff_date():
+    return dates.cutoff(WINDOW_DAYS)
+
+
+def discover_articles():
+    """Sitemap entries inside the scrape window ({"URL", "LastMod", "Group"})."""
+    # Index + post sitemaps fetched concurrently; entries older than the window are dropped
+    url_entries = sitemap_crawler.crawl_sitemaps(
+        BASE_SITEMAP_URL,
+        cutoff=cutoff_date(),
+        child_filter=lambda url: re.search(r'post-sitemap\d*\.xml$', url),
+    )
+
+    if url_entries:
+        df_urls = pd.DataFrame([{"URL": e.url, "LastMod": e.lastmod} for e in url_entries])
+        df_urls.to_csv(OUTPUT_FILE, index=False, mode="w")
+    else:
+        print(f" No URLs found under sitemap index: {BASE_SITEMAP_URL}")
+
+    return [{"URL": e.url, "LastMod": e.lastmod, "Group": e.sitemap} for e in url_entries]
+
+
+def scrape_entry(entry):
+    """Scrape one sitemap entry (the sitemap lastmod already bounds the window)."""
+    return scrape_article_selenium(entry["URL"])
+
+
+def save_result(result):
+    """Queue one scraped article for the output CSV (written in batches by ``output_writer``)."""
+    output_writer.get_writer(SCRAPED_OUTPUT_FILE, COLUMNS).write(result)
 
 
 def main():
     print(" Starting Genenews Scraper...")
 
-    if os.path.exists(SCRAPED_OUTPUT_FILE):
-        os.remove(SCRAPED_OUTPUT_FILE)
-    if os.path.exists(OUTPUT_FILE):
-        os.remove(OUTPUT_FILE)
-    if os.path.exists(DEBUG_SITEMAP_DUMP):
-        try:
-            os.remove(DEBUG_SITEMAP_DUMP)
-        except:
-            pass
-
-    today = datetime.now()
-    two_months_ago = today - timedelta(days=62)
-    columns = ["Site URL", "Title", "Body", "Date"]
-
-    child_sitemaps = get_child_sitemaps(BASE_SITEMAP_URL, two_months_ago)
-
-    for sm_idx, sm in enumerate(child_sitemaps, 1):
-        print(f"\n🔎 Processing sitemap {sm_idx}/{len(child_sitemaps)}: {sm}")
-        url_entries = get_urls_from_sitemap(sm, two_months_ago)
-
-        if url_entries:
-            df_urls = pd.DataFrame(url_entries)
-            if not os.path.exists(OUTPUT_FILE):
-                df_urls.to_csv(OUTPUT_FILE, index=False, mode="w")
-            else:
-                df_urls.to_csv(OUTPUT_FILE, index=False, mode="a", header=False)
-        else:
-            print(f" No URLs found in sitemap: {sm}")
-
-        for idx, entry in enumerate(url_entries, 1):
-            url = entry["URL"]
-            print(f"[Sitemap {sm_idx} | {idx}/{len(url_entries)}] Scraping: {url}")
-            result = scrape_article_selenium(url)
-
-            df_row = pd.DataFrame([result], columns=columns)
-            if not os.path.exists(SCRAPED_OUTPUT_FILE):
-                df_row.to_csv(SCRAPED_OUTPUT_FILE, index=False, mode="w")
-            else:
-                df_row.to_csv(SCRAPED_OUTPUT_FILE, index=False, mode="a", header=False)
-
-            print(f"    → Done: Title length={len(result['Title'])}, Body length={len(result['Body'])}, Date={result['Date']}")
+    reset_outputs()
+    url_entries = discover_articles()
+
+    state = crawl_state.get_state()
+    unchanged = 0
+    plan = deadline.WorkPlan(url_entries, name="genenews")  # newest first, only what fits the deadline
+    for idx, entry in enumerate(plan, 1):
+        url = entry["URL"]
+        lastmod = entry["LastMod"]
+        if state.is_unchanged(url, lastmod):
+            unchanged += 1
+            continue
+        if not url_canon.claim(url):  # already fetched this run (another sitemap, a URL variant)
+            continue
+
+        print(f"[{idx}/{len(url_entries)}] Scraping: {url}")
+        with plan.measure(entry):
+            result = scrape_entry(entry)
+
+        save_result(result)
+        result_stream.emit(result)
+        if result["Body"]:
+            state.record(url, site=fetcher.domain_of(url), lastmod=lastmod,
+                         content=(result["Title"], result["Body"], result["Date"]))
+
+        print(f"    → Done: Title length={len(result['Title'])}, Body length={len(result['Body'])}, Date={result['Date']}")
 
+    print(f" Skipped {unchanged} articles unchanged since the last run")
+    browser_extract.report()
+    url_canon.report()
+    plan.report(UNSCRAPED_FILE)
+    output_writer.close(SCRAPED_OUTPUT_FILE)
     print(f" Scraping complete.")
     print(f" Sitemap URLs saved to: {OUTPUT_FILE}")
     print(f" Articles saved to: {SCRAPED_OUTPUT_FILE}")
@@ -1,81 +1,84 @@
 import csv
 import os
-import time
 import logging
-from selenium import webdriver
-from datetime import datetime
-from urllib.parse import urlparse
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
+from urllib.parse import urljoin
+
+try:
+    from src import fetcher, history_store, html_parser, keyword_matcher, link_harvest, readiness, search_index, text_extract, url_canon
+except ImportError:
+    import fetcher
+    import history_store
+    import html_parser
+    import keyword_matcher
+    import link_harvest
+    import readiness
+    import search_index
+    import text_extract
+    import url_canon
 
 # -------------------- Suppress Selenium Logs --------------------
 logging.getLogger('selenium').setLevel(logging.CRITICAL)
 
-# -------------------- Setup Chrome Options --------------------
-chrome_options = Options()
-# Uncomment below to run in headless mode
-# chrome_options.add_argument("--headless")
-chrome_options.add_argument("--log-level=3")
-chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
 
-# -------------------- Setup WebDriver --------------------
-try:
-    service = Service(executable_path=ChromeDriverManager().install(), log_path=os.devnull)
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-except Exception as e:
-    print(f"❌ Failed to initialize WebDriver: {e}")
-    exit(1)
+# -------------------- Page Fetching --------------------
+PAGE_READY = readiness.network_idle(replaces=3)  # generic pages: wait for the network to go quiet
 
 
-# -------------------- Scraper Function --------------------
-def scrape_articles_from_url(driver, url,keywords,csv_file_path, write_headers=False):
-    print(f"\n🔍 Scraping: {url} with keywords: {keywords}")
+def safe_fetch(link, extract=None):
+    """Fetch a link (HTTP first, browser if needed), retrying once."""
+    for attempt in range(2):
+        try:
+            return fetcher.fetch(link, wait=PAGE_READY, extract=extract)
+        except fetcher.PageUnavailable as e:
+            print(f"⚠️ {e}")  # a dead link: retrying won't help
+            return None
+        except Exception as e:
+            print(f"⚠️ Attempt {attempt+1} failed for {link}: {e}")
+    return None
 
-    def safe_get(link):
-        """Try to load a link, restart driver if session crashes."""
-        nonlocal driver
-        for attempt in range(2):
-            try:
-                driver.get(link)
-                time.sleep(3)
-                return True
-            except Exception as e:
-                if "no such window" in str(e) or "invalid session id" in str(e):
-                    print("⚠️ Driver crashed, restarting...")
-                    try:
-                        driver.quit()
-                    except:
-                        pass
-                    service = Service(executable_path=ChromeDriverManager().install(), log_path=os.devnull)
-                    driver = webdriver.Chrome(service=service, options=chrome_options)
-                else:
-                    print(f"⚠️ Attempt {attempt+1} failed for {link}: {e}")
-        return False
 
+def extract_article(html):
+    """Title, body and date from an article page."""
+    doc = html_parser.parse(html)
+
+    # Title
+    title = doc.title()
+
+    # Body (each text node once, navigation-like blocks dropped)
+    body = text_extract.extract_body(doc)
+
+    # Date
+    date_elem = doc.find("time")  ##needs modification.can be other date formats as well
+    if date_elem:
+        date = date_elem.get("datetime") or date_elem.text(strip=True)
+    else:
+        date_elem = doc.find("span", class_contains=("date", "Date"))
+        date = date_elem.text(strip=True) if date_elem else "Date not found"
+
+    return title, body, date
+
+
+# -------------------- Scraper Function --------------------
+def scrape_articles_from_url(url, keywords, csv_file_path, write_headers=False):
+    matcher = keyword_matcher.compile_keywords(keywords, name=url)
+    print(f"\n🔍 Scraping: {url} with keywords: {[k.label for k in matcher.keywords]}")
+
+    matching_links = []
     try:
-        if not safe_get(url):
+        page = safe_fetch(url, extract=link_harvest.PAGE_LINKS)
+        if page is None:
             print(f"❌ Could not load {url}")
-            return driver  # return driver so session continues
+            return
 
         # Collect all links on the page
-        all_links = driver.find_elements(By.XPATH, "//a[@href]")
-        # matching_links = list(set([
-        #     link.get_attribute("href")
-        #     for link in all_links
-        #     if link.get_attribute("href") and link.get_attribute("href").startswith("http")
-        # ]))
+        all_links = link_harvest.page_links(page)  # visible anchors only, on either tier
 
         # Step 3: Filter links based on keywords
-
-        matching_links = []
-        for link in all_links:
+        for text, link_href in all_links:
             try:
-                text = link.text.strip()
-                if any(keyword.lower() in text.lower() for keyword in keywords):
-                    href = link.get_attribute("href")
-                    if href and href.startswith("http"):
+                if matcher.matches(text):
+                    href = urljoin(page.final_url, link_href)
+                    if href and href.startswith("http") and url_canon.claim(href):  # once per run
                         matching_links.append(href)
             except Exception as e:
                 print(f"⚠️ Error while processing a link: {e}") 
@@ -86,69 +89,24 @@ def scrape_articles_from_url(driver, url,keywords,csv_file_path, write_headers=F
                 writer.writerow(["link", "title", "body", "date"])
 
             for link in matching_links:
-                if not safe_get(link):
+                article = safe_fetch(link)
+                if article is None:
                     print(f"❌ Skipping link after 2 failed attempts: {link}")
                     continue
 
-                # Title
-                try:
-                    title = driver.title.strip()
-                except:
-                    title = ""
-
-                # Body (collect from multiple tags)
-                body_texts = []
-                candidate_tags = ["p", "div", "span", "section", "article", "main"]
-
-                try:
-                    for tag in candidate_tags:
-                        elements = driver.find_elements(By.TAG_NAME, tag)
-                        for el in elements:
-                            text = el.text.strip()
-                            if text and len(text) > 30:  # filter out short junk
-                                body_texts.append(text)
-
-                    # Deduplicate while preserving order
-                    seen = set()
-                    body = "||".join([t for t in body_texts if not (t in seen or seen.add(t))])
-
-                    if not body:  # fallback to <body>
-                        try:
-                            body_elem = driver.find_element(By.TAG_NAME, "body")
-                            body = body_elem.text.strip()
-                        except:
-                            body = ""
-                except:
-                    body = ""
-
-                # Date
-                date = ""
-                try:
-                    date_elem = driver.find_element(By.XPATH, "//time")  ##needs modification.can be other date formats as well
-                    date = date_elem.get_attribute("datetime") or date_elem.text.strip()
-                except:
-                    try:
-                        date_elem = driver.find_element(
-                            By.XPATH,
-                            "//span[contains(@class,'date') or contains(@class,'Date')]"
-                        )
-                        date = date_elem.text.strip()
-                    except:
-                        date = "Date not found"
-
+                title, body, date = extract_article(article.html)
                 writer.writerow([link, title, body, date])
 
     except Exception as e:
         print(f"❌ Could not process {url}: {e}")
 
     print(f"✅ Done scraping {url} ({len(matching_links)} links checked)")
-    return driver  # return driver so main() keeps using same instance
 
 
 
 
 def update_historical_file(scraped_file, historical_file="historical_articles.csv"):
-    """Append scraped data to a historical file with timestamp, using csv module only."""
+    """Upsert scraped articles into the keyed history; only new/changed ones reach the historical file."""
     if not os.path.exists(scraped_file):
         print(f"⚠️ No scraped file found at {scraped_file}, skipping history update.")
         return
@@ -163,24 +121,10 @@ def update_historical_file(scraped_file, historical_file="historical_articles.cs
             return
 
         header, data_rows = rows[0], rows[1:]
-
-        # Add timestamp column to header if missing
-        if "scraped_at" not in header:
-            header.append("scraped_at")
-
-        # Add timestamp value to each row
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        updated_rows = [row + [timestamp] for row in data_rows]
-
-        file_exists = os.path.exists(historical_file)
-
-        with open(historical_file, mode="a", newline="", encoding="utf-8") as outfile:
-            writer = csv.writer(outfile)
-            if not file_exists:
-                writer.writerow(header)  # write header only once
-            writer.writerows(updated_rows)
-
-        print(f"📌 Appended {len(updated_rows)} rows to {historical_file}")
+        result = history_store.update_history(header, data_rows, historical_file)
+        search_index.index_records(result["new"] + result["changed"])
+        print(f"📌 History: {len(result['new'])} new, {len(result['changed'])} changed, "
+              f"{result['unchanged']} unchanged ({history_store.store_path(historical_file)})")
 
     except Exception as e:
         print(f"❌ Failed to update historical file: {e}")
@@ -207,14 +151,6 @@ def main():
             print(f"❌ Failed to delete existing output CSV: {e}")
             return
 
-    # Initialize driver once
-    try:
-        service = Service(executable_path=ChromeDriverManager().install(), log_path=os.devnull)
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-    except Exception as e:
-        print(f"❌ Failed to initialize WebDriver: {e}")
-        return
-
     first_site = True
 
     # Read input CSV
@@ -226,9 +162,8 @@ def main():
                 try:
                     url = row["website_url"].strip()
                     keyword_str = row["keywords"]
-                    keywords = [kw.strip() for kw in keyword_str.split(",")]
-                    driver = scrape_articles_from_url(
-                        driver=driver,
+                    keywords = keyword_matcher.compile_keywords(keyword_str, name=url)  # compiled once per site
+                    scrape_articles_from_url(
                         url=url,
                         keywords=keywords,
                         csv_file_path=output_csv,
@@ -243,18 +178,17 @@ def main():
         print(f"❌ Input CSV not found at: {input_csv}")
     except Exception as e:
         print(f"❌ Error reading input CSV: {e}")
-    finally:
-        try:
-            driver.quit()
-        except:
-            pass
 
-        # Update historical file after scraping completes
+    # Update historical file after scraping completes
     historical_csv = os.path.join(script_dir, "historical_articles.csv")
     update_historical_file(output_csv, historical_csv)
 
     print(f"\n📁 Scraping complete. Output saved to: {output_csv}")
     print(f"🗂 Historical data updated at: {historical_csv}")
+    readiness.report()
+    keyword_matcher.report()
+    link_harvest.report()
+    url_canon.report()
 
 
 
@@ -0,0 +1,314 @@
+# history_store.py
+"""Keyed article history for the keyword crawlers.
+
+One SQLite row per canonical article URL holds the latest title, body and
+date, a hash of that content and when the article was first seen, last
+seen and last changed.  ``upsert()`` looks up only the URLs in the batch
+and writes, in one transaction:
+
+* new URLs         – inserted
+* changed content  – content, hash and ``last_changed`` replaced
+* unchanged        – only ``last_seen`` is touched; the body is not rewritten
+
+so a run costs in proportion to the rows it scraped, not to the size of
+the history, and re-scraping an article never duplicates it.
+
+With ``zstandard`` installed, bodies are kept in ``body_z`` compressed with
+a per-site dictionary (see ``body_codec``) and decompressed on read.
+
+    python -m src.history_store historical_articles.db --import historical_articles.csv
+    python -m src.history_store historical_articles.db --export history_snapshot.csv
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit
+
+try:
+    from src import body_codec, crawl_state, output_writer, url_canon
+except ImportError:
+    import body_codec
+    import crawl_state
+    import output_writer
+    import url_canon
+
+# ---------------- CONFIG ----------------
+LOOKUP_CHUNK = 500  # URLs per "WHERE url_key IN (...)" lookup
+# ----------------------------------------
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    url_key       TEXT PRIMARY KEY,
+    url           TEXT,
+    title         TEXT,
+    body          TEXT,
+    date          TEXT,
+    content_hash  TEXT,
+    first_seen    TEXT,
+    last_seen     TEXT,
+    last_changed  TEXT,
+    versions      INTEGER DEFAULT 1,
+    site          TEXT,
+    body_z        BLOB,
+    dict_id       INTEGER
+)
+"""
+ADDED_COLUMNS = {"site": "TEXT", "body_z": "BLOB", "dict_id": "INTEGER"}  # for databases made before them
+EXPORT_COLUMNS = ("url", "title", "body", "date", "first_seen", "last_seen", "last_changed", "versions")
+
+
+def site_of(url_key):
+    return urlsplit(url_key).netloc
+
+
+def store_path(historical_file):
+    """SQLite file kept next to (and named after) a historical CSV."""
+    root, ext = os.path.splitext(historical_file)
+    return historical_file if ext == ".db" else root + ".db"
+
+
+def records_from_rows(header, rows):
+    """Map scraped rows (``link``/``Site URL``, title, body, date, optional scraped_at) to dicts."""
+    index = {name.lower(): i for i, name in enumerate(header)}
+    url_i = next((index[k] for k in ("link", "url", "site url") if k in index), 0)
+    columns = {"url": url_i, "title": index.get("title"), "body": index.get("body"),
+               "date": index.get("date"), "seen_at": index.get("scraped_at")}
+    records = []
+    for row in rows:
+        record = {k: (row[i] if i is not None and i < len(row) else "") for k, i in columns.items()}
+        record["row"] = row
+        if record["url"]:
+            records.append(record)
+    return records
+
+
+class HistoryStore:
+    """Thread-safe wrapper around the history table."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(history)")}
+        for column, kind in ADDED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE history ADD COLUMN {column} {kind}")
+        self.codec = body_codec.BodyCodec(self._conn) if body_codec.available() else None
+        self._conn.commit()
+
+    def _body_values(self, site, body):
+        """(body, body_z, dict_id) column values for storing ``body``."""
+        if self.codec is None:
+            return body, None, None
+        blob, dict_id = self.codec.encode(site, body)
+        return None, blob, dict_id
+
+    def _body(self, body, body_z, dict_id):
+        return self.codec.decode(body_z, dict_id) if body_z is not None else body
+
+    def _known_hashes(self, keys):
+        known = {}
+        keys = list(keys)
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[start:start + LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            cur = self._conn.execute(
+                f"SELECT url_key, content_hash FROM history WHERE url_key IN ({placeholders})", chunk)
+            known.update(cur.fetchall())
+        return known
+
+    def upsert(self, records, seen_at=None):
+        """Merge ``records`` (dicts with url/title/body/date, optional seen_at).
+
+        Returns ``{"new": [...], "changed": [...], "unchanged": n}``; the lists
+        hold the records that were written.
+        """
+        now = seen_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        batch, first_seen = {}, {}
+        for record in records:
+            key = url_canon.canonical_url(record["url"])
+            batch[key] = record  # last copy of a URL wins
+            seen = record.get("seen_at") or now
+            first_seen[key] = min(first_seen.get(key, seen), seen)
+
+        new, changed, touched = [], [], []
+        with self._lock:
+            known = self._known_hashes(batch)
+            for key, record in batch.items():
+                seen = record.get("seen_at") or now
+                digest = crawl_state.content_hash(record.get("title"), record.get("body"), record.get("date"))
+                site = site_of(key)
+                values = (record["url"], record.get("title", ""), *self._body_values(site, record.get("body", "")),
+                          record.get("date", ""), digest, site)
+                if key not in known:
+                    new.append((key, *values, first_seen[key], seen, seen))
+                elif known[key] != digest:
+                    changed.append((*values, seen, seen, key))
+                else:
+                    touched.append((seen, key))
+
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO history (url_key, url, title, body, body_z, dict_id, date, content_hash, site, "
+                    "first_seen, last_seen, last_changed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", new)
+                self._conn.executemany(
+                    "UPDATE history SET url = ?, title = ?, body = ?, body_z = ?, dict_id = ?, date = ?, "
+                    "content_hash = ?, site = ?, last_seen = MAX(last_seen, ?), last_changed = ?, "
+                    "versions = versions + 1 WHERE url_key = ?", changed)
+                self._conn.executemany(
+                    "UPDATE history SET last_seen = MAX(last_seen, ?) WHERE url_key = ?", touched)
+
+            if self.codec is not None:
+                for site in {site_of(row[0]) for row in new} | {site_of(row[-1]) for row in changed}:
+                    self._maybe_retrain(site)
+
+        return {"new": [batch[row[0]] for row in new], "changed": [batch[row[-1]] for row in changed],
+                "unchanged": len(touched)}
+
+    def _maybe_retrain(self, site):
+        """Train or refresh ``site``'s dictionary when due and re-encode its bodies with it."""
+        trained_at = self.codec.dictionary_age(site)
+        since = trained_at.strftime("%Y-%m-%d %H:%M:%S") if trained_at else ""
+        total, fresh = self._conn.execute(
+            "SELECT COUNT(*), SUM(last_changed > ?) FROM history WHERE site = ?", (since, site)).fetchone()
+        if not self.codec.should_train(site, total, fresh or 0):
+            return
+        stored = self._conn.execute(
+            "SELECT url_key, body, body_z, dict_id FROM history WHERE site = ? ORDER BY last_changed DESC",
+            (site,)).fetchall()
+        bodies = [(key, self._body(body, body_z, dict_id)) for key, body, body_z, dict_id in stored]
+        try:
+            self.codec.train(site, [body for _, body in bodies[:body_codec.TRAIN_SAMPLES]])
+        except Exception as e:  # zstd refuses corpora that are too small/uniform
+            print(f"⚠️ Could not train a body dictionary for {site}: {e}")
+            return
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE history SET body = ?, body_z = ?, dict_id = ? WHERE url_key = ?",
+                [(*self._body_values(site, body), key) for key, body in bodies])
+            self.codec.drop_unused("history")
+        print(f"🗜️ Trained a body dictionary for {site} on {min(len(bodies), body_codec.TRAIN_SAMPLES)} articles")
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def rows(self):
+        """Every stored article as a tuple in ``EXPORT_COLUMNS`` order (bodies decompressed)."""
+        columns = ", ".join(EXPORT_COLUMNS).replace("body", "body, body_z, dict_id")
+        with self._lock:
+            stored = self._conn.execute(f"SELECT {columns} FROM history ORDER BY first_seen").fetchall()
+            return [(url, title, self._body(body, body_z, dict_id), *rest)
+                    for url, title, body, body_z, dict_id, *rest in stored]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path):
+    """Process-wide ``HistoryStore`` for ``path``."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = HistoryStore(path)
+        return _stores[key]
+
+
+def update_history(header, rows, historical_file):
+    """Upsert one run's scraped rows into the history kept for ``historical_file``.
+
+    Only new and changed articles are appended (with ``scraped_at``) to
+    ``historical_file`` itself, which therefore becomes a change log instead
+    of a copy of every run.
+    """
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    result = get_store(store_path(historical_file)).upsert(records_from_rows(header, rows), seen_at=timestamp)
+
+    log_header = [c for c in header if c != "scraped_at"] + ["scraped_at"]
+    log_rows = [list(record["row"][:len(log_header) - 1]) + [timestamp]
+                for record in result["new"] + result["changed"]]
+    if log_rows:
+        append_log(historical_file, log_header, log_rows)
+    return result
+
+
+def append_log(path, header, rows):
+    """Append change-log ``rows`` to ``path`` in place, so a run costs what it changed, not the log's size."""
+    if output_writer.OUTPUT_FORMAT == output_writer.PARQUET:
+        # the Parquet store only ever adds files
+        output_writer.get_writer(path, header).write_many(rows)
+        output_writer.close(path)
+        return
+    has_rows = os.path.exists(path) and os.path.getsize(path) > 0
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        size = f.tell()
+        try:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            if not has_rows:
+                writer.writerow(header)
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            f.truncate(size)  # never leave half a batch behind
+            raise
+
+
+def import_csv(store, csv_path):
+    """Load an old append-only history CSV; duplicates collapse onto one row per URL."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    if not rows:
+        return {"new": [], "changed": [], "unchanged": 0, "rows": 0}
+    records = records_from_rows(rows[0], rows[1:])
+    records.sort(key=lambda r: r["seen_at"] or "")  # oldest first, so first_seen is the earliest copy
+    totals = {"new": [], "changed": [], "unchanged": 0}
+    for start in range(0, len(records), LOOKUP_CHUNK):
+        result = store.upsert(records[start:start + LOOKUP_CHUNK])
+        totals["new"] += result["new"]
+        totals["changed"] += result["changed"]
+        totals["unchanged"] += result["unchanged"]
+    totals["rows"] = len(records)
+    return totals
+
+
+def export_csv(store, csv_path):
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(EXPORT_COLUMNS)
+        rows = store.rows()
+        writer.writerows(rows)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load, inspect or export the keyed article history.")
+    parser.add_argument("path", help="history database (or the historical CSV it sits next to)")
+    parser.add_argument("--import", dest="import_csv", metavar="CSV", help="merge an append-only history CSV")
+    parser.add_argument("--export", metavar="CSV", help="write the current history as CSV")
+    args = parser.parse_args()
+
+    store = get_store(store_path(args.path))
+    if args.import_csv:
+        result = import_csv(store, args.import_csv)
+        written = len(result["new"]) + len(result["changed"])
+        print(f"📥 {args.import_csv}: {result['rows']} rows → {len(result['new'])} new, "
+              f"{len(result['changed'])} changed, {result['rows'] - written} duplicates collapsed")
+    if args.export:
+        print(f"📤 Exported {export_csv(store, args.export)} articles to {args.export}")
+    print(f"🗂 {store.count()} articles in {store.path}")
+
+
+if __name__ == "__main__":
+    main()
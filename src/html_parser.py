@@ -0,0 +1,392 @@
+# html_parser.py
+"""Parser backends behind the lookups the site scrapers make.
+
+``parse(html)`` returns a ``Document`` with the handful of operations the
+scrapers need per article page: the title, ``<meta>`` content, the first
+element of a tag (optionally by class), JSON-LD blocks, links and a
+single-pass walk used by ``text_extract``.  The backend is chosen once:
+
+* ``selectolax`` (lexbor engine) – fastest, C parser with CSS selectors
+* ``lxml``                       – C parser, XPath lookups
+* ``bs4``                        – BeautifulSoup with ``html.parser``; always
+  available and the behaviour the scrapers were written against
+
+``HTML_PARSER=selectolax|lxml|bs4`` forces one; the default picks the
+first that is installed.
+"""
+import os
+
+from bs4 import BeautifulSoup
+from bs4.element import NavigableString, PreformattedString
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# ---------------- CONFIG ----------------
+BACKEND = os.environ.get("HTML_PARSER", "auto")
+# ----------------------------------------
+
+SELECTOLAX = "selectolax"
+LXML = "lxml"
+BS4 = "bs4"
+
+START, END, TEXT = "start", "end", "text"
+TEXT_SKIP_TAGS = frozenset(("script", "style", "noscript", "template"))
+NAV_TAGS = frozenset(("nav",))
+CHROME_TAGS = frozenset(("header", "footer"))  # site chrome, unless inside an <article> or <main>
+CONTENT_TAGS = frozenset(("article", "main"))
+
+
+def available_backends():
+    backends = []
+    if LexborHTMLParser is not None:
+        backends.append(SELECTOLAX)
+    if lxml is not None:
+        backends.append(LXML)
+    backends.append(BS4)
+    return backends
+
+
+def default_backend():
+    if BACKEND != "auto":
+        if BACKEND not in available_backends():
+            raise ValueError(f"HTML parser backend {BACKEND!r} is not installed; have {available_backends()}")
+        return BACKEND
+    return available_backends()[0]
+
+
+class Node:
+    """An element of a parsed page, independent of the backend."""
+
+    tag = None
+
+    def get(self, attr, default=None):
+        raise NotImplementedError
+
+    def has(self, attr):
+        """True when the element carries ``attr``, even without a value (``<div hidden>``)."""
+        raise NotImplementedError
+
+    def parent(self):
+        """The parent element, or None at the root."""
+        raise NotImplementedError
+
+    def walk(self, skip=TEXT_SKIP_TAGS):
+        """Yield (START, tag) / (TEXT, string) / (END, tag) events in document order."""
+        raise NotImplementedError
+
+    def is_hidden(self):
+        """Hidden by markup: ``hidden``, ``aria-hidden="true"`` or an inline ``display:none``."""
+        if self.has("hidden") or (self.get("aria-hidden") or "").strip().lower() == "true":
+            return True
+        return "display:none" in (self.get("style") or "").replace(" ", "").lower()
+
+    def in_page_chrome(self):
+        """True inside navigation or a hidden subtree, i.e. not a link a reader sees in the content."""
+        chain, node = [], self
+        while node is not None and node.tag:
+            chain.append(node)
+            node = node.parent()
+        for i, node in enumerate(chain):
+            if node.tag in NAV_TAGS or node.is_hidden():
+                return True
+            if node.tag in CHROME_TAGS and not any(outer.tag in CONTENT_TAGS for outer in chain[i + 1:]):
+                return True
+        return False
+
+    def text(self, separator="", strip=False):
+        """Text of the element like BeautifulSoup's ``get_text`` (scripts and styles excluded)."""
+        parts = []
+        for kind, value in self.walk():
+            if kind == TEXT:
+                if strip:
+                    value = value.strip()
+                    if not value:
+                        continue
+                parts.append(value)
+        return separator.join(parts)
+
+
+class Document:
+    """A parsed page; subclasses implement the lookups for one backend."""
+
+    backend = None
+
+    def title(self):
+        node = self.find("title")
+        return node.text(strip=True) if node else ""
+
+    def find(self, tag, class_=None, class_contains=None):
+        """First ``tag`` element; ``class_`` matches one class token, ``class_contains`` any substring of the class attribute."""
+        raise NotImplementedError
+
+    def find_all(self, tag):
+        raise NotImplementedError
+
+    def meta_content(self, attrs):
+        """``content`` of the first ``<meta>`` matching the single-item ``attrs`` dict."""
+        raise NotImplementedError
+
+    def jsonld_texts(self):
+        """Raw text of every ``<script type="application/ld+json">``."""
+        raise NotImplementedError
+
+    def links(self, visible_only=False):
+        """(text, href) for every ``<a href>``.
+
+        ``visible_only`` drops anchors in ``<nav>``, the page header/footer and
+        hidden subtrees, approximating what a rendered page shows.
+        """
+        return [(a.text(separator=" ", strip=True), a.get("href")) for a in self.find_all("a")
+                if a.get("href") and not (visible_only and a.in_page_chrome())]
+
+    def body(self):
+        """The ``<body>`` node, or the document root."""
+        raise NotImplementedError
+
+
+# ---------------- BeautifulSoup ----------------
+
+class SoupNode(Node):
+    def __init__(self, tag):
+        self._tag = tag
+        self.tag = tag.name
+
+    def get(self, attr, default=None):
+        value = self._tag.get(attr, default)
+        return " ".join(value) if isinstance(value, list) else value
+
+    def has(self, attr):
+        return self._tag.has_attr(attr)
+
+    def parent(self):
+        parent = self._tag.parent
+        return SoupNode(parent) if parent is not None and parent.name != "[document]" else None
+
+    def walk(self, skip=TEXT_SKIP_TAGS):
+        stack = [(self._tag, False)]
+        while stack:
+            node, closing = stack.pop()
+            if closing:
+                yield END, node.name
+                continue
+            if isinstance(node, NavigableString):
+                if not isinstance(node, PreformattedString):  # comments, doctype, CDATA
+                    yield TEXT, str(node)
+                continue
+            if node.name in skip:
+                continue
+            yield START, node.name
+            stack.append((node, True))
+            for child in reversed(node.contents):
+                stack.append((child, False))
+
+
+class SoupDocument(Document):
+    backend = BS4
+
+    def __init__(self, html_or_soup):
+        if isinstance(html_or_soup, BeautifulSoup):
+            self.soup = html_or_soup
+        else:
+            self.soup = BeautifulSoup(html_or_soup, "html.parser")
+
+    def find(self, tag, class_=None, class_contains=None):
+        if class_contains:
+            node = self.soup.find(tag, class_=lambda c: c and any(s in c for s in class_contains))
+        elif class_:
+            node = self.soup.find(tag, class_=class_)
+        else:
+            node = self.soup.find(tag)
+        return SoupNode(node) if node else None
+
+    def find_all(self, tag):
+        return [SoupNode(node) for node in self.soup.find_all(tag)]
+
+    def meta_content(self, attrs):
+        meta = self.soup.find("meta", attrs=attrs)
+        return meta.get("content") if meta else None
+
+    def jsonld_texts(self):
+        return [script.string or script.get_text() for script in self.soup.find_all("script", type="application/ld+json")]
+
+    def body(self):
+        return SoupNode(self.soup.find("body") or self.soup)
+
+
+# ---------------- lxml ----------------
+
+class LxmlNode(Node):
+    def __init__(self, element):
+        self._el = element
+        self.tag = element.tag if isinstance(element.tag, str) else None
+
+    def get(self, attr, default=None):
+        return self._el.get(attr, default)
+
+    def has(self, attr):
+        return attr in self._el.attrib
+
+    def parent(self):
+        parent = self._el.getparent()
+        return LxmlNode(parent) if parent is not None else None
+
+    def walk(self, skip=TEXT_SKIP_TAGS):
+        root = self._el
+        stack = [(root, False)]
+        while stack:
+            el, closing = stack.pop()
+            if closing:
+                yield END, el.tag
+                if el.tail and el is not root:
+                    yield TEXT, el.tail
+                continue
+            if not isinstance(el.tag, str) or el.tag in skip:  # comments / processing instructions
+                if el.tail and el is not root:
+                    yield TEXT, el.tail
+                continue
+            yield START, el.tag
+            if el.text:
+                yield TEXT, el.text
+            stack.append((el, True))
+            for child in reversed(el):
+                stack.append((child, False))
+
+
+def _xpath_literal(value):
+    return f"'{value}'" if "'" not in value else f'"{value}"'
+
+
+class LxmlDocument(Document):
+    backend = LXML
+
+    def __init__(self, html):
+        if isinstance(html, str):
+            html = html.encode("utf-8", errors="replace")  # lxml rejects str with an encoding declaration
+        self.root = lxml.html.document_fromstring(html or b"<html></html>")
+
+    def _first(self, xpath):
+        found = self.root.xpath(xpath)
+        return LxmlNode(found[0]) if found else None
+
+    def find(self, tag, class_=None, class_contains=None):
+        if class_contains:
+            test = " or ".join(f"contains(@class, {_xpath_literal(s)})" for s in class_contains)
+            return self._first(f"//{tag}[{test}]")
+        if class_:
+            return self._first(f"//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_} ')]")
+        return self._first(f"//{tag}")
+
+    def find_all(self, tag):
+        return [LxmlNode(el) for el in self.root.iter(tag)]
+
+    def meta_content(self, attrs):
+        (key, value), = attrs.items()
+        node = self._first(f"//meta[@{key}={_xpath_literal(value)}]")
+        return node.get("content") if node else None
+
+    def jsonld_texts(self):
+        return [el.text_content() for el in self.root.xpath("//script[@type='application/ld+json']")]
+
+    def body(self):
+        found = self.root.find("body")
+        return LxmlNode(found if found is not None else self.root)
+
+
+# ---------------- selectolax ----------------
+
+class SelectolaxNode(Node):
+    def __init__(self, node):
+        self._node = node
+        self.tag = node.tag
+
+    def get(self, attr, default=None):
+        value = self._node.attributes.get(attr)
+        return default if value is None else value
+
+    def has(self, attr):
+        return attr in self._node.attributes
+
+    def parent(self):
+        parent = self._node.parent
+        return SelectolaxNode(parent) if parent is not None and parent.tag != "-undef" else None
+
+    def walk(self, skip=TEXT_SKIP_TAGS):
+        stack = [(self._node, False)]
+        while stack:
+            node, closing = stack.pop()
+            if closing:
+                yield END, node.tag
+                continue
+            tag = node.tag
+            if tag == "-text":
+                yield TEXT, node.text_content or ""
+                continue
+            if tag.startswith("-") or tag.startswith("_") or tag in skip:  # comments, doctype
+                continue
+            yield START, tag
+            stack.append((node, True))
+            children = list(node.iter(include_text=True))
+            for child in reversed(children):
+                stack.append((child, False))
+
+
+def _css_string(value):
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class SelectolaxDocument(Document):
+    backend = SELECTOLAX
+
+    def __init__(self, html):
+        self.tree = LexborHTMLParser(html or "")
+
+    def _first(self, selector):
+        node = self.tree.css_first(selector)
+        return SelectolaxNode(node) if node is not None else None
+
+    def find(self, tag, class_=None, class_contains=None):
+        if class_contains:
+            return self._first(", ".join(f"{tag}[class*={_css_string(s)}]" for s in class_contains))
+        if class_:
+            return self._first(f"{tag}[class~={_css_string(class_)}]")
+        return self._first(tag)
+
+    def find_all(self, tag):
+        return [SelectolaxNode(node) for node in self.tree.css(tag)]
+
+    def meta_content(self, attrs):
+        (key, value), = attrs.items()
+        node = self._first(f"meta[{key}={_css_string(value)}]")
+        return node.get("content") if node else None
+
+    def jsonld_texts(self):
+        return [node.text(deep=True) for node in self.tree.css('script[type="application/ld+json"]')]
+
+    def body(self):
+        node = self.tree.body or self.tree.root
+        return SelectolaxNode(node)
+
+
+_DOCUMENTS = {SELECTOLAX: SelectolaxDocument, LXML: LxmlDocument, BS4: SoupDocument}
+
+
+def parse(html, backend=None):
+    """Parse an HTML page with ``backend`` (default: the fastest installed)."""
+    return _DOCUMENTS[backend or default_backend()](html)
+
+
+def as_document(page):
+    """``page`` as a ``Document``; BeautifulSoup objects are wrapped, strings parsed."""
+    if isinstance(page, Document):
+        return page
+    if isinstance(page, BeautifulSoup):
+        return SoupDocument(page)
+    return parse(page)
@@ -0,0 +1,241 @@
+# http_cache.py
+"""On-disk HTTP cache with conditional revalidation.
+
+Bodies are stored as files under ``CACHE_DIR`` with an SQLite index of their
+validators.  Within ``CACHE_TTL`` a cached body is served without touching
+the network; after that the request is sent with ``If-None-Match`` /
+``If-Modified-Since`` and a ``304`` is answered from the local copy.  The
+cache is bounded to ``CACHE_MAX_BYTES`` by evicting the least recently
+used bodies.
+
+``HttpCache.open()`` yields a response-like object whose ``iter_content()``
+streams either the local file or the live body (written through to the
+cache as it is read), so the streaming sitemap reader works unchanged.  A
+live body is only stored once it has been read to the end.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# ---------------- CONFIG ----------------
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache")
+CACHE_TTL = 60 * 60                    # seconds a body is served without revalidating
+CACHE_MAX_BYTES = 512 * 1024 * 1024    # LRU eviction above this total body size
+# ----------------------------------------
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url           TEXT PRIMARY KEY,
+    path          TEXT NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    content_type  TEXT,
+    size          INTEGER NOT NULL,
+    stored_at     REAL NOT NULL,
+    last_access   REAL NOT NULL
+)
+"""
+
+
+def _charset(content_type):
+    for part in (content_type or "").split(";"):
+        key, _, value = part.strip().partition("=")
+        if key.lower() == "charset" and value:
+            return value.strip('"\'')
+    return "utf-8"
+
+
+class CachedResponse:
+    """The subset of ``requests.Response`` the scrapers use."""
+
+    def __init__(self, url, status_code, headers, chunks, from_cache, on_complete=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.from_cache = from_cache
+        self._chunks = chunks
+        self._on_complete = on_complete
+        self._content = None
+
+    def iter_content(self, chunk_size=None):
+        if self._content is not None:
+            yield self._content
+            return
+        for chunk in self._chunks:
+            yield chunk
+        if self._on_complete:
+            self._on_complete()
+            self._on_complete = None
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = b"".join(self.iter_content())
+        return self._content
+
+    @property
+    def text(self):
+        return self.content.decode(_charset(self.headers.get("Content-Type")), errors="replace")
+
+
+class HttpCache:
+    """Validator-aware body cache shared by every fetch in the process."""
+
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+        self.stats = {"fresh": 0, "revalidated": 0, "downloaded": 0, "evicted": 0, "bytes_saved": 0}
+
+    def _lookup(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, etag, last_modified, content_type, size, stored_at FROM entries WHERE url = ?",
+                (url,)).fetchone()
+        if row and not os.path.exists(row[0]):
+            self._delete(url)
+            return None
+        return row
+
+    def _delete(self, url):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self._conn.commit()
+
+    def _touch(self, url, revalidated=False):
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self._conn.execute("UPDATE entries SET last_access = ?, stored_at = ? WHERE url = ?", (now, now, url))
+            else:
+                self._conn.execute("UPDATE entries SET last_access = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+
+    def _file_chunks(self, path, chunk_size=64 * 1024):
+        with open(path, "rb") as fh:
+            while True:
+                chunk = fh.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def _serve_local(self, url, row, status_label):
+        path, etag, last_modified, content_type, size, _ = row
+        self.stats[status_label] += 1
+        self.stats["bytes_saved"] += size
+        headers = {"Content-Type": content_type or "", "ETag": etag or "", "Last-Modified": last_modified or ""}
+        return CachedResponse(url, 200, headers, self._file_chunks(path), from_cache=True)
+
+    def _store(self, url, tmp_path, headers):
+        size = os.path.getsize(tmp_path)
+        final_path = os.path.join(self.directory, hashlib.sha1(url.encode("utf-8")).hexdigest())
+        os.replace(tmp_path, final_path)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (url, path, etag, last_modified, content_type, size, stored_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, final_path, headers.get("ETag"), headers.get("Last-Modified"),
+                 headers.get("Content-Type"), size, now, now))
+            self._conn.commit()
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for url, path, size in self._conn.execute(
+                    "SELECT url, path, size FROM entries ORDER BY last_access ASC"):
+                if total <= self.max_bytes:
+                    break
+                victims.append((url, path))
+                total -= size
+            self._conn.executemany("DELETE FROM entries WHERE url = ?", [(u,) for u, _ in victims])
+            self._conn.commit()
+        for _, path in victims:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.stats["evicted"] += len(victims)
+
+    def is_fresh(self, url):
+        """True when ``open(url)`` would be answered from disk without a request."""
+        row = self._lookup(url)
+        return bool(row) and time.time() - row[5] < self.ttl
+
+    @contextmanager
+    def open(self, session, url, timeout=30, headers=None):
+        """Yield a ``CachedResponse`` for ``url``, hitting the network only when needed."""
+        row = self._lookup(url)
+        if row and time.time() - row[5] < self.ttl:
+            self._touch(url)
+            yield self._serve_local(url, row, "fresh")
+            return
+
+        request_headers = dict(headers or {})
+        if row:
+            if row[1]:
+                request_headers["If-None-Match"] = row[1]
+            if row[2]:
+                request_headers["If-Modified-Since"] = row[2]
+
+        with session.get(url, stream=True, timeout=timeout, headers=request_headers) as response:
+            if response.status_code == 304 and row:
+                self._touch(url, revalidated=True)
+                yield self._serve_local(url, row, "revalidated")
+                return
+
+            if response.status_code != 200:
+                yield CachedResponse(response.url, response.status_code, response.headers,
+                                     response.iter_content(64 * 1024), from_cache=False)
+                return
+
+            self.stats["downloaded"] += 1
+            tmp_path = os.path.join(self.directory, f"tmp-{uuid.uuid4().hex}")
+            tmp = open(tmp_path, "wb")
+
+            def tee():
+                for chunk in response.iter_content(64 * 1024):
+                    tmp.write(chunk)
+                    yield chunk
+
+            def complete():
+                tmp.close()
+                self._store(url, tmp_path, response.headers)
+
+            try:
+                yield CachedResponse(response.url, 200, response.headers, tee(), from_cache=False,
+                                     on_complete=complete)
+            finally:
+                if not tmp.closed:  # body not read to the end: don't cache a partial copy
+                    tmp.close()
+                    try:
+                        os.remove(tmp_path)
+                    except OSError:
+                        pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache(**kwargs):
+    """Process-wide ``HttpCache``."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache(**kwargs)
+        return _cache
@@ -0,0 +1,178 @@
+# keyword_matcher.py
+"""Compiled keyword matching for the keyword crawlers' link filter.
+
+``compile_keywords(keywords)`` builds one Aho-Corasick automaton per site from its
+``input_sites.csv`` keywords, so an anchor text is scanned once whatever
+the number of keywords (instead of lower-casing it once per keyword).
+
+Each keyword has a match mode, written after a slash in the CSV:
+
+* ``s`` substring (default)    – ``keyword in text``, as before
+* ``p`` word prefix            – "vaccine/p" matches "vaccines", not "antivaccine"
+* ``w`` whole word             – "mRNA/w" matches "mRNA" but not "mRNAs"
+* ``c`` case-sensitive, combinable with the above ("B/wc")
+
+Word boundaries are anything but letters, so "B/w" still matches "$2B".
+Keywords without a marker keep the substring match, so existing keyword
+lists select the same links; ``SHORT_KEYWORD_MODE`` can be set to "wc" to
+make keywords of ``SHORT_KEYWORD_LEN`` characters or fewer ("$", "B")
+whole-word and case-sensitive without marking each one.
+
+Every matcher counts which keywords fired, and how often a keyword was the
+only reason a link was fetched; ``report()`` prints both so noisy keywords
+can be pruned.
+"""
+from collections import Counter, deque
+
+# ---------------- CONFIG ----------------
+DEFAULT_MODE = "s"
+SHORT_KEYWORD_LEN = 2
+SHORT_KEYWORD_MODE = DEFAULT_MODE  # "wc" stops "$" or "B" matching nearly every link
+NOISY_SHARE = 0.25  # report keywords that alone caused this share of the matched links
+# ----------------------------------------
+
+WORD, PREFIX, SUBSTRING = "w", "p", "s"
+
+_matchers = []  # every compiled matcher, for report()
+
+
+class Keyword:
+    __slots__ = ("label", "text", "mode", "case_sensitive")
+
+    def __init__(self, label, text, mode, case_sensitive):
+        self.label = label
+        self.text = text
+        self.mode = mode
+        self.case_sensitive = case_sensitive
+
+
+def parse_keyword(spec):
+    """``Keyword`` for one CSV entry such as "vaccine", "mRNA/w" or "B/wc"."""
+    spec = spec.strip()
+    text, flags = spec, ""
+    if "/" in spec[1:]:
+        head, tail = spec.rsplit("/", 1)
+        if tail and set(tail) <= set("wpsc"):
+            text, flags = head, tail
+    if not flags:
+        flags = SHORT_KEYWORD_MODE if len(text) <= SHORT_KEYWORD_LEN else DEFAULT_MODE
+    mode = next((m for m in (WORD, PREFIX, SUBSTRING) if m in flags), DEFAULT_MODE)
+    return Keyword(spec, text, mode, "c" in flags)
+
+
+def _lower(text):
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # a few characters (e.g. "İ") lower-case to two; keep offsets aligned with the original
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def _is_letter(text, i):
+    return 0 <= i < len(text) and text[i].isalpha()
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over one site's keywords."""
+
+    def __init__(self, keywords, name=""):
+        self.name = name
+        self.keywords = [k if isinstance(k, Keyword) else parse_keyword(k) for k in keywords]
+        self.keywords = [k for k in self.keywords if k.text]
+        self.fired = Counter()       # keyword label -> links it matched
+        self.only = Counter()        # keyword label -> links nothing else matched
+        self.links_seen = 0
+        self.links_matched = 0
+        self._build()
+
+    def _build(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in _lower(keyword.text):
+                if ch not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][ch] = len(self._goto) - 1
+                state = self._goto[state][ch]
+            self._out[state].append(index)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def _accepts(self, keyword, text, start, end):
+        if keyword.case_sensitive and text[start:end] != keyword.text:
+            return False
+        if keyword.mode == SUBSTRING:
+            return True
+        if _is_letter(text, start - 1) and text[start].isalpha():
+            return False
+        if keyword.mode == WORD and _is_letter(text, end) and text[end - 1].isalpha():
+            return False
+        return True
+
+    def find(self, text):
+        """Labels of the keywords that match ``text`` (no statistics recorded)."""
+        found = set()
+        if not text or not self.keywords:
+            return found
+        lowered = _lower(text)
+        state = 0
+        for i, ch in enumerate(lowered):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for index in self._out[state]:
+                keyword = self.keywords[index]
+                if keyword.label in found:
+                    continue
+                end = i + 1
+                if self._accepts(keyword, text, end - len(keyword.text), end):
+                    found.add(keyword.label)
+        return found
+
+    def matches(self, text):
+        """Labels of the keywords that match ``text``; counted for ``report()``."""
+        found = self.find(text)
+        self.links_seen += 1
+        if found:
+            self.links_matched += 1
+            self.fired.update(found)
+            if len(found) == 1:
+                self.only.update(found)
+        return found
+
+
+def compile_keywords(keywords, name=""):
+    """Matcher for a list of keyword specs or a comma-separated CSV cell (matchers pass through)."""
+    if isinstance(keywords, KeywordMatcher):
+        return keywords
+    if isinstance(keywords, str):
+        keywords = [k for k in keywords.split(",") if k.strip()]
+    matcher = KeywordMatcher(keywords, name=name)
+    _matchers.append(matcher)
+    return matcher
+
+
+def report():
+    """Print, per site, which keywords fired and how many fetches each one alone caused."""
+    for matcher in _matchers:
+        if not matcher.links_seen:
+            continue
+        print(f"🔑 {matcher.name or 'keywords'}: {matcher.links_matched}/{matcher.links_seen} links matched")
+        for keyword in matcher.keywords:
+            fired = matcher.fired[keyword.label]
+            only = matcher.only[keyword.label]
+            flag = "  ⚠️ noisy, prune?" if only and only >= NOISY_SHARE * matcher.links_matched else ""
+            print(f"   - {keyword.label:20} fired {fired:5}  sole match {only:5}{flag}")
@@ -0,0 +1,117 @@
+# link_harvest.py
+"""Collect every anchor of a loaded page in one WebDriver call.
+
+``find_elements(By.XPATH, "//a")`` followed by ``.text`` and
+``.get_attribute("href")`` per element costs two chromedriver round trips
+per anchor.  ``harvest(driver)`` runs one script that returns, for every
+``<a href>``, its visible text, absolute href and page position, as plain
+dicts ready for ``keyword_matcher``.
+
+Crawlers that fetch through ``fetcher`` pass ``PAGE_LINKS`` as the fetch's
+``extract``, so a page rendered in the browser is harvested in the same
+call; ``page_links(page)`` then gives the visible (text, href) pairs from
+either tier (see ``html_parser.Document.links`` for the HTTP tier).
+
+Each harvest also times one empty ``execute_script`` round trip, so
+``report()`` can show what the per-element approach would have cost on the
+same page.  ``compare(driver)`` measures that cost for real.
+"""
+import time
+
+from selenium.webdriver.common.by import By
+
+try:
+    from src import fetcher, html_parser
+except ImportError:
+    import fetcher
+    import html_parser
+
+# ---------------- CONFIG ----------------
+MAX_TEXT = 500  # characters of anchor text kept per link
+# ----------------------------------------
+
+HARVEST_SCRIPT = """
+const maxText = arguments[0];
+const links = [];
+const anchors = document.querySelectorAll('a[href]');
+for (let i = 0; i < anchors.length; i++) {
+    const a = anchors[i];
+    const rect = a.getBoundingClientRect();
+    links.push([
+        (a.innerText || '').trim().slice(0, maxText),
+        a.href,
+        Math.round(rect.top + window.scrollY),
+        Math.round(rect.left + window.scrollX),
+        rect.width > 0 && rect.height > 0,
+    ]);
+}
+return links;
+"""
+
+_pages = []  # (url, anchors, harvest seconds, round-trip seconds, measured per-element seconds or None)
+
+
+def _round_trip(driver):
+    started = time.perf_counter()
+    driver.execute_script("return 0;")
+    return time.perf_counter() - started
+
+
+def harvest(driver, visible_only=False):
+    """[{"text", "href", "top", "left", "visible"}] for every anchor of the current page."""
+    rtt = _round_trip(driver)
+    started = time.perf_counter()
+    raw = driver.execute_script(HARVEST_SCRIPT, MAX_TEXT) or []
+    elapsed = time.perf_counter() - started
+    links = [{"text": text, "href": href, "top": top, "left": left, "visible": visible}
+             for text, href, top, left, visible in raw]
+    _pages.append([driver.current_url, len(links), elapsed, rtt, None])
+    if visible_only:
+        links = [link for link in links if link["visible"]]
+    return links
+
+
+class LinkScript:
+    """``fetcher.fetch(..., extract=PAGE_LINKS)``: harvest the visible anchors of a rendered page."""
+
+    def run(self, driver):
+        title = (driver.title or "").lower()
+        markers = [m.replace("<title>", "").replace("</title>", "") for m in fetcher.CHALLENGE_MARKERS]
+        return {"links": harvest(driver, visible_only=True), "challenge": any(m in title for m in markers)}
+
+
+PAGE_LINKS = LinkScript()
+
+
+def page_links(page):
+    """(text, href) of the links a reader sees on a ``fetcher.FetchResult`` from either tier."""
+    if page.data is not None:
+        return [(link["text"], link["href"]) for link in page.data["links"]]
+    return html_parser.parse(page.html).links(visible_only=True)
+
+
+def compare(driver):
+    """Time the old per-element loop on the current page (for verifying the savings)."""
+    started = time.perf_counter()
+    for element in driver.find_elements(By.XPATH, "//a[@href]"):
+        element.text
+        element.get_attribute("href")
+    elapsed = time.perf_counter() - started
+    if _pages:
+        _pages[-1][4] = elapsed
+    return elapsed
+
+
+def report():
+    """Print per-page harvest time against the per-element cost."""
+    if not _pages:
+        return
+    print("🔗 Link harvest (one script call per page):")
+    saved = 0.0
+    for url, anchors, elapsed, rtt, measured in _pages:
+        per_element = measured if measured is not None else (1 + 2 * anchors) * rtt
+        kind = "measured" if measured is not None else "estimated"
+        saved += per_element - elapsed
+        print(f" - {url}: {anchors} anchors in {elapsed * 1000:.0f} ms, 1 round trip "
+              f"vs {1 + 2 * anchors} ({per_element * 1000:.0f} ms {kind})")
+    print(f"⚡ ~{saved:.1f}s of WebDriver round trips saved")
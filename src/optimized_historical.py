@@ -1,176 +1,126 @@
 import csv
 import os
 import logging
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
+from urllib.parse import urljoin
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+
+try:
+    from src import fetcher, history_store, html_parser, keyword_matcher, link_harvest, output_writer, search_index, text_extract, url_canon
+except ImportError:
+    import fetcher
+    import history_store
+    import html_parser
+    import keyword_matcher
+    import link_harvest
+    import output_writer
+    import search_index
+    import text_extract
+    import url_canon
+
+SCRAPED_COLUMNS = ["link", "title", "body", "date"]
 
 # -------------------- Suppress Selenium Logs --------------------
 logging.getLogger('selenium').setLevel(logging.CRITICAL)
 
-# -------------------- Speed up WebDriver Manager ----------------
-os.environ['WDM_LOCAL'] = '1'  # use cached driver if available
+# -------------------- Page Fetching ------------------------------
+def wait_for_body(driver, timeout=10):
+    """Browser-tier wait used when a page has to be rendered."""
+    WebDriverWait(driver, timeout).until(
+        EC.presence_of_element_located((By.TAG_NAME, "body"))
+    )
 
-# -------------------- Setup Chrome Options ----------------------
-chrome_options = Options()
-# Uncomment below to run in headless mode
-# chrome_options.add_argument("--headless=new")
-# chrome_options.add_argument("--disable-gpu")
-# chrome_options.add_argument("--no-sandbox")
-# chrome_options.add_argument("--disable-dev-shm-usage")
-chrome_options.add_argument("--log-level=3")
-chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
 
-# -------------------- Scraper Function --------------------------
-def scrape_articles_from_url(driver, url, keywords, csv_file_path, write_headers=False):
-    print(f"\n🔍 Scraping: {url} with keywords: {keywords}")
+def safe_fetch(link, extract=None):
+    """Fetch a link (HTTP first, browser if needed), retrying once."""
+    for attempt in range(2):
+        try:
+            return fetcher.fetch(link, wait=wait_for_body, extract=extract)
+        except fetcher.PageUnavailable as e:
+            print(f"⚠️ {e}")  # a dead link: retrying won't help
+            return None
+        except Exception as e:
+            print(f"⚠️ Attempt {attempt+1} failed for {link}: {e}")
+    return None
 
-    def safe_get(link, timeout=10):
-        """Try to load a link, restart driver if session crashes."""
-        nonlocal driver
-        for attempt in range(2):
-            try:
-                driver.get(link)
-                WebDriverWait(driver, timeout).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                return True
-            except Exception as e:
-                if "no such window" in str(e) or "invalid session id" in str(e):
-                    print("⚠️ Driver crashed, restarting...")
-                    try:
-                        driver.quit()
-                    except:
-                        pass
-                    service = Service(executable_path=ChromeDriverManager().install(), log_path=os.devnull)
-                    driver = webdriver.Chrome(service=service, options=chrome_options)
-                else:
-                    print(f"⚠️ Attempt {attempt+1} failed for {link}: {e}")
-        return False
 
+def extract_article(html):
+    """Title, body and date from an article page."""
+    doc = html_parser.parse(html)
+
+    # Title
+    title = doc.title()
+
+    # Body (each text node once, navigation-like blocks dropped)
+    body = text_extract.extract_body(doc)
+
+    # ✅ Clean body text
+    body = body.replace("\n", " ").replace("\r", " ").strip()
+
+    # Date
+    date_elem = doc.find("time")
+    if date_elem:
+        date = date_elem.get("datetime") or date_elem.text(strip=True)
+    else:
+        date_elem = doc.find("span", class_contains=("date", "Date"))
+        date = date_elem.text(strip=True) if date_elem else "Date not found"
+
+    return title, body, date
+
+# -------------------- Scraper Function --------------------------
+def scrape_articles_from_url(url, keywords, csv_file_path):
+    matcher = keyword_matcher.compile_keywords(keywords, name=url)
+    print(f"\n🔍 Scraping: {url} with keywords: {[k.label for k in matcher.keywords]}")
+
+    matching_links = []
     try:
-        if not safe_get(url):
+        page = safe_fetch(url, extract=link_harvest.PAGE_LINKS)
+        if page is None:
             print(f"❌ Could not load {url}")
-            return driver
+            return
 
         # Collect all links on the page
-        all_links = driver.find_elements(By.XPATH, "//a[@href]")
+        all_links = link_harvest.page_links(page)  # visible anchors only, on either tier
 
         # Filter links based on keywords
-        matching_links = []
-        for link in all_links:
+        for text, link_href in all_links:
             try:
-                text = link.text.strip()
-                if any(keyword.lower() in text.lower() for keyword in keywords):
-                    href = link.get_attribute("href")
-                    if href and href.startswith("http"):
+                if matcher.matches(text):
+                    href = urljoin(page.final_url, link_href)
+                    if href and href.startswith("http") and url_canon.claim(href):  # once per run
                         matching_links.append(href)
             except Exception as e:
                 print(f"⚠️ Error while processing a link: {e}") 
 
-        with open(csv_file_path, mode="a", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file, quoting=csv.QUOTE_ALL)  # ✅ force quoting
-            if write_headers:
-                writer.writerow(["link", "title", "body", "date"])
-
-            for link in matching_links:
-                if not safe_get(link):
-                    print(f"❌ Skipping link after 2 failed attempts: {link}")
-                    continue
-
-                # Title
-                try:
-                    title = driver.title.strip()
-                except:
-                    title = ""
-
-                # Body (lighter version: only key tags)
-                body_texts = []
-                candidate_tags = ["p", "article", "section"]
-
-                try:
-                    for tag in candidate_tags:
-                        elements = driver.find_elements(By.TAG_NAME, tag)
-                        for el in elements:
-                            text = el.text.strip()
-                            if text and len(text) > 30:
-                                body_texts.append(text)
-
-                    seen = set()
-                    body = "||".join([t for t in body_texts if not (t in seen or seen.add(t))])
-
-                    if not body:  # fallback to <body>
-                        try:
-                            body_elem = driver.find_element(By.TAG_NAME, "body")
-                            body = body_elem.text.strip()
-                        except:
-                            body = ""
-                except:
-                    body = ""
-
-                # ✅ Clean body text
-                body = body.replace("\n", " ").replace("\r", " ").strip()
-
-                # Date
-                date = ""
-                try:
-                    date_elem = driver.find_element(By.XPATH, "//time")
-                    date = date_elem.get_attribute("datetime") or date_elem.text.strip()
-                except:
-                    try:
-                        date_elem = driver.find_element(
-                            By.XPATH,
-                            "//span[contains(@class,'date') or contains(@class,'Date')]"
-                        )
-                        date = date_elem.text.strip()
-                    except:
-                        date = "Date not found"
-
-                writer.writerow([link, title, body, date])
+        writer = output_writer.get_writer(csv_file_path, SCRAPED_COLUMNS, quoting=csv.QUOTE_ALL)  # ✅ force quoting
+        for link in matching_links:
+            article = safe_fetch(link)
+            if article is None:
+                print(f"❌ Skipping link after 2 failed attempts: {link}")
+                continue
+
+            title, body, date = extract_article(article.html)
+            writer.write([link, title, body, date])
 
     except Exception as e:
         print(f"❌ Could not process {url}: {e}")
 
     print(f"✅ Done scraping {url} ({len(matching_links)} links checked)")
-    return driver
 
 # -------------------- Historical File Update --------------------
 def update_historical_file(scraped_file, historical_file="historical_articles.csv"):
-    """Append scraped data to a historical file with timestamp."""
-    if not os.path.exists(scraped_file):
-        print(f"⚠️ No scraped file found at {scraped_file}, skipping history update.")
-        return
-
+    """Upsert scraped articles into the keyed history; only new/changed ones reach the historical file."""
     try:
-        with open(scraped_file, mode="r", newline="", encoding="utf-8") as infile:
-            reader = csv.reader(infile)
-            rows = list(reader)
-
-        if not rows:
-            print("⚠️ Scraped file is empty, nothing to append.")
+        header, data_rows = output_writer.read_rows(scraped_file)  # flushes rows still buffered by the crawlers
+        if not header:
+            print(f"⚠️ No scraped output found at {scraped_file}, skipping history update.")
             return
 
-        header, data_rows = rows[0], rows[1:]
-        if "scraped_at" not in header:
-            header.append("scraped_at")
-
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        updated_rows = [row + [timestamp] for row in data_rows]
-
-        file_exists = os.path.exists(historical_file)
-
-        with open(historical_file, mode="a", newline="", encoding="utf-8") as outfile:
-            writer = csv.writer(outfile, quoting=csv.QUOTE_ALL)  # ✅ force quoting
-            if not file_exists:
-                writer.writerow(header)
-            writer.writerows(updated_rows)
-
-        print(f"📌 Appended {len(updated_rows)} rows to {historical_file}")
+        result = history_store.update_history(header, data_rows, historical_file)
+        search_index.index_records(result["new"] + result["changed"])
+        print(f"📌 History: {len(result['new'])} new, {len(result['changed'])} changed, "
+              f"{result['unchanged']} unchanged ({history_store.store_path(historical_file)})")
 
     except Exception as e:
         print(f"❌ Failed to update historical file: {e}")
@@ -183,14 +133,7 @@ def main():
     input_csv = os.path.join(script_dir, "input_sites.csv")
     output_csv = os.path.join(script_dir, "scraped_articles.csv")
 
-    if os.path.exists(output_csv):
-        os.remove(output_csv)
-
-    # Initialize driver once
-    service = Service(executable_path=ChromeDriverManager().install(), log_path=os.devnull)
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-
-    first_site = True
+    output_writer.remove(output_csv)
 
     try:
         with open(input_csv, mode="r", newline="", encoding="utf-8") as file:
@@ -198,27 +141,22 @@ def main():
             for row in reader:
                 url = row["website_url"].strip()
                 keyword_str = row["keywords"]
-                keywords = [kw.strip() for kw in keyword_str.split(",")]
-                driver = scrape_articles_from_url(
-                    driver=driver,
+                keywords = keyword_matcher.compile_keywords(keyword_str, name=url)  # compiled once per site
+                scrape_articles_from_url(
                     url=url,
                     keywords=keywords,
                     csv_file_path=output_csv,
-                    write_headers=first_site
                 )
-                first_site = False
     except FileNotFoundError:
         print(f"❌ Input CSV not found at: {input_csv}")
-    finally:
-        try:
-            driver.quit()
-        except:
-            pass
 
     # Update historical file
     historical_csv = os.path.join(script_dir, "historical_articles.csv")
     update_historical_file(output_csv, historical_csv)
 
+    keyword_matcher.report()
+    link_harvest.report()
+    url_canon.report()
     print(f"\n📁 Scraping complete. Output saved to: {output_csv}")
     print(f"🗂 Historical data updated at: {historical_csv}")
 
@@ -0,0 +1,235 @@
+# output_writer.py
+"""Buffered, atomically flushed output shared by every scraper.
+
+``get_writer(path, columns)`` returns the process-wide writer for a file.
+Records are kept in memory and written out every ``FLUSH_ROWS`` records,
+every ``FLUSH_SECONDS`` (a background thread covers idle periods), on
+``close()`` and at interpreter exit — which includes a driver timeout,
+since SIGTERM is turned into ``SystemExit`` in scraper processes.
+
+A flush appends the batch to the file and fsyncs it, so its cost is the
+size of the batch, not of the file.  A batch that fails part-way is
+truncated off again, leaving the previous complete rows behind.
+
+``OUTPUT_FORMAT=parquet`` sends the same records to the partitioned
+Parquet store in ``article_store`` instead of CSV files.
+"""
+import atexit
+import csv
+import io
+import os
+import threading
+import time
+
+try:
+    from src import article_store
+except ImportError:
+    import article_store
+
+CSV = "csv"
+PARQUET = "parquet"
+
+# ---------------- CONFIG ----------------
+OUTPUT_FORMAT = os.environ.get("OUTPUT_FORMAT", CSV)  # "csv" or "parquet" (see article_store)
+FLUSH_ROWS = 50          # flush after this many buffered records
+FLUSH_SECONDS = 30       # ... or when the oldest buffered record is this old
+# ----------------------------------------
+
+
+class BufferedCsvWriter:
+    """Collects records for one CSV file and flushes them in batches."""
+
+    def __init__(self, path, columns, quoting=csv.QUOTE_MINIMAL, flush_rows=FLUSH_ROWS,
+                 flush_seconds=FLUSH_SECONDS):
+        self.path = path
+        self.columns = list(columns)
+        self.quoting = quoting
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._rows = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self.written = 0
+
+    def write(self, record):
+        """Buffer one record (a dict keyed by column, or a sequence in column order)."""
+        if isinstance(record, dict):
+            row = [record.get(column, "") for column in self.columns]
+        else:
+            row = list(record)
+        with self._lock:
+            self._rows.append(row)
+            if self._oldest is None:
+                self._oldest = time.time()
+            due = len(self._rows) >= self.flush_rows
+        if due:
+            self.flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def due(self):
+        with self._lock:
+            return self._oldest is not None and time.time() - self._oldest >= self.flush_seconds
+
+    def flush(self):
+        """Write buffered records out; a failed write keeps them for the next attempt."""
+        with self._lock:
+            if not self._rows:
+                return 0
+            rows, self._rows, self._oldest = self._rows, [], None
+            try:
+                self._write_rows(rows)
+            except Exception:
+                self._rows[:0] = rows
+                if self._oldest is None:
+                    self._oldest = time.time()
+                raise
+            self.written += len(rows)
+            return len(rows)
+
+    def _write_rows(self, rows):
+        """Append ``rows`` to ``path`` and fsync; a failed batch is truncated off again."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            size = f.tell()
+            try:
+                writer = csv.writer(f, quoting=self.quoting)
+                if size == 0:
+                    writer.writerow(self.columns)
+                writer.writerows(rows)
+                f.flush()
+                os.fsync(f.fileno())
+            except BaseException:
+                f.truncate(size)
+                raise
+
+    def close(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"❌ Could not write {self.path}: {e}")
+
+
+class BufferedParquetWriter(BufferedCsvWriter):
+    """Same batching, but each flush adds files to the partitioned Parquet store."""
+
+    def __init__(self, path, columns, quoting=None, **kwargs):
+        article_store.require_pyarrow()
+        super().__init__(article_store.dataset_path(path), columns, **kwargs)
+
+    def _write_rows(self, rows):
+        article_store.append(self.path, self.columns, rows)
+
+
+WRITERS = {CSV: BufferedCsvWriter, PARQUET: BufferedParquetWriter}
+
+_writers = {}
+_writers_lock = threading.Lock()
+_flusher = None
+
+
+def _flush_loop():
+    while True:
+        time.sleep(1)
+        with _writers_lock:
+            writers = list(_writers.values())
+        for writer in writers:
+            if writer.due():
+                try:
+                    writer.flush()
+                except Exception as e:
+                    print(f"⚠️ Deferred flush of {writer.path} failed: {e}")
+
+
+def get_writer(path, columns, output_format=None, **kwargs):
+    """Process-wide writer for the output ``path`` in ``OUTPUT_FORMAT`` (created on first use)."""
+    global _flusher
+    output_format = output_format or OUTPUT_FORMAT
+    key = (os.path.abspath(path), output_format)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = WRITERS[output_format](path, columns, **kwargs)
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="output-writer-flush", daemon=True)
+            _flusher.start()
+            atexit.register(close_all)
+        return writer
+
+
+def close(path):
+    """Flush and forget the writers for ``path``, if there are any."""
+    with _writers_lock:
+        keys = [key for key in _writers if key[0] == os.path.abspath(path)]
+        writers = [_writers.pop(key) for key in keys]
+    for writer in writers:
+        writer.close()
+
+
+def remove(path):
+    """Drop the previous run's output at ``path`` (the CSV or its Parquet dataset)."""
+    close(path)
+    if os.path.exists(path):
+        os.remove(path)
+    if OUTPUT_FORMAT == PARQUET:
+        article_store.remove(path)
+
+
+def read_rows(path):
+    """(header, rows) of the output at ``path`` in ``OUTPUT_FORMAT``; ([], []) when there is none."""
+    close(path)
+    if OUTPUT_FORMAT == PARQUET:
+        return article_store.read_rows(path)
+    if not os.path.exists(path):
+        return [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    return (rows[0], rows[1:]) if rows else ([], [])
+
+
+def _flush(path):
+    with _writers_lock:
+        writers = [writer for key, writer in _writers.items() if key[0] == os.path.abspath(path)]
+    for writer in writers:
+        writer.flush()
+
+
+def offset(path):
+    """Flush ``path`` and return how far its output extends: CSV bytes, or the Parquet part files."""
+    _flush(path)
+    if OUTPUT_FORMAT == PARQUET:
+        root = article_store.dataset_path(path)
+        return [os.path.relpath(part, root) for part in article_store.partition_files(path)]
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def tail_rows(path, since):
+    """(header, rows) written to the output at ``path`` after ``offset(path)`` returned ``since``."""
+    _flush(path)
+    if OUTPUT_FORMAT == PARQUET:
+        root = article_store.dataset_path(path)
+        seen = set(since or ())
+        parts = [part for part in article_store.partition_files(path) if os.path.relpath(part, root) not in seen]
+        return article_store.read_rows(path, files=parts)
+    if not os.path.exists(path):
+        return [], []
+    with open(path, "rb") as f:
+        header_line = f.readline()
+        if not header_line:
+            return [], []
+        f.seek(max(since or 0, f.tell()))
+        tail = f.read()
+    header = next(csv.reader(io.StringIO(header_line.decode("utf-8"))))
+    return header, list(csv.reader(io.StringIO(tail.decode("utf-8"), newline="")))
+
+
+def close_all():
+    """Flush every open writer (run at exit and at the end of each scraper)."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
@@ -0,0 +1,78 @@
+# parser_benchmark.py
+"""Parse throughput (pages/sec) of each installed ``html_parser`` backend.
+
+For every saved page it times the parse alone and the full per-article
+workload the scrapers run: title, ``<meta>``/``<time>``/JSON-LD date
+lookup, the body container and the ``text_extract`` body.  Pages are the
+ones saved by ``extract_benchmark --fetch``:
+
+    python -m src.parser_benchmark [saved_pages/ or page.html ...] [--repeat N]
+"""
+import argparse
+import time
+
+try:
+    from src import dates, extract_benchmark, html_parser, text_extract
+except ImportError:
+    import dates
+    import extract_benchmark
+    import html_parser
+    import text_extract
+
+# ---------------- CONFIG ----------------
+REPEAT = 5
+# ----------------------------------------
+
+
+def scrape_workload(html, backend):
+    doc = html_parser.parse(html, backend)
+    doc.title()
+    dates.extract_date(doc, sources=dates.SOURCES, jsonld_keys=("dateModified", "datePublished"))
+    body_div = doc.find("div", class_="field--name-body") or doc.find("div", class_="article-content")
+    if body_div:
+        body_div.text(separator="\n", strip=True)
+    return text_extract.extract_body(doc)
+
+
+def pages_per_second(func, pages, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            func(html)
+    elapsed = time.perf_counter() - started
+    return len(pages) * repeat / elapsed if elapsed else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends on saved pages.")
+    parser.add_argument("paths", nargs="*", default=[extract_benchmark.PAGES_DIR])
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    files = extract_benchmark.page_files(args.paths)
+    if not files:
+        print(f"⚠️ No saved pages found in {args.paths}; save some with `python -m src.extract_benchmark --fetch URL`.")
+        return
+    pages = []
+    for path in files:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            pages.append(f.read())
+    size_kb = sum(len(p) for p in pages) / 1024
+    print(f"📄 {len(pages)} pages, {size_kb:.0f} KB of HTML, {args.repeat} repeats")
+
+    results = {}
+    for backend in html_parser.available_backends():
+        parse_rate = pages_per_second(lambda html: html_parser.parse(html, backend), pages, args.repeat)
+        scrape_rate = pages_per_second(lambda html: scrape_workload(html, backend), pages, args.repeat)
+        results[backend] = scrape_rate
+        print(f" - {backend:10} parse {parse_rate:8.1f} pages/s   parse+extract {scrape_rate:8.1f} pages/s")
+
+    baseline = results.get(html_parser.BS4)
+    for backend, rate in results.items():
+        if backend != html_parser.BS4 and baseline:
+            print(f"⚡ {backend}: {rate / baseline:.1f}x the BeautifulSoup throughput")
+    print(f"🔧 Scrapers use: {html_parser.default_backend()} (set HTML_PARSER to override)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# profile_benchmark.py
+"""Compare the "full" and "lean" browser profiles page by page.
+
+Loads each URL in both profiles (browser cache cleared before every load)
+and records wall-clock navigation time, DOMContentLoaded/load timings and
+the bytes transferred according to the Resource Timing API.  Cross-origin
+resources without ``Timing-Allow-Origin`` report 0 bytes, so the byte
+figures are lower bounds for both profiles; blocked requests never start
+and so are not counted at all.
+
+    python -m src.profile_benchmark [URL ...] [--runs N]
+"""
+import argparse
+import csv
+import time
+
+try:
+    from src import browser_pool, readiness
+except ImportError:
+    import browser_pool
+    import readiness
+
+# ---------------- CONFIG ----------------
+SAMPLE_URLS = [
+    "https://www.biopharminternational.com/",
+    "https://www.pharmtech.com/",
+    "https://resilience.com/",
+    "https://www.catalent.com/",
+    "https://www.genengnews.com/",
+]
+RESULTS_FILE = "profile_benchmark.csv"
+RUNS = 2
+PAGE_LOAD_TIMEOUT = 60
+# ----------------------------------------
+
+MEASURE_JS = """
+const nav = performance.getEntriesByType('navigation')[0] || {};
+const res = performance.getEntriesByType('resource');
+return [nav.transferSize || 0,
+        res.reduce((sum, r) => sum + (r.transferSize || 0), 0),
+        res.length,
+        Math.round(nav.domContentLoadedEventEnd || 0),
+        Math.round(nav.loadEventEnd || 0)];
+"""
+
+COLUMNS = ["url", "profile", "run", "seconds", "kb", "requests", "dom_ready_ms", "load_ms", "error"]
+
+# wait for the body text, not the load event, so the profiles are compared on what we scrape
+PAGE_READY = readiness.network_idle(cap=20)
+
+
+def measure(url, profile, run):
+    row = {"url": url, "profile": profile, "run": run, "error": ""}
+    with browser_pool.session(profile) as driver:
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+            started = time.time()
+            driver.get(url)
+            PAGE_READY(driver)
+            row["seconds"] = round(time.time() - started, 2)
+            doc_bytes, resource_bytes, requests, dom_ready, load = driver.execute_script(MEASURE_JS)
+            row.update(kb=round((doc_bytes + resource_bytes) / 1024, 1), requests=requests,
+                       dom_ready_ms=dom_ready, load_ms=load)
+        except Exception as e:
+            row["error"] = str(e).splitlines()[0] if str(e) else e.__class__.__name__
+    return row
+
+
+def summarize(rows):
+    print(f"\n{'URL':45} {'profile':7} {'sec':>7} {'KB':>9} {'reqs':>5}")
+    totals = {}
+    for row in rows:
+        if row["error"]:
+            print(f"{row['url'][:45]:45} {row['profile']:7} ❌ {row['error']}")
+            continue
+        print(f"{row['url'][:45]:45} {row['profile']:7} {row['seconds']:>7} {row['kb']:>9} {row['requests']:>5}")
+        total = totals.setdefault(row["profile"], {"pages": 0, "seconds": 0.0, "kb": 0.0})
+        total["pages"] += 1
+        total["seconds"] += row["seconds"]
+        total["kb"] += row["kb"]
+
+    print()
+    for profile, total in totals.items():
+        print(f"📊 {profile}: avg {total['seconds'] / total['pages']:.2f}s, "
+              f"avg {total['kb'] / total['pages']:.0f} KB over {total['pages']} page loads")
+    full, lean = totals.get(browser_pool.FULL), totals.get(browser_pool.LEAN)
+    if full and lean and full["seconds"] and full["kb"]:
+        time_saved = 1 - (lean["seconds"] / lean["pages"]) / (full["seconds"] / full["pages"])
+        bytes_saved = 1 - (lean["kb"] / lean["pages"]) / (full["kb"] / full["pages"])
+        print(f"⚡ lean vs full: {time_saved:.0%} less time, {bytes_saved:.0%} fewer bytes per page")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the full and lean browser profiles.")
+    parser.add_argument("urls", nargs="*", default=SAMPLE_URLS)
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--output", default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    browser_pool.configure(size=1, warm=False)
+    rows = []
+    try:
+        for run in range(1, args.runs + 1):
+            for url in args.urls:
+                for profile in browser_pool.PROFILES:
+                    print(f"🔎 [{profile}] run {run}: {url}")
+                    rows.append(measure(url, profile, run))
+    finally:
+        browser_pool.shutdown()
+
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    summarize(rows)
+    print(f"📁 Measurements saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# rate_limiter.py
+"""Adaptive per-domain request pacing shared by the HTTP and browser tiers.
+
+Every domain gets a token bucket whose refill rate follows AIMD: each
+healthy response (fast, not throttled) adds ``INCREASE_STEP`` requests per
+second, while a 429/503, a challenge page or a network error multiplies
+the rate by ``DECREASE_FACTOR``.  Decreases are applied at most once per
+``DECREASE_HOLD`` seconds, so a burst of concurrent 429s counts as one
+signal.  A ``Retry-After`` header pauses the domain for that long.
+
+Latency is compared against a per-domain, per-tier moving baseline; a
+response much slower than usual holds the rate instead of raising it.
+"""
+import threading
+import time
+
+# ---------------- CONFIG ----------------
+INITIAL_RATE = 1.0        # requests per second a new domain starts at
+MIN_RATE = 0.1
+MAX_RATE = 8.0
+BURST = 2                 # tokens a domain can bank while idle
+INCREASE_STEP = 0.1       # additive increase per healthy response
+DECREASE_FACTOR = 0.5     # multiplicative decrease on a throttle signal
+DECREASE_HOLD = 5.0       # seconds between two decreases of the same domain
+SLOW_FACTOR = 2.0         # latency above baseline * this is "congested"
+MAX_RETRY_AFTER = 120     # cap on honoured Retry-After pauses (seconds)
+# ----------------------------------------
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def _retry_after_seconds(value):
+    try:
+        return min(float(value), MAX_RETRY_AFTER)
+    except (TypeError, ValueError):
+        return None
+
+
+class DomainLimiter:
+    """Token bucket with an AIMD-controlled refill rate for one domain."""
+
+    def __init__(self, domain, rate=INITIAL_RATE):
+        self.domain = domain
+        self.rate = rate
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.baseline = {}    # tier -> EWMA latency
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0, "waited": 0.0}
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(BURST, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until this domain may send another request."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.stats["requests"] += 1
+                    self.stats["waited"] += waited
+                    return waited
+                delay = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def success(self, latency, tier="http"):
+        with self._lock:
+            baseline = self.baseline.get(tier)
+            self.baseline[tier] = latency if baseline is None else 0.8 * baseline + 0.2 * latency
+            if baseline is not None and latency > baseline * SLOW_FACTOR:
+                return  # slower than usual: hold the current rate
+            self.rate = min(MAX_RATE, self.rate + INCREASE_STEP)
+
+    def throttled(self, retry_after=None, error=False):
+        with self._lock:
+            now = time.monotonic()
+            self.stats["errors" if error else "throttled"] += 1
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            if now - self.last_decrease < DECREASE_HOLD:
+                return
+            self.last_decrease = now
+            old = self.rate
+            self.rate = max(MIN_RATE, self.rate * DECREASE_FACTOR)
+            self.tokens = min(self.tokens, 0.0)
+        print(f"🐢 {self.domain}: backing off {old:.2f} → {self.rate:.2f} req/s")
+
+
+class RateLimiter:
+    """Registry of ``DomainLimiter``s keyed by domain."""
+
+    def __init__(self):
+        self._domains = {}
+        self._lock = threading.Lock()
+
+    def domain(self, domain):
+        with self._lock:
+            limiter = self._domains.get(domain)
+            if limiter is None:
+                limiter = self._domains[domain] = DomainLimiter(domain)
+            return limiter
+
+    def acquire(self, domain):
+        return self.domain(domain).acquire()
+
+    def report(self, domain, latency, status=None, headers=None, tier="http"):
+        """Feed one response's outcome back into the domain's rate."""
+        limiter = self.domain(domain)
+        if status in THROTTLE_STATUSES:
+            limiter.throttled(_retry_after_seconds((headers or {}).get("Retry-After")))
+        elif status is not None and status >= 500:
+            limiter.throttled(error=True)
+        else:
+            limiter.success(latency, tier)
+
+    def challenged(self, domain):
+        """A challenge page was served: treat it like a 429."""
+        self.domain(domain).throttled()
+
+    def failed(self, domain):
+        """The request errored or timed out before a response arrived."""
+        self.domain(domain).throttled(error=True)
+
+    def snapshot(self):
+        """Current rate and counters per domain."""
+        with self._lock:
+            limiters = list(self._domains.values())
+        return {l.domain: dict(l.stats, rate=round(l.rate, 2)) for l in limiters}
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """Process-wide ``RateLimiter``."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
@@ -0,0 +1,189 @@
+# readiness.py
+"""Event-driven page readiness for the browser tier.
+
+A strategy is a callable ``wait(driver)`` handed to ``fetcher.fetch`` or
+called right after ``driver.get``.  It polls until the page is usable and
+never waits longer than its hard cap:
+
+* ``selector(css)``   – an element matching the CSS selector is present
+* ``network_idle()``  – ``document.readyState`` is complete and no fetch/XHR
+  has been in flight for ``idle`` seconds (counted by a script that
+  ``browser_pool`` installs over CDP in every new session), falling back to
+  the resource-timing count when the counter is missing
+* ``ready_state()``   – ``document.readyState == "complete"``
+
+Every wait records how long it took and whether it hit the cap.  When a
+strategy is built with ``replaces=<seconds>`` (the fixed sleep it stands
+in for), ``report()`` also prints the seconds saved this run.
+"""
+import threading
+import time
+
+# ---------------- CONFIG ----------------
+HARD_CAP = 10.0          # seconds any strategy may wait
+POLL_INTERVAL = 0.1
+NETWORK_IDLE = 0.5       # quiet seconds that count as "network idle"
+# ----------------------------------------
+
+# Installed with Page.addScriptToEvaluateOnNewDocument; counts in-flight fetch/XHR.
+INFLIGHT_SCRIPT = """
+(() => {
+  if (window.__inflight !== undefined) return;
+  window.__inflight = 0;
+  window.__lastNetwork = Date.now();
+  const done = () => { window.__inflight--; window.__lastNetwork = Date.now(); };
+  const origFetch = window.fetch;
+  if (origFetch) {
+    window.fetch = function () {
+      window.__inflight++; window.__lastNetwork = Date.now();
+      return origFetch.apply(this, arguments).finally(done);
+    };
+  }
+  const origSend = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    window.__inflight++; window.__lastNetwork = Date.now();
+    this.addEventListener('loadend', done, {once: true});
+    return origSend.apply(this, arguments);
+  };
+})();
+"""
+
+_NETWORK_STATE_JS = (
+    "return [document.readyState, window.__inflight === undefined ? -1 : window.__inflight, "
+    "window.__lastNetwork ? Date.now() - window.__lastNetwork : 0, "
+    "performance.getEntriesByType('resource').length];"
+)
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def install(driver):
+    """Register the in-flight request counter for every page this session loads."""
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": INFLIGHT_SCRIPT})
+    except Exception:
+        pass  # network_idle() falls back to resource timing
+
+
+def _record(name, waited, timed_out, replaces):
+    with _stats_lock:
+        entry = _stats.setdefault(name, {"waits": 0, "seconds": 0.0, "timeouts": 0, "saved": 0.0})
+        entry["waits"] += 1
+        entry["seconds"] += waited
+        entry["timeouts"] += int(timed_out)
+        if replaces:
+            entry["saved"] += replaces - waited
+
+
+class Strategy:
+    """Poll a check until it is truthy or ``cap`` seconds have passed.
+
+    ``make_check()`` returns a fresh ``check(driver)`` for every wait, so
+    checks can keep per-wait state.
+    """
+
+    def __init__(self, name, make_check, cap=HARD_CAP, replaces=None):
+        self.name = name
+        self.make_check = make_check
+        self.cap = cap
+        self.replaces = replaces
+
+    def __call__(self, driver):
+        check = self.make_check()
+        started = time.time()
+        timed_out = True
+        while True:
+            try:
+                if check(driver):
+                    timed_out = False
+                    break
+            except Exception:
+                pass  # page mid-navigation; try again
+            if time.time() - started >= self.cap:
+                break
+            time.sleep(POLL_INTERVAL)
+        waited = time.time() - started
+        _record(self.name, waited, timed_out, self.replaces)
+        return waited
+
+    def __repr__(self):
+        return f"Strategy({self.name!r}, cap={self.cap})"
+
+
+def _document_complete(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def ready_state(cap=HARD_CAP, replaces=None):
+    """Wait for ``document.readyState == "complete"``."""
+    return Strategy("readyState", lambda: _document_complete, cap=cap, replaces=replaces)
+
+
+def selector(css, cap=HARD_CAP, settle=None, replaces=None):
+    """Wait for an element matching ``css`` (a comma list matches any of them).
+
+    With ``settle``, a page whose document has been complete for that many
+    seconds without the element counts as ready too (templates where the
+    element is optional), instead of waiting out the cap.
+    """
+    def make_check():
+        complete_since = []
+
+        def present(driver):
+            found, state = driver.execute_script(
+                "return [document.querySelector(arguments[0]) !== null, document.readyState]", css)
+            if found:
+                return True
+            if settle is None or state != "complete":
+                return False
+            if not complete_since:
+                complete_since.append(time.time())
+            return time.time() - complete_since[0] >= settle
+
+        return present
+
+    return Strategy(f"selector {css}", make_check, cap=cap, replaces=replaces)
+
+
+def network_idle(idle=NETWORK_IDLE, cap=HARD_CAP, replaces=None):
+    """Wait until the document is complete and the network has been quiet for ``idle`` seconds."""
+    def make_check():
+        last_count = [None, time.time()]
+
+        def quiet(driver):
+            state, inflight, since_ms, resources = driver.execute_script(_NETWORK_STATE_JS)
+            if state != "complete":
+                return False
+            if inflight >= 0:
+                return inflight == 0 and since_ms >= idle * 1000
+            # no counter on this page: idle once the resource count stops growing
+            now = time.time()
+            if last_count[0] != resources:
+                last_count[:] = [resources, now]
+                return False
+            return now - last_count[1] >= idle
+
+        return quiet
+
+    return Strategy("network idle", make_check, cap=cap, replaces=replaces)
+
+
+def snapshot():
+    with _stats_lock:
+        return {name: dict(entry) for name, entry in _stats.items()}
+
+
+def report():
+    """Print the wait timings recorded in this process."""
+    stats = snapshot()
+    if not stats:
+        return
+    print("⏱️ Page readiness waits:")
+    saved = 0.0
+    for name, entry in stats.items():
+        average = entry["seconds"] / entry["waits"]
+        print(f" - {name}: {entry['waits']} waits, avg {average:.2f}s, {entry['timeouts']} hit the cap")
+        saved += entry["saved"]
+    if saved:
+        print(f"⏱️ Saved {saved:.0f}s compared with the fixed sleeps")
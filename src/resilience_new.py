@@ -1,26 +1,40 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
-from dateutil import parser as dateparser
-import pandas as pd
-import time
-import os
-from datetime import datetime, timedelta
-import requests
-import json
+from datetime import datetime
 import csv
 
+try:
+    from src import crawl_state, dates, deadline, fetcher, html_parser, output_writer, readiness, result_stream, text_extract, url_canon
+except ImportError:
+    import crawl_state
+    import dates
+    import deadline
+    import fetcher
+    import html_parser
+    import output_writer
+    import readiness
+    import result_stream
+    import text_extract
+    import url_canon
+
 # ---------------- CONFIG ----------------
 BASE_SITEMAP_URL = "https://resilience.com/sitemap.xml"
 SCRAPED_OUTPUT_FILE = "C:/Users/AnjaliRani/Documents/resilience_scraped_articles.csv"
 SKIPPED_FILE = "C:/Users/AnjaliRani/Documents/resilience_skipped_urls.txt"
+UNSCRAPED_FILE = "C:/Users/AnjaliRani/Documents/resilience_unscraped_urls.csv"  # entries left at the deadline
+WINDOW_DAYS = 62  # only articles modified/published within this many days
+BROWSER_PROFILE = "lean"  # "lean" blocks images/fonts/trackers; "full" loads pages as-is
 # ----------------------------------------
 
+COLUMNS = ["Site URL", "Title", "Body", "Date"]
+
+ARTICLE_READY = readiness.network_idle(replaces=3)  # replaces a fixed 3s sleep
+
 
 def get_urls_from_sitemap():
     try:
-        response = requests.get(BASE_SITEMAP_URL, timeout=30)
-        response.raise_for_status()
+        response = fetcher.fetch_http(BASE_SITEMAP_URL, timeout=30)  # 304s are served from the disk cache
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}")
     except Exception as e:
         print(f"❌ Failed to fetch sitemap: {e}")
         return []
@@ -46,42 +60,11 @@ def clean_field(text: str) -> str:
     return text
 
 
-def extract_date(soup, sitemap_date=None):
-    """Extract publication/modification date from JSON-LD, meta tags, <time>, or fallback."""
-    date = None
-
-    # --- JSON-LD ---
-    for script in soup.find_all("script", type="application/ld+json"):
-        try:
-            data = json.loads(script.get_text(strip=True))
-            if isinstance(data, dict):
-                date = data.get("dateModified") or data.get("datePublished")
-            elif isinstance(data, list):
-                for entry in data:
-                    if isinstance(entry, dict):
-                        date = entry.get("dateModified") or entry.get("datePublished")
-                        if date:
-                            break
-            if date:
-                break
-        except Exception:
-            continue
-
-    # --- Meta tags ---
-    if not date:
-        meta = (
-            soup.find("meta", attrs={"property": "article:published_time"})
-            or soup.find("meta", attrs={"name": "pubdate"})
-            or soup.find("meta", attrs={"name": "date"})
-        )
-        if meta and meta.get("content"):
-            date = meta["content"]
-
-    # --- <time> tag ---
-    if not date:
-        time_tag = soup.find("time")
-        if time_tag:
-            date = time_tag.get("datetime") or time_tag.get_text(strip=True)
+def extract_date(doc, url, sitemap_date=None):
+    """Publication/modification date from JSON-LD, meta tags, <time>, or the sitemap lastmod."""
+    date = dates.extract_date(doc, fetcher.domain_of(url),
+                              sources=(dates.JSON_LD, dates.META, dates.TIME),
+                              jsonld_keys=("dateModified", "datePublished"))
 
     # --- Fallback to sitemap <lastmod> ---
     if not date and sitemap_date:
@@ -89,58 +72,30 @@ def extract_date(soup, sitemap_date=None):
 
     # --- Normalize to YYYY-MM-DD ---
     if date:
-        try:
-            date_obj = dateparser.parse(date)
-            date = date_obj.strftime("%Y-%m-%d")
-        except Exception:
-            date = str(date)
+        date = dates.to_day(date) or str(date)
 
     return date or "Unknown"
 
 
 def scrape_article_selenium(url, sitemap_date=None):
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('user-agent=Mozilla/5.0')
-
-    driver = webdriver.Chrome(options=chrome_options)
     try:
-        driver.set_page_load_timeout(60)
-        driver.get(url)
-        time.sleep(3)
-
-        soup = BeautifulSoup(driver.page_source, "html.parser")
+        page = fetcher.fetch(url, wait=ARTICLE_READY, page_load_timeout=60, profile=BROWSER_PROFILE)
+        doc = html_parser.parse(page.html)
 
         # Title
-        title = soup.title.string.strip() if soup.title else ""
-        title = clean_field(title)
+        title = clean_field(doc.title())
 
         # Body
-        body_texts = []
-        for tag in ["p", "div", "span", "section", "article", "main"]:
-            for el in soup.find_all(tag):
-                text = el.get_text(separator=" ", strip=True)
-                if text and len(text) > 30:
-                    body_texts.append(text)
-        seen = set()
-        body = "||".join([t for t in body_texts if not (t in seen or seen.add(t))])
-        if not body:
-            body_elem = soup.find("body")
-            body = body_elem.get_text(separator=" ", strip=True) if body_elem else ""
-        body = clean_field(body)
+        body = clean_field(text_extract.extract_body(doc))
 
         # Date (pass sitemap_date as fallback)
-        date = extract_date(soup, sitemap_date)
+        date = extract_date(doc, url, sitemap_date)
         if not date:
             date = datetime.now().strftime("%Y-%m-%d")  # fallback: today
 
-        driver.quit()
         return {"Site URL": url, "Title": title, "Body": body, "Date": date}
 
     except Exception as e:
-        driver.quit()
         print(f"❌ Error scraping {url}: {e}")
         with open(SKIPPED_FILE, "a", encoding="utf-8") as f:
             f.write(f"{url}\t{str(e)}\n")
@@ -151,61 +106,91 @@ def scrape_article_selenium(url, sitemap_date=None):
             "Date": sitemap_date or datetime.now().strftime("%Y-%m-%d"),
         }
 
-def main():
-    print("🚀 Starting Resilience Scraper...")
+def reset_outputs():
+    """Remove the previous run's output file."""
+    output_writer.remove(SCRAPED_OUTPUT_FILE)
+
 
-    if os.path.exists(SCRAPED_OUTPUT_FILE):
-        os.remove(SCRAPED_OUTPUT_FILE)
+def cutoff_date():
+    return dates.cutoff(WINDOW_DAYS)
 
-    today = datetime.now()
-    two_months_ago = today - timedelta(days=62)
-    columns = ["Site URL", "Title", "Body", "Date"]
 
+def discover_articles():
+    """Sitemap entries inside the scrape window ({"URL", "LastMod", "Group"})."""
     url_entries = get_urls_from_sitemap()
     print(f"🔎 Found {len(url_entries)} URLs in sitemap")
 
-    for idx, entry in enumerate(url_entries, 1):
-        url = entry["URL"]
+    two_months_ago = cutoff_date()
+    recent = []
+    for entry in url_entries:
         lastmod = entry.get("LastMod", "")
 
         # Skip old articles based on sitemap <lastmod>
-        skip_article = False
-        if lastmod:
-            try:
-                article_date = dateparser.parse(lastmod)
-                if article_date < two_months_ago:
-                    skip_article = True
-            except Exception:
-                pass
-
-        if skip_article:
-            print(f"⏭️ Skipping old article → {url}")
+        if dates.is_older(lastmod, two_months_ago):
+            continue
+        recent.append({"URL": entry["URL"], "LastMod": lastmod, "Group": BASE_SITEMAP_URL})
+    print(f"⏭️ Skipping {len(url_entries) - len(recent)} old articles")
+    return recent
+
+
+def scrape_entry(entry):
+    """Scrape one sitemap entry; None when the scraped date is older than the window."""
+    result = scrape_article_selenium(entry["URL"], entry["LastMod"])
+
+    # Skip if scraped date is older than 2 months
+    if dates.is_older(result["Date"], cutoff_date()):
+        return None
+    return result
+
+
+def save_result(result):
+    """Queue one scraped article for the output CSV (written in batches by ``output_writer``)."""
+    output_writer.get_writer(SCRAPED_OUTPUT_FILE, COLUMNS, quoting=csv.QUOTE_ALL).write(result)
+
+
+def main():
+    print("🚀 Starting Resilience Scraper...")
+
+    reset_outputs()
+    url_entries = discover_articles()
+
+    state = crawl_state.get_state()
+    unchanged = 0
+
+    plan = deadline.WorkPlan(url_entries, name="resilience")  # newest first, only what fits the deadline
+    for idx, entry in enumerate(plan, 1):
+        url = entry["URL"]
+        lastmod = entry["LastMod"]
+
+        if state.is_unchanged(url, lastmod):
+            unchanged += 1
+            continue
+        if not url_canon.claim(url):  # already fetched this run (another sitemap, a URL variant)
             continue
 
         print(f"[{idx}/{len(url_entries)}] Scraping: {url}")
-        result = scrape_article_selenium(url, lastmod)
-
-        # Skip if scraped date is older than 2 months
-        if result["Date"] and result["Date"] != "Unknown":
-            try:
-                sd = datetime.strptime(result["Date"], "%Y-%m-%d")
-                if sd < two_months_ago:
-                    print(f"⏭️ Skipping old article (scraped date) → {url}")
-                    continue
-            except Exception:
-                pass
-
-        # Write CSV with fixed columns
-        df_row = pd.DataFrame([result], columns=columns)
-        if not os.path.exists(SCRAPED_OUTPUT_FILE):
-            df_row.to_csv(SCRAPED_OUTPUT_FILE, index=False, mode="w", quoting=csv.QUOTE_ALL)
-        else:
-            df_row.to_csv(SCRAPED_OUTPUT_FILE, index=False, mode="a", header=False, quoting=csv.QUOTE_ALL)
+        with plan.measure(entry):
+            result = scrape_entry(entry)
+        if result is None:
+            print(f"⏭️ Skipping old article (scraped date) → {url}")
+            state.record(url, site=fetcher.domain_of(url), lastmod=lastmod)
+            continue
+
+        save_result(result)
+        result_stream.emit(result)
+        if result["Body"]:
+            state.record(url, site=fetcher.domain_of(url), lastmod=lastmod,
+                         content=(result["Title"], result["Body"], result["Date"]))
 
         print(
             f"    → Done: Title length={len(result['Title'])}, Body length={len(result['Body'])}, Date={result['Date']}"
         )
 
+    print(f"⏭️ Skipped {unchanged} articles unchanged since the last run")
+    readiness.report()
+    url_canon.report()
+    plan.report(UNSCRAPED_FILE)
+    output_writer.close(SCRAPED_OUTPUT_FILE)
     print(f"✅ Scraping complete. Articles saved to {SCRAPED_OUTPUT_FILE}")
 
 
@@ -0,0 +1,30 @@
+# result_stream.py
+"""Per-row result channel from a scraper to the process supervising it.
+
+``driver.py`` runs every scraper in a child process and attaches a
+multiprocessing queue here; scrapers call ``emit(record)`` after each row
+they write so the supervisor still holds the rows if it has to kill the
+child on timeout.  Without a supervisor (a scraper run on its own)
+``emit`` does nothing.
+"""
+_queue = None
+_source = None
+
+
+def attach(queue, source):
+    """Route subsequent ``emit`` calls to ``queue`` tagged with ``source``."""
+    global _queue, _source
+    _queue = queue
+    _source = source
+
+
+def emit(record):
+    """Send one scraped record to the supervisor, if there is one."""
+    if _queue is not None:
+        _queue.put(("row", _source, dict(record)))
+
+
+def send(kind, *payload):
+    """Send a control message (status, error) to the supervisor."""
+    if _queue is not None:
+        _queue.put((kind, _source) + payload)
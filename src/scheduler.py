@@ -0,0 +1,224 @@
+# scheduler.py
+"""Run-wide URL scheduler shared by all site scrapers.
+
+Instead of one serial URL loop per site, every site module's
+``discover_articles()`` feeds one queue.  URLs are de-duplicated across
+sites, ordered newest-first, and handed to a fixed set of workers; any
+free worker takes the best job whose domain is under its concurrency cap,
+so a slow site no longer finishes long after the others have gone idle.
+
+Under a deadline (see ``deadline``) a job only starts while its domain's
+estimated cost per article fits the time left, so the newest articles of
+the faster sites fill the end of the budget; the URLs left over are
+listed and written to ``UNSCRAPED_FILE``.
+
+A site module plugs in by providing ``reset_outputs()``,
+``discover_articles()`` (entries with "URL", "LastMod" and "Group"),
+``scrape_entry(entry)`` (a record, or None when the article is outside the
+window) and ``save_result(record)``.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from src import browser_extract, browser_pool, crawl_state, dates, deadline, fetcher, output_writer, rate_limiter, readiness, result_stream, url_canon
+except ImportError:
+    import browser_extract
+    import browser_pool
+    import crawl_state
+    import dates
+    import deadline
+    import fetcher
+    import output_writer
+    import rate_limiter
+    import readiness
+    import result_stream
+    import url_canon
+
+# ---------------- CONFIG ----------------
+WORKERS = 8              # URLs scraped concurrently across all sites
+PER_DOMAIN_LIMIT = 2     # concurrent URLs per domain
+UNSCRAPED_FILE = "unscraped_urls.csv"  # URLs left when the run's deadline is reached
+# ----------------------------------------
+
+
+class Job:
+    __slots__ = ("site", "entry", "domain", "sort_key")
+
+    def __init__(self, site, entry):
+        self.site = site
+        self.entry = entry
+        self.domain = fetcher.domain_of(entry["URL"])
+        published = dates.parse_date(entry.get("LastMod"))
+        self.sort_key = published.timestamp() if published else 0.0  # undated last
+
+
+class UrlScheduler:
+    """Priority queue of article URLs with per-domain concurrency caps."""
+
+    def __init__(self, workers=WORKERS, per_domain=PER_DOMAIN_LIMIT):
+        self.workers = workers
+        self.per_domain = per_domain
+        self._queues = {}      # domain -> deque of jobs, newest first
+        self._active = {}      # domain -> jobs in flight
+        self._cond = threading.Condition()
+        self._write_locks = {}
+        self.costs = deadline.get_costs()
+        self.left = []         # jobs not started before the deadline
+        self.stats = {"queued": 0, "duplicates": 0, "unchanged": 0, "old": 0, "scraped": 0, "failed": 0,
+                      "unscraped": 0}
+
+    def add(self, site, entry):
+        """Queue one sitemap entry; returns False for a URL already queued this run."""
+        url = entry["URL"]
+        if not url_canon.claim(url):  # also catches tracking-param and trailing-slash variants
+            self.stats["duplicates"] += 1
+            return False
+        job = Job(site, entry)
+        self._queues.setdefault(job.domain, []).append(job)
+        self._write_locks.setdefault(site.__name__, threading.Lock())
+        self.stats["queued"] += 1
+        return True
+
+    def _prepare(self):
+        for domain, jobs in self._queues.items():
+            jobs.sort(key=lambda job: job.sort_key, reverse=True)
+            self._queues[domain] = deque(jobs)
+            self._active.setdefault(domain, 0)
+
+    def _next_job(self):
+        """Best queued job on a domain with spare capacity; None once all work is handed out."""
+        with self._cond:
+            while True:
+                best = None
+                for domain, jobs in self._queues.items():
+                    if jobs and not deadline.fits(jobs[0].entry["URL"], self.costs):
+                        # the domain's estimated cost no longer fits the time left; faster domains go on
+                        self.left.extend(jobs)
+                        jobs.clear()
+                    if jobs and self._active[domain] < self.per_domain:
+                        if best is None or jobs[0].sort_key > best[0].sort_key:
+                            best = jobs
+                if best is not None:
+                    job = best.popleft()
+                    self._active[job.domain] += 1
+                    return job
+                if not any(self._queues.values()):
+                    return None
+                self._cond.wait()
+
+    def _finish(self, job):
+        with self._cond:
+            self._active[job.domain] -= 1
+            self._cond.notify_all()
+
+    def _count(self, key):
+        with self._cond:
+            self.stats[key] += 1
+
+    def _run_job(self, job, state):
+        url = job.entry["URL"]
+        lastmod = job.entry.get("LastMod")
+        if state.is_unchanged(url, lastmod):
+            self._count("unchanged")
+            return
+        print(f"[{job.domain}] Scraping: {url}")
+        started = time.time()
+        result = job.site.scrape_entry(job.entry)
+        self.costs.observe(url, time.time() - started)
+        if result is None:
+            self._count("old")
+            state.record(url, site=job.domain, lastmod=lastmod)
+            return
+        with self._write_locks[job.site.__name__]:
+            job.site.save_result(result)
+        result_stream.emit(result)
+        if result["Body"]:
+            self._count("scraped")
+            state.record(url, site=job.domain, lastmod=lastmod,
+                         content=(result["Title"], result["Body"], result["Date"]))
+        else:
+            self._count("failed")
+
+    def _worker(self, state):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                self._run_job(job, state)
+            except Exception as e:
+                self._count("failed")
+                print(f"❌ Error scraping {job.entry['URL']}: {e}")
+            finally:
+                self._finish(job)
+
+    def run(self):
+        """Scrape every queued URL; returns the run statistics."""
+        self._prepare()
+        state = crawl_state.get_state()
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for _ in range(self.workers):
+                executor.submit(self._worker, state)
+        self.stats["seconds"] = round(time.time() - started, 1)
+        self.stats["unscraped"] = len(self.left)
+        return self.stats
+
+    def report_unscraped(self, path=UNSCRAPED_FILE):
+        """Print and write the URLs the deadline left unscraped, newest first."""
+        if not self.left:
+            return
+        self.left.sort(key=lambda job: job.sort_key, reverse=True)
+        print(f"⏱️ {len(self.left)} URLs did not fit before the deadline")
+        for job in self.left[:5]:
+            print(f"   - [{job.domain}] {job.entry.get('LastMod') or 'undated':25} {job.entry['URL']}")
+        deadline.write_unscraped(path, [job.entry for job in self.left], self.costs)
+
+
+def discover_all(sites):
+    """Run every site's discovery concurrently; returns [(site, entries)]."""
+    def discover(site):
+        try:
+            return site, list(site.discover_articles())
+        except Exception as e:
+            print(f"❌ Discovery failed for {site.__name__}: {e}")
+            return site, []
+
+    with ThreadPoolExecutor(max_workers=len(sites)) as executor:
+        return list(executor.map(discover, sites))
+
+
+def run(sites, workers=WORKERS, per_domain=PER_DOMAIN_LIMIT):
+    """Discover, de-duplicate and scrape the articles of ``sites`` in one shared queue."""
+    browser_pool.configure(size=workers)
+    for site in sites:
+        site.reset_outputs()
+
+    scheduler = UrlScheduler(workers=workers, per_domain=per_domain)
+    for site, entries in discover_all(sites):
+        added = sum(scheduler.add(site, entry) for entry in entries)
+        print(f"🗂️ {site.__name__}: {added} URLs queued")
+
+    stats = scheduler.run()
+    output_writer.close_all()
+    scheduler.report_unscraped()
+    print(f"🎯 Scheduler finished: {stats}")
+    for domain, pacing in rate_limiter.get_limiter().snapshot().items():
+        print(f" - {domain}: {pacing}")
+    readiness.report()
+    browser_extract.report()
+    url_canon.report()
+    return stats
+
+
+def main():
+    from src import driver  # the site list lives with the driver
+
+    run(driver.SCRAPERS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+# search_index.py
+"""SQLite FTS5 full-text index over the scraped articles.
+
+Articles are indexed by canonical URL; re-indexing an article whose title,
+body and date are unchanged is skipped, a changed one replaces its entry.
+Sources are read incrementally:
+
+* CSV outputs (``historical_articles.csv``, per-site ``*_scraped_articles.csv``)
+  – only the bytes appended since the last run are parsed
+* Parquet outputs (``*.parquet/`` datasets) – only part files not seen before
+* the keyword crawlers' history update, which passes its new and changed rows
+  straight to ``index_records()``
+
+Queries use FTS5 syntax: words (all must match), ``"phrase search"``,
+``prefix*``, ``OR``/``NOT``.  Results are ranked by BM25 (title weighted
+above body) and come with a highlighted snippet:
+
+    python -m src.search_index --add src/historical_articles.csv
+    python -m src.search_index '"cell therapy" pfizer*' --site www.fiercepharma.com --days 30
+"""
+import argparse
+import csv
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+try:
+    from src import article_store, crawl_state, dates, history_store, url_canon
+except ImportError:
+    import article_store
+    import crawl_state
+    import dates
+    import history_store
+    import url_canon
+
+# ---------------- CONFIG ----------------
+INDEX_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_index.db")
+TITLE_WEIGHT = 5.0     # bm25 weight of a title hit relative to a body hit
+SNIPPET_TOKENS = 16
+RESULT_LIMIT = 20
+IDENTITY_BYTES = 4096  # bytes at the start of a CSV and before its offset that identify it
+# ----------------------------------------
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS docs (
+        id            INTEGER PRIMARY KEY,
+        url_key       TEXT UNIQUE,
+        url           TEXT,
+        site          TEXT,
+        day           TEXT,
+        content_hash  TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS docs_site_day ON docs (site, day)",
+    "CREATE INDEX IF NOT EXISTS docs_day ON docs (day)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(title, body, tokenize='porter unicode61')",
+    """CREATE TABLE IF NOT EXISTS sources (
+        path      TEXT PRIMARY KEY,
+        offset    INTEGER,
+        identity  TEXT
+    )""",
+)
+ADDED_COLUMNS = {"identity": "TEXT"}  # sources columns missing from indexes made before them
+
+
+def file_identity(path, end, head_length=IDENTITY_BYTES):
+    """Hash of the first bytes of ``path`` and of the bytes before ``end``.
+
+    It stays the same while the file is only appended to, and changes when
+    the file is recreated (every run rewrites the per-site CSVs).
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        head = f.read(head_length)
+        digest.update(head)
+        f.seek(max(end - IDENTITY_BYTES, 0))
+        digest.update(f.read(min(end, IDENTITY_BYTES)))
+    return f"{len(head)}:{digest.hexdigest()}"
+
+
+class SearchIndex:
+    """Thread-safe wrapper around the FTS5 index."""
+
+    def __init__(self, path=INDEX_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(sources)")}
+        for column, kind in ADDED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE sources ADD COLUMN {column} {kind}")
+        self._conn.commit()
+
+    def index_records(self, records):
+        """Add or replace ``records`` (dicts with url/title/body/date); returns how many were written."""
+        written = 0
+        with self._lock, self._conn:
+            for record in records:
+                key = url_canon.canonical_url(record["url"])
+                digest = crawl_state.content_hash(record.get("title"), record.get("body"), record.get("date"))
+                row = self._conn.execute("SELECT id, content_hash FROM docs WHERE url_key = ?", (key,)).fetchone()
+                if row and row[1] == digest:
+                    continue
+                values = (record["url"], history_store.site_of(key), dates.to_day(record.get("date")) or "", digest)
+                if row:
+                    doc_id = row[0]
+                    self._conn.execute("UPDATE docs SET url = ?, site = ?, day = ?, content_hash = ? WHERE id = ?",
+                                       (*values, doc_id))
+                    self._conn.execute("DELETE FROM articles_fts WHERE rowid = ?", (doc_id,))
+                else:
+                    doc_id = self._conn.execute(
+                        "INSERT INTO docs (url_key, url, site, day, content_hash) VALUES (?, ?, ?, ?, ?)",
+                        (key, *values)).lastrowid
+                self._conn.execute("INSERT INTO articles_fts (rowid, title, body) VALUES (?, ?, ?)",
+                                   (doc_id, record.get("title") or "", record.get("body") or ""))
+                written += 1
+        return written
+
+    def _offset(self, path, check_identity=False):
+        """Bytes of ``path`` already indexed; 0 when the file there is no longer the one indexed."""
+        row = self._conn.execute("SELECT offset, identity FROM sources WHERE path = ?", (path,)).fetchone()
+        if not row:
+            return 0
+        offset, known = row
+        if check_identity:
+            if offset > os.path.getsize(path):
+                return 0  # replaced by a shorter file
+            if known is not None and file_identity(path, offset, int(known.split(":", 1)[0])) != known:
+                return 0  # recreated (e.g. a new run's per-site CSV): start over
+        return offset
+
+    def _set_offset(self, path, offset, identity=None):
+        with self._conn:
+            self._conn.execute("INSERT INTO sources (path, offset, identity) VALUES (?, ?, ?) "
+                               "ON CONFLICT(path) DO UPDATE SET offset = excluded.offset, "
+                               "identity = excluded.identity", (path, offset, identity))
+
+    def add_csv(self, path):
+        """Index the rows appended to the CSV at ``path`` since it was last indexed."""
+        path = os.path.abspath(path)
+        with self._lock:
+            offset = self._offset(path, check_identity=True)
+        with open(path, "rb") as f:
+            header_line = f.readline()
+            if not header_line:
+                return 0
+            f.seek(max(offset, f.tell()))
+            appended = f.read()
+            end = f.tell()
+        header = next(csv.reader(io.StringIO(header_line.decode("utf-8"))))
+        rows = list(csv.reader(io.StringIO(appended.decode("utf-8"), newline="")))
+        written = self.index_records(history_store.records_from_rows(header, rows))
+        with self._lock:
+            self._set_offset(path, end, file_identity(path, end))
+        return written
+
+    def add_parquet(self, path):
+        """Index the part files of a Parquet output that were not indexed before."""
+        article_store.require_pyarrow()
+        written = 0
+        for part in article_store.partition_files(path):
+            part = os.path.abspath(part)
+            with self._lock:
+                if self._offset(part):
+                    continue
+            table = article_store.ds.dataset(part, format="parquet").to_table()
+            header = [c for c in table.column_names if c not in article_store.DERIVED_COLUMNS]
+            rows = [list(r) for r in zip(*(table.column(c).to_pylist() for c in header))]
+            written += self.index_records(history_store.records_from_rows(header, rows))
+            with self._lock:
+                self._set_offset(part, os.path.getsize(part))
+        return written
+
+    def add(self, path):
+        """Index new rows of a CSV output or a Parquet output directory."""
+        if os.path.isdir(path) or path.endswith(".parquet"):
+            return self.add_parquet(path)
+        return self.add_csv(path)
+
+    def search(self, query, site=None, since=None, until=None, limit=RESULT_LIMIT):
+        """Ranked matches for the FTS5 ``query`` as dicts (url, site, date, title, snippet, score)."""
+        sql = ("SELECT d.url, d.site, d.day, articles_fts.title, "
+               f"snippet(articles_fts, 1, '[', ']', '…', {SNIPPET_TOKENS}), "
+               f"bm25(articles_fts, {TITLE_WEIGHT}, 1.0) AS score "
+               "FROM articles_fts JOIN docs d ON d.id = articles_fts.rowid WHERE articles_fts MATCH ?")
+        params = [query]
+        if site:
+            sites = [site] if isinstance(site, str) else list(site)
+            sql += f" AND d.site IN ({','.join('?' * len(sites))})"
+            params += sites
+        if since:
+            sql += " AND d.day >= ?"
+            params.append(dates.to_day(since) if not isinstance(since, datetime) else since.strftime("%Y-%m-%d"))
+        if until:
+            sql += " AND d.day != '' AND d.day < ?"
+            params.append(dates.to_day(until) if not isinstance(until, datetime) else until.strftime("%Y-%m-%d"))
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        keys = ("url", "site", "date", "title", "snippet", "score")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def optimize(self):
+        """Merge the FTS5 b-tree segments (worth running after large loads)."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index(path=INDEX_DB):
+    """Process-wide ``SearchIndex``."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex(path)
+        return _index
+
+
+def index_records(records):
+    """Index ``records`` in the default index; never fails the caller's run."""
+    try:
+        return get_index().index_records(records)
+    except sqlite3.Error as e:
+        print(f"⚠️ Search index update failed: {e}")
+        return 0
+
+
+def search(query, site=None, since=None, until=None, limit=RESULT_LIMIT):
+    return get_index().search(query, site=site, since=since, until=until, limit=limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search over the scraped articles.")
+    parser.add_argument("query", nargs="?", help='FTS5 query: words, "a phrase", prefix*, OR, NOT')
+    parser.add_argument("--add", action="append", default=[], metavar="PATH",
+                        help="index new rows of a CSV output or Parquet dataset first (repeatable)")
+    parser.add_argument("--site", action="append", help="only this site (repeatable)")
+    parser.add_argument("--days", type=int, help="only articles dated in the last N days")
+    parser.add_argument("--since", help="only articles dated on/after this date")
+    parser.add_argument("--until", help="only articles dated before this date")
+    parser.add_argument("--limit", type=int, default=RESULT_LIMIT)
+    parser.add_argument("--index", default=INDEX_DB, help="index database")
+    args = parser.parse_args()
+
+    index = get_index(args.index)
+    for path in args.add:
+        started = time.perf_counter()
+        written = index.add(path)
+        print(f"📥 {path}: {written} articles indexed in {time.perf_counter() - started:.1f}s")
+    if args.add:
+        index.optimize()
+    if not args.query:
+        print(f"🗂 {index.count()} articles in {index.path}")
+        return
+
+    since = args.since
+    if args.days:
+        since = datetime.now() - timedelta(days=args.days)
+    started = time.perf_counter()
+    try:
+        results = index.search(args.query, site=args.site, since=since, until=args.until, limit=args.limit)
+    except sqlite3.OperationalError as e:
+        print(f"❌ Bad query {args.query!r}: {e}")
+        return
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"🔎 {len(results)} results in {elapsed:.1f} ms")
+    for result in results:
+        print(f"\n[{result['site']}] {result['date'] or 'undated'}  {result['title']}")
+        print(f"  {result['url']}")
+        print(f"  {result['snippet']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# sitemap_crawler.py
+"""Concurrent sitemap discovery.
+
+``crawl_sitemaps()`` downloads a sitemap index and every child sitemap it
+lists concurrently (bounded per host) and returns one merged list of
+``SitemapEntry(url, lastmod, sitemap)``.  Sitemaps are streamed through
+``sitemap_reader`` on the pooled, disk-cached HTTP session from ``fetcher``,
+so entries are emitted while the body is still arriving and an unchanged
+sitemap is answered by a 304; a sitemap that is blocked over HTTP is
+rendered in a pooled browser instead.
+"""
+import asyncio
+import re
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+try:
+    from src import fetcher, sitemap_reader
+except ImportError:
+    import fetcher
+    import sitemap_reader
+
+# ---------------- CONFIG ----------------
+PER_HOST_LIMIT = 4      # concurrent sitemap downloads per host
+MAX_DEPTH = 3           # nested sitemap indexes followed
+# ----------------------------------------
+
+SitemapEntry = namedtuple("SitemapEntry", ["url", "lastmod", "sitemap"])
+
+_LOC_BLOCK_RE = re.compile(r"<(url|sitemap)\b[^>]*>(.*?)</\1>", re.I | re.S)
+_LOC_RE = re.compile(r"<loc>\s*(.*?)\s*</loc>", re.I | re.S)
+_LASTMOD_RE = re.compile(r"<lastmod>\s*(.*?)\s*</lastmod>", re.I | re.S)
+
+
+def parse_sitemap(text):
+    """Return ``(child_sitemaps, urls)`` for a sitemap page rendered by the browser.
+
+    The browser hands back either XML wrapped in its viewer markup or, for
+    XSL-styled sitemaps, an HTML table, so this scans ``<loc>`` blocks with a
+    regex and falls back to the table.  HTTP downloads use the streaming
+    reader instead.
+    """
+    children, urls = [], []
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", errors="replace")
+    for kind, block in _LOC_BLOCK_RE.findall(text):
+        loc = _LOC_RE.search(block)
+        lastmod = _LASTMOD_RE.search(block)
+        if loc:
+            (children if kind.lower() == "sitemap" else urls).append(
+                (loc.group(1), lastmod.group(1) if lastmod else None))
+    if children or urls:
+        return children, urls
+
+    # XSL-styled sitemap rendered as an HTML table: URL | images | last modified
+    table = BeautifulSoup(text, "html.parser").find("table")
+    if table:
+        for row in table.find_all("tr")[1:]:
+            cols = row.find_all("td")
+            if not cols:
+                continue
+            link = cols[0].get_text(strip=True)
+            lastmod = cols[-1].get_text(strip=True) if len(cols) > 1 else None
+            if link:
+                (children if link.lower().endswith(".xml") else urls).append((link, lastmod))
+    return children, urls
+
+
+def read_sitemap(url, emit, cutoff=None, stop_on_old=False):
+    """Stream one sitemap, calling ``emit(loc, lastmod)`` per URL entry.
+
+    Returns the child sitemaps it lists.  Falls back to rendering the
+    sitemap in the browser when HTTP is blocked or the body is not XML; a
+    fallback after a partial stream only emits the entries not emitted yet.
+    """
+    children = []
+    emitted = set()
+    try:
+        with fetcher.open_http(url) as response:
+            if response.status_code < 400:
+                chunks = response.iter_content(sitemap_reader.CHUNK_SIZE)
+                for item in sitemap_reader.iter_sitemap(chunks, cutoff=cutoff, stop_on_old=stop_on_old):
+                    if item.kind == "sitemap":
+                        children.append((item.loc, item.lastmod))
+                    else:
+                        emit(item.loc, item.lastmod)
+                        emitted.add(item.loc)
+                return children
+            reason = f"HTTP {response.status_code}"
+    except ET.ParseError as e:
+        if children or emitted:
+            print(f"⚠️ Sitemap {url} is truncated or malformed after {len(emitted)} entries: {e}")
+            return children
+        reason = "not XML"
+    except Exception as e:
+        reason = e.__class__.__name__
+        if emitted:
+            reason += f" after {len(emitted)} entries"
+
+    print(f"🔁 Sitemap {url}: {reason} → rendering in the browser")
+    rendered, urls = parse_sitemap(fetcher.fetch_browser(url).html)
+    children += [child for child in rendered if child not in children]
+    for loc, lastmod in urls:
+        if loc not in emitted:
+            emit(loc, lastmod)
+    return children
+
+
+class SitemapCrawler:
+    """Fetches a sitemap tree with a per-host concurrency limit."""
+
+    def __init__(self, cutoff=None, per_host=PER_HOST_LIMIT, child_filter=None, max_depth=MAX_DEPTH,
+                 stop_on_old=False):
+        self.cutoff = cutoff
+        self.stop_on_old = stop_on_old
+        self.per_host = per_host
+        self.child_filter = child_filter
+        self.max_depth = max_depth
+        self._host_limits = {}
+        self._seen = set()
+        self.fetched = 0
+
+    def _limit(self, url):
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def _crawl(self, url, depth, out):
+        loop = asyncio.get_running_loop()
+
+        def emit(loc, lastmod):
+            # called from the download thread while the sitemap is still streaming
+            if sitemap_reader.is_recent(lastmod, self.cutoff):
+                loop.call_soon_threadsafe(out.put_nowait, SitemapEntry(loc, lastmod, url))
+
+        try:
+            async with self._limit(url):
+                children = await loop.run_in_executor(
+                    None, read_sitemap, url, emit, self.cutoff, self.stop_on_old)
+                self.fetched += 1
+        except Exception as e:
+            print(f"❌ Error fetching sitemap {url}: {e}")
+            return
+
+        if depth >= self.max_depth:
+            return
+        tasks = []
+        for loc, lastmod in children:
+            if loc in self._seen or not sitemap_reader.is_recent(lastmod, self.cutoff):
+                continue
+            if self.child_filter and not self.child_filter(loc):
+                continue
+            self._seen.add(loc)
+            tasks.append(self._crawl(loc, depth + 1, out))
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def iter_entries(self, index_url):
+        """Async generator over entries as they are parsed out of the sitemaps."""
+        out = asyncio.Queue()
+        self._seen.add(index_url)
+        crawl = asyncio.ensure_future(self._crawl(index_url, 0, out))
+        while not (crawl.done() and out.empty()):
+            getter = asyncio.ensure_future(out.get())
+            await asyncio.wait({getter, crawl}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+        crawl.result()
+
+
+def crawl_sitemaps(index_url, cutoff=None, per_host=PER_HOST_LIMIT, child_filter=None, stop_on_old=False,
+                   max_workers=16):
+    """Blocking wrapper: every entry in the sitemap tree under ``index_url``.
+
+    ``cutoff`` drops child sitemaps and URLs whose ``lastmod`` is older;
+    with ``stop_on_old`` a child sitemap stops downloading at its first old
+    URL (newest-first sitemaps).  ``child_filter(url)`` can restrict which
+    child sitemaps are followed.
+    """
+    crawler = SitemapCrawler(cutoff=cutoff, per_host=per_host, child_filter=child_filter,
+                             stop_on_old=stop_on_old)
+
+    async def collect():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=max_workers))
+        return [entry async for entry in crawler.iter_entries(index_url)]
+
+    entries = asyncio.run(collect())
+    print(f"🗺️ {index_url}: {len(entries)} URLs from {crawler.fetched} sitemaps")
+    return entries
@@ -0,0 +1,100 @@
+# sitemap_reader.py
+"""Incremental sitemap parser.
+
+``iter_sitemap()`` is fed raw byte chunks (e.g. ``response.iter_content()``)
+and yields one ``SitemapItem`` per ``<url>``/``<sitemap>`` block as soon as
+the block has arrived.  Gzipped sitemaps (``.xml.gz``) are inflated on the
+fly, finished blocks are dropped from the tree so memory stays flat, and
+reading can stop at the first entry older than a lastmod cutoff.
+"""
+import xml.etree.ElementTree as ET
+import zlib
+from collections import namedtuple
+
+try:
+    from src import dates
+except ImportError:
+    import dates
+
+CHUNK_SIZE = 64 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+
+SitemapItem = namedtuple("SitemapItem", ["kind", "loc", "lastmod"])  # kind: "url" or "sitemap"
+
+def is_recent(lastmod, cutoff):
+    """True when ``lastmod`` is missing, unparseable or not older than ``cutoff``."""
+    if not cutoff or not lastmod:
+        return True
+    return dates.is_recent(lastmod, cutoff)
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1].lower() if isinstance(tag, str) else ""
+
+
+def _inflate(chunks):
+    """Pass chunks through, gunzipping them if the stream starts with the gzip magic."""
+    inflater = None
+    first = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if first:
+            first = False
+            if chunk[:2] == GZIP_MAGIC:
+                inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if inflater is None:
+            yield chunk
+        else:
+            data = inflater.decompress(chunk)
+            if data:
+                yield data
+    if inflater is not None:
+        tail = inflater.flush()
+        if tail:
+            yield tail
+
+
+def iter_sitemap(chunks, cutoff=None, stop_on_old=False):
+    """Yield ``SitemapItem``s from an iterable of byte chunks.
+
+    With ``stop_on_old`` the reader stops at the first ``<url>`` whose lastmod
+    is older than ``cutoff`` (for newest-first sitemaps); the caller should
+    then close the underlying response.  Raises ``ET.ParseError`` on a
+    document that is not XML.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    depth = 0
+    for data in _inflate(chunks):
+        parser.feed(data)
+        for event, elem in parser.read_events():
+            if event == "start":
+                depth += 1
+                if root is None:
+                    root = elem
+                continue
+            depth -= 1
+            kind = _local(elem.tag)
+            if depth != 1 or kind not in ("url", "sitemap"):
+                continue
+            loc = lastmod = None
+            for field in elem:
+                name = _local(field.tag)
+                if name == "loc" and field.text:
+                    loc = field.text.strip()
+                elif name == "lastmod" and field.text:
+                    lastmod = field.text.strip()
+            root.clear()  # finished blocks are not needed any more
+            if not loc:
+                continue
+            if stop_on_old and kind == "url" and not is_recent(lastmod, cutoff):
+                return
+            yield SitemapItem(kind, loc, lastmod)
+    parser.close()
+
+
+def iter_sitemap_file(path, cutoff=None, stop_on_old=False):
+    """``iter_sitemap`` over a local ``.xml`` or ``.xml.gz`` file."""
+    with open(path, "rb") as fh:
+        yield from iter_sitemap(iter(lambda: fh.read(CHUNK_SIZE), b""), cutoff, stop_on_old)
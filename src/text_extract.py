@@ -0,0 +1,111 @@
+# text_extract.py
+"""Single-pass article body extraction.
+
+The DOM is walked once.  Every text node goes to its nearest block-level
+ancestor (``p``, ``div``, ``section``, headings, list items, ...), so
+nested containers never serialise the same text twice.  Each block is then
+scored on its length and link density: navigation menus, tag clouds and
+"related articles" lists are mostly link text and are dropped.  The blocks
+that survive are joined in document order with ``||``, the separator the
+scrapers already use.  The walk comes from ``html_parser``, so any parser
+backend works.
+"""
+import re
+
+try:
+    from src import html_parser
+except ImportError:
+    import html_parser
+
+# ---------------- CONFIG ----------------
+MIN_BLOCK_CHARS = 30        # shorter blocks are treated as junk
+MAX_LINK_DENSITY = 0.5      # blocks whose text is mostly links are navigation
+SEPARATOR = "||"
+# ----------------------------------------
+
+BLOCK_TAGS = frozenset((
+    "p", "div", "section", "article", "main", "aside", "header", "footer", "nav",
+    "h1", "h2", "h3", "h4", "h5", "h6", "li", "ul", "ol", "dl", "dt", "dd",
+    "blockquote", "pre", "figure", "figcaption", "table", "tr", "td", "th", "form", "body",
+))
+SKIP_TAGS = frozenset(("script", "style", "noscript", "template", "svg", "iframe", "button", "select", "head"))
+
+_WS_RE = re.compile(r"\s+")
+
+
+class Block:
+    __slots__ = ("parts", "chars", "link_chars")
+
+    def __init__(self):
+        self.parts = []
+        self.chars = 0
+        self.link_chars = 0
+
+    def text(self):
+        return _WS_RE.sub(" ", " ".join(self.parts)).strip()
+
+
+def iter_blocks(root):
+    """Blocks under the ``html_parser.Node`` ``root`` in reading order, each text node counted once.
+
+    Text that follows a nested block inside its parent goes to a fresh
+    continuation block, so blocks come out in reading order.
+    """
+    blocks = [Block()]
+    context = [[0, False, True]]  # [block index, inside a link, is a block element] per open element
+    for kind, value in root.walk(skip=SKIP_TAGS):
+        if kind == html_parser.TEXT:
+            size = len(value.strip())
+            if not size:
+                continue
+            block, in_link, _ = context[-1]
+            target = blocks[block]
+            target.parts.append(value)
+            target.chars += size
+            if in_link:
+                target.link_chars += size
+        elif kind == html_parser.START:
+            block, in_link, _ = context[-1]
+            is_block = value in BLOCK_TAGS
+            if is_block:
+                blocks.append(Block())
+                block = len(blocks) - 1
+            context.append([block, in_link or value == "a", is_block])
+        elif len(context) > 1:
+            block, _, is_block = context.pop()
+            if is_block:
+                outer = context[-1][0]
+                blocks.append(Block())
+                for entry in reversed(context):  # the enclosing block and the inline tags inside it
+                    if entry[0] != outer:
+                        break
+                    entry[0] = len(blocks) - 1
+    return [block for block in blocks if block.chars]
+
+
+def is_content(block, min_chars=MIN_BLOCK_CHARS, max_link_density=MAX_LINK_DENSITY):
+    if block.chars < min_chars:
+        return False
+    return block.link_chars / block.chars <= max_link_density
+
+
+def extract_body(page, min_chars=MIN_BLOCK_CHARS, max_link_density=MAX_LINK_DENSITY, separator=SEPARATOR):
+    """Body text of a page: content blocks joined by ``separator``.
+
+    ``page`` is an ``html_parser.Document`` (a BeautifulSoup object is
+    wrapped).  Falls back to the whole ``<body>`` text when no block
+    qualifies.
+    """
+    root = html_parser.as_document(page).body()
+    seen = set()
+    texts = []
+    for block in iter_blocks(root):
+        if not is_content(block, min_chars, max_link_density):
+            continue
+        text = block.text()
+        if text not in seen:
+            seen.add(text)
+            texts.append(text)
+    if texts:
+        return separator.join(texts)
+    return root.text(separator=" ", strip=True)
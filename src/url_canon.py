@@ -0,0 +1,182 @@
+# url_canon.py
+"""Canonical URLs, and the per-run set of article URLs already fetched.
+
+``canonical_url(url)`` is the stable key the history store and search index
+use: https scheme, lower-case host without default port, no fragment, no
+tracking parameters (``utm_*``, ``fbclid`` ...), remaining parameters
+sorted, and no trailing slash or ``index.html``.
+
+Every crawler calls ``claim(url)`` before fetching an article, so the same
+article linked from a page's hero, sidebar and "trending" blocks, listed in
+two sitemaps, or written as a ``?utm_`` variant is fetched once per run.
+``fetcher.fetch`` reports each page it loads through ``observe_page()``,
+which learns from redirects and ``<link rel="canonical">``:
+
+* the requested URL, the final URL and the declared canonical become aliases,
+  so a later link to any of them counts as already fetched
+* a query parameter that a host's canonical links keep dropping
+  (``LEARN_AFTER`` pages, never kept) is ignored for that host from then on
+
+``report()`` prints how many fetches were avoided and why.
+"""
+import re
+import threading
+from collections import Counter
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# ---------------- CONFIG ----------------
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "_hsenc", "_hsmi",
+                   "igshid", "mkt_tok")  # prefixes of query parameters that never identify a page
+DEFAULT_PORTS = {"http": 80, "https": 443}
+INDEX_PAGES = ("index.html", "index.htm", "index.php")
+LEARN_AFTER = 3  # pages whose rel=canonical drops a parameter before it is ignored for the host
+# ----------------------------------------
+
+REPEATED, VARIANT, ALIAS = "repeated link", "URL variant", "rel=canonical/redirect"
+
+_CANONICAL_LINK_RE = re.compile(r"<link\b[^>]*\brel=[\"']?canonical\b[^>]*>", re.I)
+_HREF_RE = re.compile(r"\bhref=(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+))", re.I)
+
+
+def canonical_url(url, ignore_params=()):
+    """Key for ``url`` (see the module docstring); ``ignore_params`` are dropped as well."""
+    parts = urlsplit((url or "").strip())
+    scheme = parts.scheme.lower()
+    if scheme == "http":
+        scheme = "https"
+    host = (parts.hostname or "").rstrip(".")
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+    path = parts.path
+    last = path.rsplit("/", 1)[-1]
+    if last.lower() in INDEX_PAGES:
+        path = path[:-len(last)]
+    path = path.rstrip("/") or "/"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not k.lower().startswith(TRACKING_PARAMS) and k not in ignore_params)
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def declared_canonical(page):
+    """Absolute ``<link rel="canonical">`` of a ``fetcher.FetchResult``, or None."""
+    if page.data is not None:
+        href = page.data.get("canonical")
+    else:
+        end = page.html.lower().find("</head>")
+        head = page.html if end < 0 else page.html[:end]
+        tag = _CANONICAL_LINK_RE.search(head)
+        match = _HREF_RE.search(tag.group(0)) if tag else None
+        href = next((g for g in match.groups() if g is not None), None) if match else None
+    return urljoin(page.final_url, href.strip()) if href else None
+
+
+class SeenSet:
+    """Canonical keys of the URLs fetched (or queued) during this run."""
+
+    def __init__(self, learn_after=LEARN_AFTER):
+        self.learn_after = learn_after
+        self._lock = threading.Lock()
+        self._keys = set()
+        self._raw = set()        # URLs as claimed
+        self._variants = set()   # canonical_url() of the claimed URLs
+        self._aliases = {}       # key -> key of the page it redirected to / declared canonical
+        self._ignored = {}       # host -> query parameters learned not to identify a page
+        self._dropped = {}       # host -> Counter of parameters rel=canonical dropped
+        self._kept = {}          # host -> parameters rel=canonical kept
+        self.claimed = 0
+        self.avoided = Counter()  # reason -> fetches skipped
+
+    def _key(self, url):
+        host = urlsplit(url).netloc.lower()
+        key = canonical_url(url, self._ignored.get(host, ()))
+        return self._aliases.get(key, key)
+
+    def claim(self, url):
+        """True the first time ``url`` (or an equivalent of it) is seen this run."""
+        raw = (url or "").strip()
+        with self._lock:
+            key = self._key(raw)
+            if key not in self._keys:
+                self._keys.add(key)
+                self._raw.add(raw)
+                self._variants.add(canonical_url(raw))
+                self.claimed += 1
+                return True
+            if raw in self._raw:
+                reason = REPEATED
+            elif canonical_url(raw) in self._variants:
+                reason = VARIANT
+            else:
+                reason = ALIAS
+            self._raw.add(raw)
+            self.avoided[reason] += 1
+            return False
+
+    def _learn(self, requested, declared):
+        """Count the query parameters ``declared`` drops from ``requested`` on the same page."""
+        req, dec = urlsplit(requested), urlsplit(declared)
+        if canonical_url(requested.split("?")[0]) != canonical_url(declared.split("?")[0]):
+            return
+        host = req.netloc.lower()
+        kept = {k for k, _ in parse_qsl(dec.query, keep_blank_values=True)}
+        dropped = {k for k, _ in parse_qsl(req.query, keep_blank_values=True)
+                   if not k.lower().startswith(TRACKING_PARAMS)} - kept
+        self._kept.setdefault(host, set()).update(kept)
+        counts = self._dropped.setdefault(host, Counter())
+        counts.update(dropped)
+        ignored = self._ignored.setdefault(host, set())
+        for param in kept & ignored:
+            ignored.discard(param)
+        for param in dropped:
+            if counts[param] >= self.learn_after and param not in self._kept[host] and param not in ignored:
+                ignored.add(param)
+                print(f"🧭 {host}: ignoring ?{param}= in URLs (dropped by rel=canonical on {counts[param]} pages)")
+
+    def observe(self, requested, final_url=None, declared=None):
+        """Record that fetching ``requested`` landed on ``final_url`` declaring ``declared`` as canonical."""
+        with self._lock:
+            if declared:
+                self._learn(final_url or requested, declared)
+            target = self._key(declared or final_url or requested)
+            for url in (requested, final_url):
+                if url:
+                    key = self._key(url)
+                    if key != target:
+                        self._aliases[key] = target
+                    self._keys.add(key)
+            self._keys.add(target)
+
+    def report(self):
+        total = sum(self.avoided.values())
+        if not (total or self.claimed):
+            return
+        print(f"♻️ URL dedup: {self.claimed} distinct article URLs, {total} duplicate fetches avoided")
+        for reason, count in self.avoided.most_common():
+            print(f" - {reason:22} {count:6}")
+        for host, params in sorted(self._ignored.items()):
+            if params:
+                print(f" - {host}: ignoring {', '.join(sorted(params))}")
+
+
+_seen = SeenSet()
+
+
+def claim(url):
+    """True if ``url`` should be fetched: nothing equivalent was claimed or fetched this run."""
+    return _seen.claim(url)
+
+
+def observe_page(page):
+    """Learn redirects and the declared canonical from a ``fetcher.FetchResult``."""
+    try:
+        _seen.observe(page.url, page.final_url, declared_canonical(page))
+    except Exception as e:  # learning is best effort, never fail a fetch over it
+        print(f"⚠️ Could not record canonical URL of {page.url}: {e}")
+
+
+def report():
+    _seen.report()
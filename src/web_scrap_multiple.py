@@ -4,10 +4,17 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from webdriver_manager.chrome import ChromeDriverManager
 import csv
-import time
 import os
 import logging
 
+try:
+    from src import keyword_matcher, link_harvest, readiness, url_canon
+except ImportError:
+    import keyword_matcher
+    import link_harvest
+    import readiness
+    import url_canon
+
 # -------------------- Setup Chrome Driver --------------------
 logging.getLogger('selenium').setLevel(logging.CRITICAL)
 
@@ -19,26 +26,31 @@ chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
 
 service = Service(executable_path=ChromeDriverManager().install(), log_path=os.devnull)
 driver = webdriver.Chrome(service=service, options=chrome_options)
+readiness.install(driver)
+
+LISTING_READY = readiness.network_idle(replaces=5)
+ARTICLE_READY = readiness.selector("span[class*='date'], span[class*='Date']", settle=1.0, replaces=3)
 
 # -------------------- Scraper Function --------------------
 def scrape_articles_from_url(url, keywords, csv_file_path, write_headers=False):
-    print(f"\n🔍 Scraping: {url} with keywords: {keywords}")
+    matcher = keyword_matcher.compile_keywords(keywords, name=url)
+    print(f"\n🔍 Scraping: {url} with keywords: {[k.label for k in matcher.keywords]}")
     
     try:
         driver.get(url)
-        time.sleep(5)  # Wait for page to load
+        LISTING_READY(driver)
     except Exception as e:
         print(f"❌ Failed to load {url}: {e}")
         return
 
-    all_links = driver.find_elements(By.XPATH, "//a")
+    all_links = link_harvest.harvest(driver, visible_only=True)  # text + href of every anchor in one call
     matching_links = []
 
     for link in all_links:
-        text = link.text.strip()
-        if any(keyword.lower() in text.lower() for keyword in keywords):
-            href = link.get_attribute("href")
-            if href and href.startswith("http"):
+        text = link["text"]
+        if matcher.matches(text):
+            href = link["href"]
+            if href and href.startswith("http") and url_canon.claim(href):  # once per run
                 matching_links.append((text, href))
 
     with open(csv_file_path, mode="a", newline="", encoding="utf-8") as file:
@@ -49,7 +61,7 @@ def scrape_articles_from_url(url, keywords, csv_file_path, write_headers=False):
         for title, link in matching_links:
             try:
                 driver.get(link)
-                time.sleep(3)
+                ARTICLE_READY(driver)
             except:
                 print(f"⚠️ Skipping broken link: {link}")
                 continue
@@ -93,6 +105,10 @@ def main():
 
     # Close the browser
     driver.quit()
+    readiness.report()
+    keyword_matcher.report()
+    link_harvest.report()
+    url_canon.report()
     print(f"\n📁 All data saved to: {csv_file}")
 
 # -------------------- Entry Point --------------------